@@ -0,0 +1,294 @@
+#!/bin/env/python3
+""" asyncio interface to a serial port, which uses the same decoding as the
+rest of SerialMonitor but doesn't block the event loop.
+
+Example
+---------
+	port = serial.Serial('/dev/ttyACM0', 9600, timeout=1)
+	async with AsyncPortMonitor(port, 'formatted') as monitor:
+		await monitor.write(b'0')
+		async for frame in monitor.frames():
+			print(frame, end='')
+"""
+import asyncio
+import collections
+import os
+
+import serial
+
+from SerialMonitor.commsInterface import LineFramer, decodeOutput
+
+# Largest number of bytes read from the port at once.
+READ_SIZE = 65536
+# Number of frames waiting to be consumed above which the port stops being
+# read, which makes the device or its driver hold on to the data instead.
+MAX_QUEUED_FRAMES = 10000
+# Number of bytes waiting to be written above which `write` waits for them to
+# be sent to the port.
+WRITE_BUFFER_LIMIT = 65536
+
+class AsyncPortMonitor(object):
+	""" Reads and decodes the data received by a serial port as they arrive,
+	and writes to it, from an asyncio event loop.
+
+	If the port has a file descriptor that the event loop can watch, e.g. a
+	serial.Serial on Unix, it's registered with `loop.add_reader` and read only
+	when there is something to read. Otherwise, e.g. for loop:// ports or on
+	Windows, blocking reads are done in the loop's default executor, so the
+	port's `timeout` should be set for `close` not to wait for too long.
+
+	The received data are decoded like by `commsInterface.grabPortOutput` and
+	can be iterated over with `frames`. Every line is a separate frame in the
+	formatted output. Raw and hex frames are whatever has been read at once.
+
+	Arguments
+	---------
+		port (serial.SerialBase) - instance of an open port interface.
+
+	Optional
+	---------
+		outputFormat (string, default 'formatted') - chosen formatting type,
+			must be one of ['formatted', 'raw', 'hex']. Can be changed while
+			the port is being read.
+		maxQueuedFrames (int, default MAX_QUEUED_FRAMES) - number of frames
+			not yet consumed above which the port stops being read until they
+			are.
+		writeBufferLimit (int, default WRITE_BUFFER_LIMIT) - number of bytes not
+			yet written above which `write` waits for them to be written.
+	"""
+
+	def __init__(self, port, outputFormat='formatted', maxQueuedFrames=MAX_QUEUED_FRAMES,
+			writeBufferLimit=WRITE_BUFFER_LIMIT):
+		if outputFormat not in ['formatted', 'raw', 'hex']:
+			raise ValueError("Requested output format {} not supported.".format(outputFormat))
+
+		if not isinstance(port,serial.SerialBase):
+			raise TypeError('Expected port of type serial.serialposix.Serial,\
+			 got {} instead.'.format(type(port)))
+
+		self.port = port
+		self.outputFormat = outputFormat
+		self.outputBuffer = LineFramer()
+		self.maxQueuedFrames = maxQueuedFrames
+		self.writeBufferLimit = writeBufferLimit
+
+		# Summaries of the warnings of the recent chunks, see `grabPortOutput`.
+		self.warnings = collections.deque(maxlen=1000)
+		self.error = None # Exception that stopped the reading, if any.
+
+		self._loop = None
+		self._fd = None # File descriptor watched by the event loop, if any.
+		self._frames = collections.deque() # Decoded and not yet consumed.
+		self._framesReady = None # asyncio.Event set when there are new frames.
+		self._paused = False # Whether reading has stopped until frames are consumed.
+		self._resumed = None # asyncio.Event set when reading can resume.
+		self._readerTask = None # Task doing the blocking reads without a fd.
+		self._reading = False
+		self._closed = False
+		self._writeBuffer = bytearray() # Bytes not yet written to self._fd.
+		self._drained = None # Future done when self._writeBuffer is empty.
+
+	async def __aenter__(self):
+		self.start()
+		return self
+
+	async def __aexit__(self, excType, excValue, traceback):
+		await self.close()
+
+	def start(self):
+		""" Start reading the port. Must be called from a coroutine or callback
+		running in the event loop that will be used, RuntimeError is raised
+		otherwise. """
+		self._loop = asyncio.get_running_loop()
+		self._framesReady = asyncio.Event()
+		self._resumed = asyncio.Event()
+		self._resumed.set()
+		self._reading = True
+
+		try:
+			self._fd = self.port.fileno()
+			self._loop.add_reader(self._fd, self._onReadable)
+		except (AttributeError, OSError, ValueError, NotImplementedError):
+			# No fd or the event loop can't watch it.
+			self._fd = None
+			self._readerTask = self._loop.create_task(self._readInExecutor())
+
+	async def close(self):
+		""" Stop reading the port and wait for the pending writes to finish.
+		The port itself is left open. """
+		if self._closed:
+			return
+		if self._loop is None: # Never started.
+			self._closed = True
+			return
+		try:
+			await self.drain()
+		finally:
+			self._closed = True
+			self._stopReading(None)
+			if self._readerTask is not None:
+				# Wake up the blocking read if the port supports this.
+				if hasattr(self.port, 'cancel_read'):
+					self.port.cancel_read()
+				self._resumed.set()
+				await asyncio.gather(self._readerTask, return_exceptions=True)
+			if self._fd is not None:
+				self._loop.remove_writer(self._fd)
+
+	async def frames(self):
+		""" Asynchronous iterator over the decoded frames, as strings.
+
+		The iteration finishes when the monitor is closed and all the frames
+		have been consumed. If reading from the port fails, e.g. the device has
+		been unplugged, the exception is raised instead.
+		"""
+		while True:
+			while len(self._frames) > 0:
+				frame = self._frames.popleft()
+				if self._paused and len(self._frames) <= self.maxQueuedFrames//2:
+					self._resumeReading()
+				yield frame
+
+			if not self._reading:
+				if self.error is not None:
+					raise self.error
+				return
+			self._framesReady.clear()
+			await self._framesReady.wait()
+
+	async def write(self, data):
+		""" Write bytes to the port. Returns as soon as they've been buffered,
+		unless there are more than `writeBufferLimit` bytes waiting to be
+		written, in which case it waits until all of them have been.
+
+		Arguments
+		---------
+			data (bytes) - bytes to be sent.
+		"""
+		if self._fd is None:
+			await self._loop.run_in_executor(None, self.port.write, data)
+			return
+
+		data = memoryview(data)
+		if len(self._writeBuffer) == 0:
+			try:
+				data = data[os.write(self._fd, data):]
+			except BlockingIOError:
+				pass
+		if len(data) > 0:
+			if len(self._writeBuffer) == 0:
+				self._loop.add_writer(self._fd, self._onWritable)
+			self._writeBuffer += data
+		if len(self._writeBuffer) > self.writeBufferLimit:
+			await self.drain()
+
+	async def drain(self):
+		""" Wait until all the bytes passed to `write` have been written. """
+		if len(self._writeBuffer) > 0:
+			if self._drained is None:
+				self._drained = self._loop.create_future()
+			await asyncio.shield(self._drained)
+
+	def _onReadable(self):
+		""" Read everything the fd has and decode it. """
+		try:
+			dataStr = os.read(self._fd, READ_SIZE)
+		except BlockingIOError:
+			return
+		except OSError as err: # E.g. EIO when the device has gone away.
+			self._stopReading(serial.SerialException('read failed: {}'.format(err)))
+			return
+		if len(dataStr) == 0:
+			self._stopReading(serial.SerialException('Port reached the end of file.'))
+			return
+		self._decode(dataStr)
+
+	def _onWritable(self):
+		""" Write as many of the buffered bytes as the fd accepts. """
+		try:
+			noBytes = os.write(self._fd, self._writeBuffer)
+		except BlockingIOError:
+			return
+		except OSError as err:
+			del self._writeBuffer[:]
+			self._finishDrain(serial.SerialException('write failed: {}'.format(err)))
+			return
+		del self._writeBuffer[:noBytes]
+		if len(self._writeBuffer) == 0:
+			self._finishDrain(None)
+
+	def _finishDrain(self, error):
+		""" Stop waiting for the fd to be writable and wake up `drain`. """
+		self._loop.remove_writer(self._fd)
+		if self._drained is not None:
+			if error is None:
+				self._drained.set_result(None)
+			else:
+				self._drained.set_exception(error)
+			self._drained = None
+
+	async def _readInExecutor(self):
+		""" Keep reading the port in the default executor when there's no fd
+		to watch. """
+		while self._reading:
+			await self._resumed.wait()
+			if not self._reading:
+				break
+			try:
+				dataStr = await self._loop.run_in_executor(None, self._blockingRead)
+			except Exception as err:
+				self._stopReading(err)
+				break
+			if len(dataStr) > 0 and self._reading:
+				self._decode(dataStr)
+
+	def _blockingRead(self):
+		""" Wait for at least one byte (or the port's timeout) and read all
+		that's waiting. Runs in an executor thread. """
+		return self.port.read(max(1, self.port.inWaiting()))
+
+	def _decode(self, dataStr):
+		""" Decode the bytes into frames and wake up the consumer. """
+		output, self.outputBuffer, warningSummary = decodeOutput(dataStr,
+			self.outputBuffer, self.outputFormat)
+		if len(warningSummary) > 0:
+			self.warnings.append(warningSummary)
+		if len(output) > 0:
+			if self.outputFormat == 'formatted':
+				# Every line ends with '\n', so the last piece is empty.
+				self._frames.extend(line+'\n' for line in output.split('\n')[:-1])
+			else:
+				self._frames.append(output)
+			self._framesReady.set()
+
+		if len(self._frames) >= self.maxQueuedFrames and not self._paused:
+			self._pauseReading()
+
+	def _pauseReading(self):
+		""" Stop reading until enough of the frames have been consumed. """
+		self._paused = True
+		if self._fd is not None:
+			self._loop.remove_reader(self._fd)
+		else:
+			self._resumed.clear()
+
+	def _resumeReading(self):
+		""" Start reading again after `_pauseReading`. """
+		self._paused = False
+		if not self._reading:
+			return
+		if self._fd is not None:
+			self._loop.add_reader(self._fd, self._onReadable)
+		else:
+			self._resumed.set()
+
+	def _stopReading(self, error):
+		""" Stop reading for good and let the consumer know. """
+		if not self._reading:
+			return
+		self._reading = False
+		if error is not None and not self._closed:
+			self.error = error
+		if self._fd is not None:
+			self._loop.remove_reader(self._fd)
+		self._framesReady.set()
@@ -0,0 +1,329 @@
+#!/bin/env/python3
+""" Compact binary captures of the raw traffic of serial ports, which keep the
+exact bytes sent and received, unlike the log file, together with when they
+were read, by which port, and in which direction.
+
+File format
+---------
+All integers are little-endian. The file starts with FILE_HEADER (b'SMCAP' and
+the format version) and is followed by any number of blocks, so new data can
+always be appended and a file cut short by a crash is only missing its last
+block. The incomplete block is cut off before appending to such a file. Every block is a BLOCK_HEADER:
+* compression (uint8) - one of COMPRESSIONS, 0 for none,
+* stored size (uint32) - number of bytes that follow the header,
+* raw size (uint32) - number of bytes after decompression,
+* CRC-32 (uint32) - of the stored bytes,
+followed by the stored bytes. After decompression, a block is a sequence of
+records, each a RECORD_HEADER:
+* timestamp (float64) - time.monotonic() when the data were read or written,
+* port id (uint16) - number assigned to the port by a PORT record,
+* kind (uint8) - IN, OUT, PORT or SYNC,
+* length (uint32) - number of data bytes that follow the header,
+followed by the data. PORT records assign the port id to the port whose name
+is in their data (UTF-8). SYNC records contain the time.time() corresponding to
+their timestamp (float64), and are written whenever a writer starts, so that
+the monotonic timestamps can be converted to dates.
+
+Example
+---------
+	with CaptureWriter('session.smcap', compression='gzip') as capture:
+		capture.write('/dev/ttyACM0', IN, b'Hello\\n')
+	for record in CaptureReader('session.smcap'):
+		print(record.timestamp, record.port, record.direction, record.data)
+"""
+import collections
+import gzip
+import os
+import struct
+import threading
+import time
+import zlib
+
+MAGIC = b'SMCAP'
+VERSION = 1
+FILE_HEADER = struct.Struct('<5sB')
+BLOCK_HEADER = struct.Struct('<BIII')
+RECORD_HEADER = struct.Struct('<dHBI')
+_WALL_TIME = struct.Struct('<d')
+
+# Kinds of records.
+IN = 0 # Data received from the port.
+OUT = 1 # Data sent to the port.
+PORT = 2 # Assigns a port id to a port name.
+SYNC = 3 # Relates the monotonic timestamps to the wall-clock time.
+DIRECTIONS = {IN: 'IN', OUT: 'OUT'}
+
+# Compression methods of the blocks, zstd needs the zstandard package.
+COMPRESSIONS = {None: 0, 'gzip': 1, 'zstd': 2}
+# Number of bytes of records collected before they're compressed and written.
+BLOCK_SIZE = 256*1024
+# Size in bytes of the buffer the file is written through.
+WRITE_BUFFER_SIZE = 1024*1024
+# Longest time in seconds the records can be kept in memory by `flushIfDue`.
+FLUSH_INTERVAL = 1.
+
+# A captured chunk of data. timestamp is time.monotonic() of the writer, port the
+# name of the port, direction 'IN' or 'OUT', and data the bytes.
+CaptureRecord = collections.namedtuple('CaptureRecord', ['timestamp', 'port',
+	'direction', 'data'])
+
+def _zstd():
+	""" Import the optional zstandard module. """
+	try:
+		import zstandard
+	except ImportError:
+		raise ValueError('zstd compression needs the zstandard package, '
+			'e.g. pip install zstandard.')
+	return zstandard
+
+class CaptureWriter(object):
+	""" Appends the raw data of one or more ports to a capture file.
+
+	Records are collected in memory and written as one block, optionally
+	compressed, once there are BLOCK_SIZE bytes of them or when the writer is
+	flushed. Can be used from many threads at once, e.g. the reader writing the
+	received data and the GUI the sent ones.
+
+	Arguments
+	---------
+		fileName (string) - path to the capture file, created if it doesn't
+			exist.
+
+	Optional
+	---------
+		compression (string, default None) - compression of the blocks, one of
+			[None, 'gzip', 'zstd'].
+		append (bool, default True) - whether to append to an existing file
+			rather than overwrite it. An incomplete last block is removed.
+		blockSize (int, default BLOCK_SIZE) - number of bytes of records per
+			block.
+		flushInterval (float, default FLUSH_INTERVAL) - longest time in seconds
+			the records can be kept in memory, see `flushIfDue`.
+	"""
+
+	def __init__(self, fileName, compression=None, append=True, blockSize=BLOCK_SIZE,
+			flushInterval=FLUSH_INTERVAL):
+		if compression not in COMPRESSIONS:
+			raise ValueError("Compression {} not supported.".format(compression))
+		if compression == 'zstd':
+			self._compressor = _zstd().ZstdCompressor()
+		self.fileName = fileName
+		self.compression = compression
+		self.blockSize = blockSize
+		self.flushInterval = flushInterval
+
+		self._lock = threading.Lock()
+		self._block = bytearray() # Records not yet written.
+		self._portIds = {} # Port name: port id, for the ports in this file.
+		self._lastFlush = time.monotonic()
+
+		# Check that an existing file is a capture before appending to it, and
+		# append after its last complete block.
+		if append and os.path.exists(fileName) and os.path.getsize(fileName) > 0:
+			with open(fileName, 'rb+') as existingFile:
+				_readFileHeader(existingFile)
+				existingFile.truncate(_endOfBlocks(existingFile))
+			self._file = open(fileName, 'ab', buffering=WRITE_BUFFER_SIZE)
+		else:
+			self._file = open(fileName, 'wb', buffering=WRITE_BUFFER_SIZE)
+			self._file.write(FILE_HEADER.pack(MAGIC, VERSION))
+		self._addRecord(time.monotonic(), 0, SYNC, _WALL_TIME.pack(time.time()))
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, excType, excValue, traceback):
+		self.close()
+
+	def write(self, portName, direction, dataStr, timestamp=None):
+		""" Record a chunk of data.
+
+		Arguments
+		---------
+			portName (string) - name of the port, e.g. port.name.
+			direction (int) - IN for received data, OUT for sent ones.
+			dataStr (bytes) - the data.
+
+		Optional
+		---------
+			timestamp (float, default None) - time.monotonic() when the data were
+				read or written, now if None.
+		"""
+		if direction not in DIRECTIONS:
+			raise ValueError("Direction {} not supported.".format(direction))
+		if timestamp is None:
+			timestamp = time.monotonic()
+		with self._lock:
+			if self._file.closed: # E.g. data read while the capture was stopped.
+				return
+			portId = self._portIds.get(portName)
+			if portId is None:
+				portId = len(self._portIds)
+				self._portIds[portName] = portId
+				self._addRecord(timestamp, portId, PORT, portName.encode('utf-8'))
+			self._addRecord(timestamp, portId, direction, dataStr)
+
+	def flush(self):
+		""" Write the records collected so far to the file. """
+		with self._lock:
+			if not self._file.closed:
+				self._writeBlock()
+				self._file.flush()
+
+	def flushIfDue(self):
+		""" Flush if it's been more than `flushInterval` since the last flush.
+		Meant to be called periodically while data are captured. """
+		if time.monotonic()-self._lastFlush >= self.flushInterval:
+			self.flush()
+
+	def close(self):
+		""" Write everything and close the file. """
+		with self._lock:
+			if self._file.closed:
+				return
+			self._writeBlock()
+			self._file.close()
+
+	def _addRecord(self, timestamp, portId, kind, dataStr):
+		""" Add a record to the current block. Call with the lock held. """
+		self._block += RECORD_HEADER.pack(timestamp, portId, kind, len(dataStr))
+		self._block += dataStr
+		if len(self._block) >= self.blockSize:
+			self._writeBlock()
+
+	def _writeBlock(self):
+		""" Compress and write the current block. Call with the lock held. """
+		self._lastFlush = time.monotonic()
+		if len(self._block) == 0:
+			return
+		if self.compression == 'gzip':
+			stored = gzip.compress(self._block, compresslevel=1)
+		elif self.compression == 'zstd':
+			stored = self._compressor.compress(bytes(self._block))
+		else:
+			stored = self._block
+		self._file.write(BLOCK_HEADER.pack(COMPRESSIONS[self.compression], len(stored),
+			len(self._block), zlib.crc32(stored)))
+		self._file.write(stored)
+		self._block = bytearray()
+
+class CaptureReader(object):
+	""" Iterates over the IN and OUT records of a capture file, as
+	CaptureRecords, in the order in which they were written.
+
+	An incomplete last block, e.g. because the program writing the file
+	crashed, is ignored and `truncated` is set.
+
+	Arguments
+	---------
+		fileName (string) - path to the capture file.
+
+	Raises
+	---------
+		ValueError - when the file isn't a capture or a block is corrupted.
+	"""
+
+	def __init__(self, fileName):
+		self.fileName = fileName
+		self.truncated = False # Whether the file ends with an incomplete block.
+		# time.time() minus time.monotonic() of the last writer, to convert
+		# timestamps to dates. None if unknown.
+		self.wallClockOffset = None
+
+	def __iter__(self):
+		with open(self.fileName, 'rb') as captureFile:
+			_readFileHeader(captureFile)
+			portNames = {} # Port ids of the current writer.
+			for offset, block in self._blocks(captureFile):
+				for timestamp, portId, kind, dataStr in parseRecords(block):
+					if kind in DIRECTIONS:
+						yield CaptureRecord(timestamp, portNames.get(portId, str(portId)),
+							DIRECTIONS[kind], dataStr)
+					elif kind == PORT:
+						portNames[portId] = dataStr.decode('utf-8')
+					elif kind == SYNC:
+						# A new writer, which numbers the ports anew.
+						portNames = {}
+						self.wallClockOffset = wallClockOffset(timestamp, dataStr)
+
+	def _blocks(self, captureFile):
+		""" Yield the offsets of the complete blocks and their decompressed
+		contents, starting at the current position in the file. """
+		while True:
+			offset = captureFile.tell()
+			header = captureFile.read(BLOCK_HEADER.size)
+			if len(header) < BLOCK_HEADER.size:
+				self.truncated = len(header) > 0
+				return
+			compression, storedSize, rawSize, crc = BLOCK_HEADER.unpack(header)
+			stored = captureFile.read(storedSize)
+			if len(stored) < storedSize:
+				self.truncated = True
+				return
+			if zlib.crc32(stored) != crc:
+				raise ValueError('Corrupted block at byte {} of {}.'.format(offset,
+					self.fileName))
+			yield offset, decompressBlock(compression, stored, rawSize)
+
+def isCapture(fileName):
+	""" Return True if the file starts like a capture file. """
+	with open(fileName, 'rb') as captureFile:
+		return captureFile.read(len(MAGIC)) == MAGIC
+
+def decompressBlock(compression, stored, rawSize):
+	""" Return the records stored in a block, see BLOCK_HEADER.
+
+	Arguments
+	---------
+		compression (int) - compression method from the block header.
+		stored (bytes-like) - stored bytes of the block.
+		rawSize (int) - size of the block after decompression.
+
+	Returns
+	---------
+		(bytes-like) - the records of the block.
+	"""
+	if compression == COMPRESSIONS['gzip']:
+		return gzip.decompress(stored)
+	elif compression == COMPRESSIONS['zstd']:
+		return _zstd().ZstdDecompressor().decompress(stored, max_output_size=rawSize)
+	elif compression == COMPRESSIONS[None]:
+		return stored
+	raise ValueError('Unknown block compression {}.'.format(compression))
+
+def parseRecords(block):
+	""" Yield (timestamp, port id, kind, data) of all the records in a
+	decompressed block. """
+	view = memoryview(block)
+	position = 0
+	while position + RECORD_HEADER.size <= len(block):
+		timestamp, portId, kind, length = RECORD_HEADER.unpack_from(block, position)
+		position += RECORD_HEADER.size
+		yield timestamp, portId, kind, bytes(view[position:position+length])
+		position += length
+
+def wallClockOffset(timestamp, dataStr):
+	""" Return time.time() minus time.monotonic() of the writer of a SYNC record. """
+	return _WALL_TIME.unpack(dataStr)[0]-timestamp
+
+def _endOfBlocks(captureFile):
+	""" Return the offset of the end of the last complete block, starting at
+	the current position in the file. Only the block headers are read. """
+	size = os.fstat(captureFile.fileno()).st_size
+	end = captureFile.tell()
+	while end + BLOCK_HEADER.size <= size:
+		captureFile.seek(end)
+		storedSize = BLOCK_HEADER.unpack(captureFile.read(BLOCK_HEADER.size))[1]
+		if end + BLOCK_HEADER.size + storedSize > size:
+			break
+		end += BLOCK_HEADER.size + storedSize
+	return end
+
+def _readFileHeader(captureFile):
+	""" Read the file header and check that it's a capture of this version. """
+	header = captureFile.read(FILE_HEADER.size)
+	if len(header) < FILE_HEADER.size or FILE_HEADER.unpack(header)[0] != MAGIC:
+		raise ValueError('{} is not a capture file.'.format(captureFile.name))
+	if FILE_HEADER.unpack(header)[1] > VERSION:
+		raise ValueError('{} is a capture of a newer version ({}).'.format(
+			captureFile.name, FILE_HEADER.unpack(header)[1]))
@@ -3,41 +3,189 @@
 import serial
 import sys
 import glob
+import os
+import selectors
+import socket
+import struct
+import time
+import threading
+import queue
+import unicodedata
 
-def getActivePorts():
+# Time in seconds after which a port being probed by getActivePorts is treated
+# as not active, and how many ports are probed at the same time.
+PROBE_TIMEOUT = 1.
+PROBE_WORKERS = 32
+# Largest number of bytes read from a port at once by a ReaderPool. Whatever the
+# driver has buffered is normally read in one go.
+READ_SIZE = 65536
+# Shortest and longest time in seconds between reads chosen by a ReadScheduler,
+# and the factor by which the time grows while nothing is being received.
+MIN_READ_INTERVAL = 0.01
+MAX_READ_INTERVAL = 1.
+READ_BACKOFF = 2.
+# Size in bytes of the serial driver's input buffer, which drops whatever else
+# is received once it's full. 4095 on Linux, 4096 by default on Windows.
+DRIVER_BUFFER_SIZE = 4095
+# Input buffer size requested from the drivers that allow changing it (Windows).
+REQUESTED_BUFFER_SIZE = 65536
+# The line is treated as saturated once more than this fraction of the bytes
+# the baud rate allows is received in a SATURATION_WINDOW seconds long window.
+SATURATION_THRESHOLD = 0.9
+SATURATION_WINDOW = 1.
+# ioctl that returns the error counters of a serial port on Linux and the layout
+# of the returned struct serial_icounter_struct (cts, dsr, rng, dcd, rx, tx,
+# frame, overrun, parity, brk, buf_overrun and 9 reserved ints). The number is
+# only right on the architectures that use the generic ioctl numbers, MIPS,
+# PowerPC, SPARC etc. have their own, so the counters aren't read there.
+TIOCGICOUNT = 0x545D
+TIOCGICOUNT_MACHINES = ('x86', 'i386', 'i486', 'i586', 'i686', 'amd64', 'arm', 'aarch64', 'riscv')
+_ICOUNTER_STRUCT = struct.Struct('20i')
+# Shortest time in seconds between two reads of the driver's error counters by
+# an OverflowMonitor, so that they don't cost a system call for every read.
+ERROR_COUNTER_INTERVAL = 1.
+
+# All the bytes within and outside of the ASCII range, used to split the
+# received data into valid and invalid characters in bulk.
+_ASCII_BYTES = bytes(range(128))
+_NON_ASCII_BYTES = bytes(range(128, 256))
+# Hex-codes of all the possible bytes, e.g. _HEX_CODES[10] = '0x0a'.
+_HEX_CODES = ['0x{:02x}'.format(c) for c in range(256)]
+
+class _ControlCharacterTable(dict):
+	""" Translation table for str.translate that maps control characters, i.e.
+	ones in any of the Unicode C categories (control, format, surrogate, private
+	use and unassigned), onto the replacement character U+FFFD. Every other
+	character is mapped onto itself.
+
+	Entries are looked up in unicodedata the first time a character is seen and
+	then cached, so every distinct character is only categorised once.
+	"""
+
+	# Characters that can still be cached. Will only see characters outside of
+	# the Basic Multilingual Plane when the caller supplies them, so don't let
+	# the table grow unbounded because of those.
+	MAX_CACHED = 0x10000
+
+	def __missing__(self, codePoint):
+		if unicodedata.category(chr(codePoint))[0] == 'C':
+			replacement = 0xFFFD
+		else:
+			replacement = codePoint
+		if codePoint < self.MAX_CACHED:
+			self[codePoint] = replacement
+		return replacement
+
+# Pre-compute all the characters that the decoding in grabPortOutput can produce.
+_CONTROL_CHARACTERS = _ControlCharacterTable()
+for _c in range(256):
+	_CONTROL_CHARACTERS[_c]
+del _c
+
+def sanitiseOutput(text):
+	""" Replace control characters with the unicode unknown character (U+FFFD).
+
+	Otherwise, some of them can stall the log or the console. All the Unicode
+	characters in the C categories (control, format, surrogate, private use and
+	unassigned) are replaced, the rest are left untouched.
+
+	Arguments
+	---------
+		text (string) - output to be sanitised, e.g. from `grabPortOutput`.
+
+	Returns
+	---------
+		(string) - `text` with the control characters replaced.
+	"""
+	return text.translate(_CONTROL_CHARACTERS)
+
+def getActivePorts(probe=False, timeout=PROBE_TIMEOUT, maxWorkers=PROBE_WORKERS,
+		candidatePorts=None):
 	""" Find the open serial ports and return as a list.
 
+	By default, only the ports reported by serial.tools.list_ports are returned,
+	which doesn't require opening any of them. With `probe`, every candidate
+	port of this platform is also opened and closed to see if it can be used.
+	This is done by many threads at once so that it doesn't take long when
+	there are many ports.
+
 	Main part of the code from:
 	http://stackoverflow.com/questions/12090503/listing-available-com-ports-with-python
 
+	Optional
+	---------
+		probe (bool, default False) - whether to try to open all the candidate
+			ports, also the ones not known to serial.tools.list_ports.
+		timeout (float, default PROBE_TIMEOUT) - time in seconds after which
+			a port that's still being opened is treated as not active.
+		maxWorkers (int, default PROBE_WORKERS) - maximum number of ports
+			opened at the same time.
+		candidatePorts (list of strings, default None) - ports to probe instead
+			of the ones found on this platform. Implies `probe`.
+
 	Returns
     -------
     	(list) a list of strings denoting names of open ports.
 	"""
 
-	if sys.platform.startswith('win'):
-		candidatePorts = ['COM' + str(i + 1) for i in range(256)]
+	# Imported here not to slow down importing this module.
+	import serial.tools.list_ports
+	import concurrent.futures
 
-	elif sys.platform.startswith('linux') or sys.platform.startswith('cygwin'):
-		candidatePorts = glob.glob('/dev/tty[A-Za-z]*')
+	listedPorts = sorted(p.device for p in serial.tools.list_ports.comports())
+	if not probe and candidatePorts is None:
+		return listedPorts
 
-	elif sys.platform.startswith('darwin'):
-		candidatePorts = glob.glob('/dev/tty.*')
+	if candidatePorts is None:
+		if sys.platform.startswith('win'):
+			candidatePorts = ['COM' + str(i + 1) for i in range(256)]
 
-	else:
-		raise EnvironmentError('Unsupported platform')
+		elif sys.platform.startswith('linux') or sys.platform.startswith('cygwin'):
+			candidatePorts = glob.glob('/dev/tty[A-Za-z]*')
 
-	ports = []
-	for port in candidatePorts:
-		try:
-			s = serial.Serial(port)
-			s.close()
-			ports.append(port)
-		except (OSError, serial.SerialException):
-			pass
+		elif sys.platform.startswith('darwin'):
+			candidatePorts = glob.glob('/dev/tty.*')
+
+		else:
+			raise EnvironmentError('Unsupported platform')
+
+		# Ports that list_ports knows about but that don't match the patterns.
+		candidatePorts = candidatePorts + [p for p in listedPorts if p not in candidatePorts]
+
+	if len(candidatePorts) == 0:
+		return []
+
+	# Probes that are still running after the timeout are left to finish
+	# in the background, their ports are skipped.
+	noWorkers = max(1, min(maxWorkers, len(candidatePorts)))
+	executor = concurrent.futures.ThreadPoolExecutor(max_workers=noWorkers)
+	try:
+		futures = [executor.submit(_probePort, port) for port in candidatePorts]
+		start = time.monotonic()
+		ports = []
+		for i, future in enumerate(futures):
+			# The i-th port starts being probed once the ones before it in
+			# the same worker are done, at the latest.
+			deadline = start + timeout*(i//noWorkers + 1)
+			try:
+				if future.result(timeout=max(0, deadline-time.monotonic())):
+					ports.append(candidatePorts[i])
+			except concurrent.futures.TimeoutError:
+				future.cancel()
+	finally:
+		executor.shutdown(wait=False)
 
 	return ports
 
+def _probePort(port):
+	""" Try to open and close the given port, return True if that worked. """
+	try:
+		s = serial.Serial(port)
+		s.close()
+		return True
+	except (OSError, serial.SerialException):
+		return False
+
 def checkConnection(port):
 	""" Check the serial port connection.
 
@@ -76,7 +224,8 @@ def grabPortOutput(port, outputBuffer, outputFormat):
 
 	Support different formatting types, which depend on the supplied `outputFormat`
 	argument:
-	* raw - convert bytes from the `port` into `str` (unicode) one byte at a time,
+	* raw - convert bytes from the `port` into `str` (unicode) with one character
+	  per byte,
 	* hex - convert all bytes from the `port` into `str` containing hex-codes of
 	  the individual bytes, e.g. 0x00:0x01:0x0a,
 	* formatted - expect the bytes in the `port` to contain end-of-line characters
@@ -84,11 +233,15 @@ def grabPortOutput(port, outputBuffer, outputFormat):
 	  is incomplete, it will be returned in `outputBuffer`. For `hex` and `raw`
 	  formatting types, `outputBuffer` is not used.
 
+	`outputBuffer` can also be a `LineFramer`, which will then hold the incomplete
+	line instead of a string. This avoids copying the pending part of the message
+	on every call and should be preferred by code that reads continuously.
+
 	Arguments
 	---------
 		port (serial.Serial) - instance of a port interface.
-		outputBuffer (string) - leftover contents of an incomplete message
-			received during previous retrieval of output.
+		outputBuffer (string or LineFramer) - leftover contents of an incomplete
+			message received during previous retrieval of output.
 		outputFormat (string) - chosen formatting type, must be one of
 			['formatted', 'raw', 'hex']
 
@@ -104,7 +257,7 @@ def grabPortOutput(port, outputBuffer, outputFormat):
 	---------
 		ValueError - when supplied `outputFormat` is not supported.
 		TypeError - when `port` or `outputBuffer` are not of expected types
-		(serial.SerialBase and str, respectively).
+		(serial.SerialBase and str or LineFramer, respectively).
 	"""
 
 	# will hold any warnings encountered.
@@ -120,78 +273,822 @@ def grabPortOutput(port, outputBuffer, outputFormat):
 		raise TypeError('Expected port of type serial.serialposix.Serial,\
 		 got {} instead.'.format(type(port)))
 
-	if not isinstance(outputBuffer,str):
-		raise TypeError('Expected outputBuffer of type str, got {}\
+	if not isinstance(outputBuffer,(str,LineFramer)):
+		raise TypeError('Expected outputBuffer of type str or LineFramer, got {}\
 		 instead.'.format(type(outputBuffer)))
 
 	# if incoming bytes are waiting to be read from the serial input buffer
-	if (port.inWaiting() > 0):
+	noBytes = port.inWaiting() # Only ask once, it's a system call.
+	if (noBytes > 0):
 		# Read the bytes (dataStr is <class 'bytes'>).
-		dataStr = port.read(port.inWaiting())
-
-		# Pass to the buffer and convert from binary array to \n-separated ASCII,
-		# unless the user desires to see the raw, undecoded output. In such case,
-		# don't expect end of line characters. Also allow the user to see the
-		# hex codes of the received bytes, not the corresponding unicode characters.
-
-		# Processed and (arguably) nicely formatted output.
-		if outputFormat == "formatted":
-			# Trying to decode the entire dataStr to ASCII will discard all the
-			# bytes contained therein even if only one of them is invalid. Thus,
-			# go through each byte in dataStr one by one.
-			for i in range(len(dataStr)): # Need the index of the bye to cast an error, if need be.
-				try:
-					if dataStr[i] < 128: # Valid ASCII character.
-						outputBuffer += chr(dataStr[i])
-					else: # Not in ASCII range. chr() will cope with this becuase
-						# it convers to Unicode, which has a larger range but here
-						# we specifically want ASCII.
-						raise UnicodeDecodeError('SM',dataStr,i,i+1,'Outside of ASCII range, i.e. >=128.')
-				except UnicodeDecodeError as uderr:
-					# Sometimes rubbish gets fed to the serial port.
-					# Log the error and the line that caused it. Include index
-					# of every error to keep track of all the encountered errors.
-					warningSummary['UnicodeDecodeError{}'.format(len(warningSummary))] = \
-					'UnicodeDecodeError :( with character:\n\t{}'.format(dataStr[i])
-
-			# Extract any full lines and log them - there can be more than
-			# one, depending on the loop frequencies on either side of the
-			# serial conneciton
-			lines = outputBuffer.rpartition("\n")
-			if lines[0]: # lines[0] = complete lines terminated with '\n'.
-				for line in lines[0].split("\n"):
-					output += "{}\n".format(line)
-
-				# Keep the remaining output in buffer if there are no EOL characters
-				# in it. This is useful if only part of a message was received on last
-				# buffer update.
-				outputBuffer = lines[2] # lines[2] = Remainder after the
-					# last '\n' and not terminated with '\n'.
-					# lines[1] = '\n'
-
-		# Raw but not formatted output.
-		elif outputFormat == "raw":
-			# Just print whatever came out of the serial port as a string.
-			# Converting dataStr to unicode used to sometimes skip characters
-			# (e.g. for 0x00) and the remaining parts of the dataStr.
-			# It would also cause UnicodeDecodeErrors, which were caught here and
-			# the wrong bytes were replaced with u'\uFFFD'. In Python 3, this is
-			# no longer necessary - all strings are unicode and the maximum range
-			# of unicode codes (0x10FFFF) can't be exceeded with a single byte.
-			for c in dataStr: # For every byte (dataStr is <class 'bytes'>)
-				output += chr(c) # Convert one byte at a time.
-
-		# Hex output.
+		dataStr = port.read(noBytes)
+		output, outputBuffer, warningSummary = decodeOutput(dataStr, outputBuffer,
+			outputFormat)
+
+	return output, outputBuffer, warningSummary
+
+def decodeOutput(dataStr, outputBuffer, outputFormat):
+	""" Format the bytes received from a serial port into a string.
+
+	This is the decoding part of `grabPortOutput`, which can also be used by code
+	that reads from the port by itself, e.g. `PortReader`. See `grabPortOutput`
+	for the description of the supported formatting types.
+
+	Arguments
+	---------
+		dataStr (bytes) - bytes received from the port.
+		outputBuffer (string or LineFramer) - leftover contents of an incomplete
+			message received during previous retrieval of output.
+		outputFormat (string) - chosen formatting type, must be one of
+			['formatted', 'raw', 'hex']
+
+	Returns
+	---------
+		(string) - formatted output.
+		(string or LineFramer) - leftover buffer contents from a possible
+			incomplete message. The same object is returned for a LineFramer.
+		(dict) - summary of warnings and errors raised.
+	"""
+
+	# will hold any warnings encountered.
+	warningSummary = {}
+	# formatted output
+	output = ""
+
+	# Pass to the buffer and convert from binary array to \n-separated ASCII,
+	# unless the user desires to see the raw, undecoded output. In such case,
+	# don't expect end of line characters. Also allow the user to see the
+	# hex codes of the received bytes, not the corresponding unicode characters.
+
+	# Processed and (arguably) nicely formatted output.
+	if outputFormat == "formatted":
+		# Trying to decode the entire dataStr to ASCII will discard all the
+		# bytes contained therein even if only one of them is invalid. Thus,
+		# strip the invalid bytes in bulk first and decode what's left in one go.
+		asciiStr = dataStr.translate(None, _NON_ASCII_BYTES)
+		if len(asciiStr) != len(dataStr):
+			# Sometimes rubbish gets fed to the serial port. Log every invalid
+			# byte, in the order in which they were received. Include index
+			# of every error to keep track of all the encountered errors.
+			for c in dataStr.translate(None, _ASCII_BYTES):
+				warningSummary['UnicodeDecodeError{}'.format(len(warningSummary))] = \
+				'UnicodeDecodeError :( with character:\n\t{}'.format(c)
+
+		# Extract any full lines and log them - there can be more than
+		# one, depending on the loop frequencies on either side of the
+		# serial conneciton. Keep the remaining output in the buffer if it isn't
+		# terminated with an EOL character. This is useful if only part of a
+		# message was received on last buffer update.
+		if isinstance(outputBuffer, LineFramer):
+			output = b''.join(outputBuffer.feed(asciiStr)).decode('utf-8')
 		else:
-			# Take one byte at a time from dataStr (<class 'bytes'>) and format
-			# it as a hex-code, e.g. 0x12 or 0x03. Iterating over dataStr will
-			# produce single integers (<class 'int'>). Separate consecutive bytes
-			# with ':'.
-			# NOTE 1 - there's a leading '0' for integers smaller than 0x0F+1=16.
-			#          Need it to understand transmissions involving many bytes.
-			# NOTE 2 - because we process one byte at a time, endian doesn't matter;
-			#          big or small will yield the same *single* byte.
-			# NOTE 3 - there will be no leading or trailing colon (':').
-			output = ':'.join('0x'+c.to_bytes(1,'big',signed=False).hex() for c in dataStr)
+			# Legacy string buffer - frame it for the duration of this call.
+			lineFramer = LineFramer(outputBuffer.encode('utf-8'))
+			output = b''.join(lineFramer.feed(asciiStr)).decode('utf-8')
+			outputBuffer = lineFramer.pending.decode('utf-8')
+
+	# Raw but not formatted output.
+	elif outputFormat == "raw":
+		# Just print whatever came out of the serial port as a string.
+		# Converting dataStr to unicode used to sometimes skip characters
+		# (e.g. for 0x00) and the remaining parts of the dataStr.
+		# It would also cause UnicodeDecodeErrors, which were caught here and
+		# the wrong bytes were replaced with u'\uFFFD'. In Python 3, this is
+		# no longer necessary - all strings are unicode and the maximum range
+		# of unicode codes (0x10FFFF) can't be exceeded with a single byte.
+		# Latin-1 maps every byte onto the Unicode character with the same code,
+		# i.e. it's the same as chr() of every byte but done in one go.
+		output = dataStr.decode('latin-1')
+
+	# Hex output.
+	else:
+		# Format every byte from dataStr (<class 'bytes'>) as a hex-code, e.g.
+		# 0x12 or 0x03, by looking it up in a pre-computed table. Separate
+		# consecutive bytes with ':'.
+		# NOTE 1 - there's a leading '0' for integers smaller than 0x0F+1=16.
+		#          Need it to understand transmissions involving many bytes.
+		# NOTE 2 - because we process one byte at a time, endian doesn't matter;
+		#          big or small will yield the same *single* byte.
+		# NOTE 3 - there will be no leading or trailing colon (':').
+		output = ':'.join([_HEX_CODES[c] for c in dataStr])
 #TODO for raw and hex output, outputBuffer makes no sense.
 	return output, outputBuffer, warningSummary
+
+class LineFramer(object):
+	""" Splits a stream of bytes into frames terminated with a delimiter.
+
+	The bytes that haven't been terminated yet are kept in a bytearray and only
+	the newly appended part of it is searched for the delimiters. Therefore, the
+	total cost of framing a stream is proportional to its length, irrespective
+	of how it's been split into chunks.
+
+	Optional
+	---------
+		initial (bytes, default empty) - start of an incomplete frame, e.g.
+			one received before this object was created.
+		delimiter (bytes, default b'\n') - marks the end of every frame.
+	"""
+
+	def __init__(self, initial=b'', delimiter=b'\n'):
+		if len(delimiter) < 1:
+			raise ValueError('The delimiter must not be empty.')
+
+		self.delimiter = bytes(delimiter)
+		self.buffer = bytearray(initial)
+		# Everything before this index has been searched and isn't a delimiter.
+		self._searchStart = 0
+
+	def feed(self, data):
+		""" Append the received bytes and extract all the complete frames.
+
+		Arguments
+		---------
+			data (bytes-like) - bytes received from the port.
+
+		Returns
+		---------
+			(list of bytes) - complete frames, each ending with the delimiter,
+				in the order in which they were received.
+		"""
+		self.buffer += data
+
+		frames = []
+		frameStart = 0
+		delimiterEnd = self.buffer.find(self.delimiter, self._searchStart)
+		while delimiterEnd >= 0:
+			delimiterEnd += len(self.delimiter)
+			frames.append(bytes(self.buffer[frameStart:delimiterEnd]))
+			frameStart = delimiterEnd
+			delimiterEnd = self.buffer.find(self.delimiter, frameStart)
+
+		# Drop the extracted frames. Deleting from the front of a bytearray
+		# doesn't copy the remaining contents.
+		if frameStart > 0:
+			del self.buffer[:frameStart]
+
+		# Part of a delimiter could be at the very end, so start the next search
+		# just before it.
+		self._searchStart = max(0, len(self.buffer)-len(self.delimiter)+1)
+		return frames
+
+	@property
+	def pending(self):
+		""" (bytes) - the incomplete frame received so far. """
+		return bytes(self.buffer)
+
+	def clear(self):
+		""" Discard the incomplete frame. """
+		del self.buffer[:]
+		self._searchStart = 0
+
+	def __len__(self):
+		return len(self.buffer)
+
+class PortReader(threading.Thread):
+	""" Background thread that blocks on a serial port, decodes the received
+	bytes and passes the results to the consumer through a thread-safe queue.
+
+	Reading as soon as the data arrive, rather than when a timer fires, stops
+	the OS buffers from overflowing at high baud rates and keeps the decoding
+	off the GUI thread. The consumer gets notified via the `notify` callback,
+	which is invoked from the reader thread at most once until the outputs are
+	collected with `getOutputs`. Thus, many chunks can be rendered in one batch.
+
+	The GUI reads its ports with a `ReaderPool` and `portSession.PortSession`s
+	instead. This class is kept for programs that only read one port.
+
+	Arguments
+	---------
+		port (serial.SerialBase) - instance of an open port interface. Its
+			`timeout` is the longest a single blocking read may take before
+			the thread checks whether it has been stopped.
+		outputFormat (string) - chosen formatting type, must be one of
+			['formatted', 'raw', 'hex']. Can be changed while the thread runs.
+
+	Optional
+	---------
+		outputBuffer (string or LineFramer, default None) - leftover contents
+			of an incomplete message, see `grabPortOutput`. A new LineFramer
+			is used if None.
+		notify (callable, default None) - function without arguments called
+			when new outputs are waiting to be collected. GUI code should
+			wrap this in wx.CallAfter because it is called from the reader thread.
+		probeInterval (float, default None) - how often, in seconds, to check
+			that the port still works while nothing is being received. The reads
+			themselves fail when the device is unplugged or the port reports
+			the end of file on most platforms, so this is only needed where
+			they block instead. No checks if None.
+
+	The thread stops as soon as reading from the port fails, so `alive` tells
+	whether the connection works without the consumer having to query the port.
+	"""
+
+	def __init__(self, port, outputFormat, outputBuffer=None, notify=None,
+			probeInterval=None):
+		if outputFormat not in ['formatted', 'raw', 'hex']:
+			raise ValueError("Requested output format {} not supported.".format(outputFormat))
+
+		if not isinstance(port,serial.SerialBase):
+			raise TypeError('Expected port of type serial.serialposix.Serial,\
+			 got {} instead.'.format(type(port)))
+
+		threading.Thread.__init__(self, name="PortReader({})".format(port.name))
+		self.daemon = True # Don't keep the application alive because of this.
+
+		self.port = port
+		self.outputFormat = outputFormat
+		self.outputBuffer = LineFramer() if outputBuffer is None else outputBuffer
+		self.notify = notify
+		self.probeInterval = probeInterval
+
+		self.outputQueue = queue.Queue() # Holds (output, warningSummary) tuples.
+		self.alive = True # Becomes False when the port can no longer be read.
+		self.error = None # Exception that caused the thread to stop, if any.
+		self.lastActivity = time.monotonic() # When data were last received.
+
+		self._stopEvent = threading.Event()
+		self._notified = threading.Event() # Set while a notification is pending.
+
+	def run(self):
+		""" Keep reading from the port until stopped or the connection fails. """
+		noWaiting = 0 # Bytes known to be waiting in the input buffer.
+		lastProbe = time.monotonic()
+		while not self._stopEvent.is_set():
+			try:
+				# Block until at least one byte arrives (or the timeout expires),
+				# or grab everything that was waiting after the last read.
+				dataStr = self.port.read(max(1, noWaiting))
+				if len(dataStr) > 0:
+					self.lastActivity = time.monotonic()
+					noWaiting = self.port.inWaiting()
+				else:
+					noWaiting = 0
+					# Nothing received, make sure it's not because the port is
+					# gone, but not every time.
+					if (self.probeInterval is not None
+							and time.monotonic()-lastProbe >= self.probeInterval):
+						lastProbe = time.monotonic()
+						if not self.port.readable():
+							raise serial.SerialException('Port is no longer readable.')
+						self.port.inWaiting()
+			except BaseException as err:
+				# The port has been closed or the device has been unplugged.
+				if not self._stopEvent.is_set():
+					self.error = err
+				break
+
+			if len(dataStr) > 0:
+				# outputBuffer is only ever touched by this thread.
+				output, self.outputBuffer, warningSummary = decodeOutput(dataStr,
+					self.outputBuffer, self.outputFormat)
+				self.outputQueue.put((output, warningSummary))
+				self._postNotification()
+
+		self.alive = False
+		self._postNotification() # Let the consumer know that we've stopped.
+
+	def getOutputs(self):
+		""" Collect all the outputs decoded since the last call.
+
+		Returns
+		---------
+			(list) - (string, dict) tuples with the formatted output and the
+				summary of warnings of every chunk read from the port.
+		"""
+		self._notified.clear()
+		outputs = []
+		while True:
+			try:
+				outputs.append(self.outputQueue.get_nowait())
+			except queue.Empty:
+				break
+		return outputs
+
+	def stop(self, timeout=None):
+		""" Ask the thread to finish and wait for it to do so.
+
+		Optional
+		---------
+			timeout (float, default None) - longest time to wait for the thread
+				in seconds. Wait until it finishes if None.
+		"""
+		self._stopEvent.set()
+		# Wake up a blocking read on platforms where pyserial supports this.
+		if hasattr(self.port, 'cancel_read'):
+			try:
+				self.port.cancel_read()
+			except BaseException:
+				pass
+		if self.is_alive() and threading.current_thread() is not self:
+			self.join(timeout)
+
+	def _postNotification(self):
+		""" Notify the consumer unless there already is a pending notification. """
+		if self.notify is not None and not self._notified.is_set():
+			self._notified.set()
+			self.notify()
+
+class ReadScheduler(object):
+	""" Chooses how long to wait before reading a port again, trading latency
+	for CPU time depending on how busy the port is, instead of a fixed delay.
+
+	After every read, pass what has been read to `update`, which returns the
+	time to wait until the next one:
+	* if more bytes are already waiting, read again after `minInterval`,
+	* if bytes are arriving faster than during the previous interval, halve
+	  the interval,
+	* if nothing has been received, multiply the interval by `backoff`, up to
+	  `maxInterval`,
+	* otherwise, i.e. when data arrive at a steady rate, keep the interval.
+
+	Optional
+	---------
+		minInterval (float, default MIN_READ_INTERVAL) - shortest interval in
+			seconds.
+		maxInterval (float, default MAX_READ_INTERVAL) - longest interval in
+			seconds, reached when the port has been idle for a while.
+		backoff (float, default READ_BACKOFF) - factor by which the interval
+			grows after every read that returned nothing, must be above 1.
+	"""
+
+	def __init__(self, minInterval=MIN_READ_INTERVAL, maxInterval=MAX_READ_INTERVAL,
+			backoff=READ_BACKOFF):
+		if minInterval <= 0 or maxInterval < minInterval:
+			raise ValueError('Expected 0 < minInterval <= maxInterval, got {} and {}.'.format(
+				minInterval, maxInterval))
+		if backoff <= 1:
+			raise ValueError('Backoff must be above 1, got {}.'.format(backoff))
+		self.minInterval = minInterval
+		self.maxInterval = maxInterval
+		self.backoff = backoff
+
+		self.interval = minInterval # Current interval in seconds.
+		self.fillRate = 0. # Bytes per second received during the last interval.
+
+	@property
+	def rate(self):
+		""" Current number of reads per second. """
+		return 1./self.interval
+
+	def setLimits(self, minInterval=None, maxInterval=None):
+		""" Change the shortest and/or the longest interval, keeping the
+		current one within them.
+
+		Optional
+		---------
+			minInterval (float, default None) - shortest interval in seconds,
+				unchanged if None.
+			maxInterval (float, default None) - longest interval in seconds,
+				unchanged if None.
+		"""
+		minInterval = self.minInterval if minInterval is None else minInterval
+		maxInterval = self.maxInterval if maxInterval is None else maxInterval
+		if minInterval <= 0 or maxInterval < minInterval:
+			raise ValueError('Expected 0 < minInterval <= maxInterval, got {} and {}.'.format(
+				minInterval, maxInterval))
+		self.minInterval = minInterval
+		self.maxInterval = maxInterval
+		self.interval = min(max(self.interval, minInterval), maxInterval)
+
+	def update(self, noBytes, noWaiting=0, elapsed=None):
+		""" Account for a read and return the time to wait until the next one.
+
+		Arguments
+		---------
+			noBytes (int) - number of bytes received since the previous read.
+
+		Optional
+		---------
+			noWaiting (int, default 0) - number of bytes still waiting to be
+				read, e.g. port.inWaiting().
+			elapsed (float, default None) - time since the previous read in
+				seconds, the current interval if None.
+
+		Returns
+		---------
+			(float) - time until the next read in seconds.
+		"""
+		if elapsed is None or elapsed <= 0:
+			elapsed = self.interval
+		fillRate = noBytes/elapsed
+
+		if noWaiting > 0:
+			self.interval = self.minInterval
+		elif noBytes == 0:
+			self.interval = min(self.interval*self.backoff, self.maxInterval)
+		elif fillRate > self.fillRate:
+			self.interval = max(self.interval/2., self.minInterval)
+		self.fillRate = fillRate
+		return self.interval
+
+def setBufferSize(port, rxSize=REQUESTED_BUFFER_SIZE):
+	""" Ask the driver to use a larger input buffer, where pySerial supports
+	this, so that less data are dropped when the port isn't read quickly enough.
+
+	Arguments
+	---------
+		port (serial.SerialBase) - instance of an open port interface.
+
+	Optional
+	---------
+		rxSize (int, default REQUESTED_BUFFER_SIZE) - requested size in bytes.
+
+	Returns
+	---------
+		(int) - size of the driver's input buffer, DRIVER_BUFFER_SIZE if it
+			couldn't be changed.
+	"""
+	if hasattr(port, 'set_buffer_size'):
+		try:
+			port.set_buffer_size(rx_size=rxSize)
+			return rxSize
+		except (OSError, ValueError, serial.SerialException):
+			pass
+	return DRIVER_BUFFER_SIZE
+
+def _bytesWaiting(fd):
+	""" Number of bytes waiting to be read from the file descriptor of a
+	terminal, 0 if it can't be found out. """
+	try:
+		import fcntl, termios
+		return struct.unpack('i', fcntl.ioctl(fd, termios.FIONREAD, bytes(4)))[0]
+	except (ImportError, AttributeError, OSError):
+		return 0
+
+def readErrorCounters(port):
+	""" Get the numbers of the receive errors counted by the driver since the
+	port was opened, where available (Linux serial drivers that implement
+	TIOCGICOUNT, not e.g. pseudo-terminals or USB CDC devices).
+
+	Arguments
+	---------
+		port (serial.SerialBase) - instance of an open port interface.
+
+	Returns
+	---------
+		(dict) - counts of 'overrun' (bytes lost by the UART), 'bufferOverrun'
+			(bytes lost because the driver's buffer was full), 'parity' and
+			'framing' errors, and 'break' conditions. None if not available.
+	"""
+	if (not sys.platform.startswith('linux')
+			or not os.uname().machine.lower().startswith(TIOCGICOUNT_MACHINES)):
+		return None
+	try:
+		import fcntl
+		counters = _ICOUNTER_STRUCT.unpack(fcntl.ioctl(port.fileno(), TIOCGICOUNT,
+			bytes(_ICOUNTER_STRUCT.size)))
+	except (AttributeError, OSError, ValueError, NotImplementedError, serial.SerialException):
+		return None
+	if any(c < 0 for c in counters[:11]): # Not what we asked for after all.
+		return None
+	return {'framing': counters[6], 'overrun': counters[7], 'parity': counters[8],
+		'break': counters[9], 'bufferOverrun': counters[10]}
+
+class OverflowMonitor(object):
+	""" Keeps track of the signs that data received by a port have been lost.
+
+	Call `check` after every read. It counts:
+	* bufferFull - reads that found the driver's input buffer full, after which
+	  the driver drops the bytes that arrive,
+	* saturated - SATURATION_WINDOW long windows in which the data arrived at
+	  close to the largest rate the baud rate allows, so any delay in reading
+	  them fills up the buffer (meaningless for USB CDC devices, which ignore
+	  the baud rate),
+	* overrun, bufferOverrun, parity, framing and break - errors counted by the
+	  driver, see `readErrorCounters`, read at most every `counterInterval`,
+	* droppedBytes - bytes known to have been lost, i.e. overrun and
+	  bufferOverrun.
+
+	Arguments
+	---------
+		port (serial.SerialBase) - instance of an open port interface.
+
+	Optional
+	---------
+		bufferSize (int, default DRIVER_BUFFER_SIZE) - size of the driver's input
+			buffer in bytes, see `setBufferSize`.
+		counterInterval (float, default ERROR_COUNTER_INTERVAL) - shortest
+			time in seconds between two reads of the driver's error counters.
+	"""
+
+	# Keys of the warnings returned by `check` and what they mean.
+	WARNINGS = {
+		'bufferFull': ('BufferFull', 'driver input buffer full, data may have been dropped'),
+		'saturated': ('LineSaturated', 'data arrive at close to the baud rate limit'),
+		'overrun': ('OverrunError', 'bytes lost by the UART (overrun)'),
+		'bufferOverrun': ('BufferOverrunError', 'bytes lost by the driver (buffer overrun)'),
+		'parity': ('ParityError', 'parity errors'),
+		'framing': ('FramingError', 'framing errors'),
+		'break': ('BreakCondition', 'break conditions'),
+		}
+
+	def __init__(self, port, bufferSize=DRIVER_BUFFER_SIZE, counterInterval=ERROR_COUNTER_INTERVAL):
+		self.port = port
+		self.bufferSize = bufferSize
+		self.counterInterval = counterInterval
+		self.counters = dict((name, 0) for name in self.WARNINGS)
+		self.counters['droppedBytes'] = 0
+
+		self._lastDriverCounters = readErrorCounters(port) # None if not available.
+		self._lastCounterRead = time.monotonic()
+		self._windowStart = time.monotonic()
+		self._windowBytes = 0
+		self._saturated = False # Whether the last window was saturated.
+
+	@property
+	def byteRateLimit(self):
+		""" Largest number of bytes per second the port's settings allow. """
+		bitsPerByte = 1 + self.port.bytesize + self.port.stopbits
+		if self.port.parity != serial.PARITY_NONE:
+			bitsPerByte += 1
+		return self.port.baudrate/bitsPerByte
+
+	def check(self, noBytes, noWaiting=0):
+		""" Account for a read and report any new signs of lost data.
+
+		Arguments
+		---------
+			noBytes (int) - number of bytes read.
+
+		Optional
+		---------
+			noWaiting (int, default 0) - number of bytes still waiting to be
+				read after the read, if known.
+
+		Returns
+		---------
+			(dict) - summary of the new warnings, in the same format as the one
+				returned by `decodeOutput`.
+		"""
+		warningSummary = {}
+
+		if noBytes >= self.bufferSize or noWaiting >= self.bufferSize:
+			self._count('bufferFull', 1, warningSummary)
+
+		self._windowBytes += noBytes
+		now = time.monotonic()
+		if now-self._windowStart >= SATURATION_WINDOW:
+			limit = self.byteRateLimit*(now-self._windowStart)
+			saturated = self._windowBytes >= SATURATION_THRESHOLD*limit
+			if saturated:
+				self.counters['saturated'] += 1
+				if not self._saturated: # Only warn when it starts.
+					warningSummary['LineSaturated'] = 'Port {}: {} ({:.0f} B/s at {} baud).'.format(
+						self.port.name, self.WARNINGS['saturated'][1], self.byteRateLimit,
+						self.port.baudrate)
+			self._saturated = saturated
+			self._windowStart = now
+			self._windowBytes = 0
+
+		if (self._lastDriverCounters is not None
+				and now-self._lastCounterRead >= self.counterInterval):
+			self._lastCounterRead = now
+			driverCounters = readErrorCounters(self.port)
+			if driverCounters is None: # Stopped working, don't try again.
+				self._lastDriverCounters = None
+			else:
+				for name in driverCounters:
+					self._count(name, driverCounters[name]-self._lastDriverCounters[name],
+						warningSummary)
+				self._lastDriverCounters = driverCounters
+		return warningSummary
+
+	def describe(self):
+		""" Return a short, human-readable summary of all the counters. """
+		text = 'Dropped: {droppedBytes} B, buffer full: {bufferFull}, saturated: {saturated} s'.format(
+			**self.counters)
+		if self._lastDriverCounters is not None:
+			text += ', overrun: {overrun}, parity: {parity}, framing: {framing}'.format(
+				**self.counters)
+		return text
+
+	def _count(self, name, increment, warningSummary):
+		""" Add to a counter and describe it in warningSummary, unless the
+		increment is zero. """
+		if increment <= 0:
+			return
+		self.counters[name] += increment
+		if name in ['overrun', 'bufferOverrun']:
+			self.counters['droppedBytes'] += increment
+		key, description = self.WARNINGS[name]
+		warningSummary[key] = 'Port {}: {}: {} ({} in total).'.format(self.port.name,
+			description, increment, self.counters[name])
+
+class ReaderPool(threading.Thread):
+	""" Single background thread that reads many serial ports at once.
+
+	The file descriptors of all the ports are registered with one
+	selectors.DefaultSelector (epoll on Linux), so the thread only wakes up when
+	one of the ports has something to read, however many ports there are, and
+	idle ports cost nothing. Ready ports are read with a single large os.read,
+	without asking how much is waiting first. Whatever is read is passed to the
+	session of the respective port, e.g. a
+	`portSession.PortSession`, which decodes it. Ports without a file descriptor
+	that can be selected, e.g. loop:// or on Windows, are read by a separate
+	thread each instead.
+
+	A session is any object with:
+	* `port` - an open serial.SerialBase,
+	* `feed(dataStr, noWaiting)` - called with the bytes read from the port
+	  and the number of bytes known to be still waiting to be read (0 if
+	  unknown, it's only looked up when a read fills READ_SIZE),
+	* `close(error)` - called once the port is no longer read, with the
+	  exception that caused this or None if the session has been removed.
+	  An exception raised by `feed` stops reading that session's port only.
+	Both methods are called from the reading thread.
+
+	Optional
+	---------
+		probeInterval (float, default None) - how often, in seconds, to check
+			that the ports still work while nothing is being received, see
+			`PortReader`. No checks if None.
+	"""
+
+	def __init__(self, probeInterval=None):
+		threading.Thread.__init__(self, name="ReaderPool")
+		self.daemon = True # Don't keep the application alive because of this.
+		self.probeInterval = probeInterval
+
+		self._selector = selectors.DefaultSelector()
+		# Sessions are added and removed by the pool thread itself, the other
+		# threads ask for this through _changes and wake the selector up.
+		self._lock = threading.Lock()
+		self._changes = [] # (add or remove, session, threading.Event) tuples.
+		# Sockets rather than a pipe because only they can be selected on Windows.
+		self._wakeUpSockets = socket.socketpair()
+		self._wakeUpSockets[0].setblocking(False)
+		self._selector.register(self._wakeUpSockets[0], selectors.EVENT_READ, None)
+
+		self._threads = {} # Session: (thread, stop event) for ports without fds.
+		self._stopEvent = threading.Event()
+
+	def add(self, session):
+		""" Start reading the port of the given session. """
+		try:
+			fd = session.port.fileno()
+		except (AttributeError, OSError, ValueError):
+			fd = None
+		if fd is None or sys.platform.startswith('win'):
+			stopEvent = threading.Event()
+			thread = threading.Thread(target=self._readInThread, args=(session, stopEvent),
+				name="ReaderPool({})".format(session.port.name))
+			thread.daemon = True
+			self._threads[session] = (thread, stopEvent)
+			thread.start()
+		else:
+			self._requestChange('add', session)
+
+	def remove(self, session, timeout=None):
+		""" Stop reading the port of the given session and wait until it's no
+		longer being read, so that it can be closed. The session is closed
+		without an error.
+
+		Optional
+		---------
+			timeout (float, default None) - longest time to wait in seconds.
+				Wait until the port is no longer read if None.
+		"""
+		if session in self._threads:
+			thread, stopEvent = self._threads.pop(session)
+			stopEvent.set()
+			if hasattr(session.port, 'cancel_read'):
+				try:
+					session.port.cancel_read()
+				except BaseException:
+					pass
+			if thread is not threading.current_thread():
+				thread.join(timeout)
+		else:
+			done = self._requestChange('remove', session)
+			if threading.current_thread() is not self:
+				done.wait(timeout)
+
+	def stop(self, timeout=None):
+		""" Stop reading all the ports and wait for the thread to finish.
+
+		Optional
+		---------
+			timeout (float, default None) - longest time to wait in seconds.
+				Wait until the thread finishes if None.
+		"""
+		for session in list(self._threads):
+			self.remove(session, timeout)
+		self._stopEvent.set()
+		self._wakeUp()
+		if self.is_alive() and threading.current_thread() is not self:
+			self.join(timeout)
+
+	def run(self):
+		""" Read the ports that have something to read until stopped. """
+		try:
+			while not self._stopEvent.is_set():
+				events = self._selector.select(self.probeInterval)
+				if len(events) == 0 and self.probeInterval is not None:
+					self._probe()
+				for key, mask in events:
+					if key.data is None: # Woken up to add or remove sessions.
+						self._applyChanges()
+					else:
+						self._read(key.fd, key.data)
+		finally:
+			self._applyChanges()
+			for key in list(self._selector.get_map().values()):
+				if key.data is not None:
+					self._unregister(key.data, None)
+			self._selector.close()
+			for wakeUpSocket in self._wakeUpSockets:
+				wakeUpSocket.close()
+
+	def _requestChange(self, change, session):
+		""" Ask the pool thread to add or remove a session and return an event
+		that will be set once this is done. """
+		done = threading.Event()
+		with self._lock:
+			self._changes.append((change, session, done))
+		if threading.current_thread() is self:
+			self._applyChanges()
+		else:
+			self._wakeUp()
+		return done
+
+	def _wakeUp(self):
+		""" Interrupt waiting for the ports. """
+		try:
+			self._wakeUpSockets[1].send(b'x')
+		except OSError: # The pool has already stopped.
+			pass
+
+	def _applyChanges(self):
+		""" Add and remove the sessions that the other threads asked for. """
+		try:
+			while self._wakeUpSockets[0].recv(4096):
+				pass
+		except OSError: # Nothing more to read.
+			pass
+		with self._lock:
+			changes, self._changes = self._changes, []
+		for change, session, done in changes:
+			if change == 'add':
+				self._selector.register(session.port.fileno(), selectors.EVENT_READ, session)
+			elif any(key.data is session for key in self._selector.get_map().values()):
+				self._unregister(session, None)
+			# Otherwise, it's already been unregistered because of an error.
+			done.set()
+
+	def _unregister(self, session, error):
+		""" Stop reading the port of a session and close the session. """
+		for key in list(self._selector.get_map().values()):
+			if key.data is session:
+				self._selector.unregister(key.fileobj)
+		session.close(error)
+
+	def _read(self, fd, session):
+		""" Read whatever the port of the session has and pass it on. """
+		try:
+			dataStr = os.read(fd, READ_SIZE)
+		except BlockingIOError: # Someone else has read the data already.
+			return
+		except OSError as err:
+			# The port has been closed or the device has been unplugged.
+			self._unregister(session, serial.SerialException('read failed: {}'.format(err)))
+			return
+		if len(dataStr) == 0: # Ready but nothing to read, the other end is gone.
+			self._unregister(session, serial.SerialException('Port reached the end of file.'))
+			return
+		noWaiting = 0
+		if len(dataStr) == READ_SIZE: # Filled the read, so there's probably more.
+			noWaiting = _bytesWaiting(fd)
+		try:
+			session.feed(dataStr, noWaiting)
+		except Exception as err: # E.g. the disk is full, only stop this session.
+			self._unregister(session, err)
+
+	def _probe(self):
+		""" Check that the idle ports still work. """
+		for key in list(self._selector.get_map().values()):
+			if key.data is not None:
+				try:
+					key.data.port.inWaiting()
+				except BaseException as err:
+					self._unregister(key.data, err)
+
+	def _readInThread(self, session, stopEvent):
+		""" Keep reading a port that can't be selected, until stopped. """
+		noWaiting = 0 # Bytes known to be waiting in the input buffer.
+		error = None
+		while not stopEvent.is_set():
+			try:
+				dataStr = session.port.read(max(1, noWaiting))
+				noWaiting = session.port.inWaiting() if len(dataStr) > 0 else 0
+			except BaseException as err:
+				if not stopEvent.is_set():
+					error = err
+				break
+			if len(dataStr) > 0:
+				try:
+					session.feed(dataStr, noWaiting)
+				except Exception as err:
+					error = err
+					break
+		self._threads.pop(session, None)
+		session.close(error)
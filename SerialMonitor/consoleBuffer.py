@@ -0,0 +1,193 @@
+#!/bin/env/python3
+""" In-memory storage of the text shown in the console, which doesn't depend
+on wx and so can be used and tested without the GUI.
+"""
+
+# Number of lines a ScrollbackBuffer has room for at first. The room is doubled
+# whenever it's used up, up to maxLines, so a large limit costs no memory until
+# that many lines have been received.
+INITIAL_LINES = 1024
+
+class ScrollbackBuffer(object):
+	""" Ring buffer holding the most recent lines shown in the console.
+
+	Every line is a list of [text, colour] runs, where colour is an RGB tuple.
+	The last line stays open, i.e. subsequent text gets appended to it, until a
+	'\n' is received or it grows longer than `maxLineLength`. The latter makes
+	sure that output without EOL characters, e.g. raw output, can be dropped
+	piece by piece. Once there are more lines or characters than allowed,
+	the oldest lines are dropped. The number of characters dropped since the
+	last call to `takeTrim` is kept so that the same amount of text can be
+	removed from the top of a text control in one go.
+
+	Optional
+	---------
+		maxLines (int, default None) - maximum number of lines to keep. No
+			limit if None.
+		maxChars (int, default None) - maximum number of characters to keep,
+			including the '\n' characters. No limit if None.
+		trimFraction (float, default 0.1) - how much of the limits needs to be
+			dropped before `takeTrim` reports it, so that the text control is
+			trimmed in large chunks rather than one line at a time.
+		maxLineLength (int, default 1024) - number of characters after which
+			a line without an EOL character is continued in a new line.
+	"""
+
+	def __init__(self, maxLines=None, maxChars=None, trimFraction=0.1, maxLineLength=1024):
+		if maxLines is not None and maxLines < 1:
+			raise ValueError('maxLines must be positive, got {}.'.format(maxLines))
+		if maxChars is not None and maxChars < 1:
+			raise ValueError('maxChars must be positive, got {}.'.format(maxChars))
+
+		self.maxLines = maxLines
+		self.maxChars = maxChars
+		self.trimFraction = trimFraction
+		self.maxLineLength = maxLineLength
+
+		# Circular list of lines, the oldest one is at self._head.
+		self._lines = [None]*self._initialSize()
+		self._head = 0
+		self._count = 0
+		self._lastLineOpen = False # The newest line can still be extended.
+		self._lastLineLength = 0 # Characters in the newest line.
+
+		self.noChars = 0 # Characters currently held.
+		self.droppedLines = 0 # Lines dropped since the last trim.
+		self.droppedChars = 0 # Characters dropped since the last trim.
+		self.firstLineNumber = 0 # Number of the oldest line held since the last clear().
+
+	def __len__(self):
+		return self._count
+
+	def __getitem__(self, index):
+		""" Return the runs of the line with the given index, 0 being the oldest
+		line held. Negative indices count from the newest line. """
+		if index < 0:
+			index += self._count
+		if index < 0 or index >= self._count:
+			raise IndexError('Line {} not in the scrollback.'.format(index))
+		return self._lines[(self._head+index) % len(self._lines)]
+
+	def getText(self, index):
+		""" Return the text of the line with the given index without colours. """
+		return ''.join(run[0] for run in self[index])
+
+	def append(self, text, colour=(0,0,0)):
+		""" Add text to the end of the buffer and drop the oldest lines if the
+		limits have been exceeded.
+
+		Arguments
+		---------
+			text (string) - text to be added, can contain many lines.
+
+		Optional
+		---------
+			colour (int tuple, len=3, default=(0,0,0)) - RGB colour of text
+		"""
+		if len(text) == 0:
+			return
+		self.noChars += len(text)
+
+		lineStart = 0
+		while lineStart < len(text):
+			# Take everything up to and including the next '\n' but not more than
+			# fits in the line, unless only the EOL character would be left.
+			lineEnd = text.find('\n', lineStart)+1
+			if lineEnd == 0:
+				lineEnd = len(text)
+			continueLine = self._lastLineOpen and self._lastLineLength < self.maxLineLength
+			if continueLine:
+				room = self.maxLineLength-self._lastLineLength
+			else:
+				room = self.maxLineLength
+			if lineEnd-lineStart > room and not (lineEnd-lineStart == room+1 and text[lineEnd-1] == '\n'):
+				lineEnd = lineStart+room
+			part = text[lineStart:lineEnd]
+			lineStart = lineEnd
+
+			# Continue the last line if it hasn't been terminated yet.
+			if continueLine:
+				lastLine = self[-1]
+				if lastLine[-1][1] == colour:
+					lastLine[-1][0] += part
+				else:
+					lastLine.append([part, colour])
+				self._lastLineLength += len(part)
+			else:
+				self._appendLine([[part, colour]])
+				self._lastLineLength = len(part)
+			self._lastLineOpen = not part.endswith('\n')
+
+		self._drop()
+
+	def clear(self):
+		""" Remove all the lines. """
+		self._lines = [None]*self._initialSize()
+		self._head = 0
+		self._count = 0
+		self._lastLineOpen = False
+		self._lastLineLength = 0
+		self.noChars = 0
+		self.droppedLines = 0
+		self.droppedChars = 0
+		self.firstLineNumber = 0
+
+	def takeTrim(self):
+		""" Check whether enough text has been dropped to trim the text control.
+
+		Returns
+		---------
+			(int) - number of characters to be removed from the top of the text
+				control, zero if it doesn't need to be trimmed yet. The dropped
+				text is only reported once.
+		"""
+		if self.droppedChars == 0:
+			return 0
+
+		if ((self.maxLines is not None and self.droppedLines >= self.maxLines*self.trimFraction)
+				or (self.maxChars is not None and self.droppedChars >= self.maxChars*self.trimFraction)):
+			noChars = self.droppedChars
+			self.droppedLines = 0
+			self.droppedChars = 0
+			return noChars
+		else:
+			return 0
+
+	def _initialSize(self):
+		""" Number of lines to make room for in an empty ring. """
+		if self.maxLines is None:
+			return INITIAL_LINES
+		return min(self.maxLines, INITIAL_LINES)
+
+	def _appendLine(self, line):
+		""" Put a new line at the end of the ring. If the ring is full, either
+		overwrite the oldest line when the line limit has been reached or grow
+		it. """
+		if self._count == len(self._lines):
+			if self.maxLines is not None and self._count >= self.maxLines:
+				self._dropOldest()
+			else:
+				newSize = 2*self._count
+				if self.maxLines is not None:
+					newSize = min(newSize, self.maxLines)
+				self._lines = [self[i] for i in range(self._count)] + [None]*(newSize-self._count)
+				self._head = 0
+		self._lines[(self._head+self._count) % len(self._lines)] = line
+		self._count += 1
+
+	def _drop(self):
+		""" Drop the oldest lines until the limits are satisfied. Always keep
+		the newest line even if it exceeds maxChars on its own. """
+		while self._count > 1 and self.maxChars is not None and self.noChars > self.maxChars:
+			self._dropOldest()
+
+	def _dropOldest(self):
+		""" Remove the oldest line and keep track of what's been dropped. """
+		noChars = sum(len(run[0]) for run in self._lines[self._head])
+		self._lines[self._head] = None
+		self._head = (self._head+1) % len(self._lines)
+		self._count -= 1
+		self.noChars -= noChars
+		self.droppedLines += 1
+		self.droppedChars += noChars
+		self.firstLineNumber += 1
@@ -0,0 +1,103 @@
+#!/bin/env/python3
+""" Console that only draws the lines currently on screen, which can be used
+instead of the rich text control for very long sessions.
+"""
+import wx
+
+class VirtualConsole(wx.VListBox):
+    """ Shows the lines held in a `consoleBuffer.ScrollbackBuffer` without
+    copying them into a text control.
+
+    wx only asks for the rows that are visible, so the cost of drawing and
+    scrolling doesn't depend on how many lines there are. All the rows have the
+    same height, which also makes it cheap for wx to work out where to scroll.
+    The colours of the text runs, e.g. of the OUT messages, are kept.
+
+    Arguments
+    ---------
+        parent (wx.Window) - parent window.
+        scrollback (consoleBuffer.ScrollbackBuffer) - lines to show.
+
+    Optional
+    ---------
+        font (wx.Font, default None) - font to use, the default GUI font if None.
+    """
+
+    def __init__(self, parent, scrollback, font=None):
+        wx.VListBox.__init__(self, parent, wx.ID_ANY, style=wx.LB_MULTIPLE|wx.BORDER_NONE)
+        self.scrollback = scrollback
+        # Scrollback line number of the first row, used to keep the view in
+        # place when the oldest lines get dropped.
+        self.firstLineNumber = scrollback.firstLineNumber
+
+        self.SetBackgroundColour(wx.WHITE) # Same as the rich text control.
+        if font is not None:
+            self.SetFont(font)
+        self.lineHeight = self.GetCharHeight()+2
+
+        self.Bind(wx.EVT_KEY_DOWN, self.onKeyDown)
+        self.refresh()
+
+    def OnMeasureItem(self, n):
+        """ All the rows have the same height. """
+        return self.lineHeight
+
+    def OnDrawItem(self, dc, rect, n):
+        """ Draw the text runs of line `n` one after another, each in its colour. """
+        dc.SetFont(self.GetFont())
+        selected = self.IsSelected(n)
+        selectedColour = wx.SystemSettings.GetColour(wx.SYS_COLOUR_HIGHLIGHTTEXT)
+
+        x = rect.x+2
+        for text, colour in self.scrollback[n]:
+            text = text.rstrip('\n')
+            if len(text) == 0:
+                continue
+            if selected:
+                dc.SetTextForeground(selectedColour)
+            else:
+                dc.SetTextForeground(wx.Colour(*colour))
+            dc.DrawText(text, x, rect.y+1)
+            x += dc.GetTextExtent(text)[0]
+            if x > rect.x+rect.width: # Don't draw what can't be seen.
+                break
+
+    def refresh(self):
+        """ Update the number of rows after lines have been added to or dropped
+        from the scrollback. Keep following the newest line if it was visible,
+        otherwise keep showing the same lines. """
+        oldCount = self.GetItemCount()
+        followEnd = oldCount == 0 or self.GetVisibleRowsEnd() >= oldCount
+        firstVisible = self.GetVisibleRowsBegin()
+
+        # Rows have moved up by the number of lines dropped since the last refresh.
+        noDroppedLines = max(0, self.scrollback.firstLineNumber-self.firstLineNumber)
+        self.firstLineNumber = self.scrollback.firstLineNumber
+        if noDroppedLines > 0:
+            self.DeselectAll() # Selected rows now point to other lines.
+
+        count = len(self.scrollback)
+        self.SetItemCount(count)
+        if followEnd:
+            self.ScrollToRow(max(0, count-1))
+        else:
+            self.ScrollToRow(max(0, firstVisible-noDroppedLines))
+        self.Refresh()
+
+    def getSelectedText(self):
+        """ Return the text of all the selected lines. """
+        lines = []
+        item, cookie = self.GetFirstSelected()
+        while item != wx.NOT_FOUND:
+            lines.append(self.scrollback.getText(item))
+            item, cookie = self.GetNextSelected(cookie)
+        return ''.join(lines)
+
+    def onKeyDown(self, event):
+        """ Copy the selected lines with Ctrl+C. """
+        if event.ControlDown() and event.GetKeyCode() == ord('C'):
+            if wx.TheClipboard.Open():
+                wx.TheClipboard.SetData(wx.TextDataObject(self.getSelectedText()))
+                wx.TheClipboard.Close()
+        else:
+            event.Skip()
@@ -0,0 +1,211 @@
+#!/bin/env/python3
+""" Logging to a file without writing to it from the thread that logs. The log
+records are put in a bounded queue and written by a background thread into a
+large buffer, which is flushed to the disk periodically.
+
+Example
+---------
+	fileLogger = AsyncFileLogger('session.log', policy='drop')
+	fileLogger.start()
+	logging.getLogger("SMLog").addHandler(fileLogger.queueHandler)
+	...
+	fileLogger.stop() # Detaches queueHandler, writes everything that's still queued.
+"""
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+
+# Size in bytes of the buffer the log file is written through.
+LOG_BUFFER_SIZE = 1024*1024
+# Longest time in seconds that the log records can stay in the buffer.
+LOG_FLUSH_INTERVAL = 1.
+# Largest number of records waiting to be written, after which the policy of
+# the AsyncFileLogger decides what happens.
+LOG_QUEUE_SIZE = 100000
+# Longest time in seconds that logging waits for room in the queue with the
+# 'block' policy, before dropping the record after all.
+BLOCK_TIMEOUT = 1.
+
+class BufferedFileHandler(logging.FileHandler):
+	""" logging.FileHandler that writes through a large buffer and only
+	flushes it when `flush` is called, or when a record is written more than
+	`flushInterval` after the last flush, not after every record.
+
+	Arguments
+	---------
+		fileName (string) - path to the log file.
+
+	Optional
+	---------
+		mode (string, default 'a') - mode in which to open the file.
+		bufferSize (int, default LOG_BUFFER_SIZE) - size of the buffer in bytes.
+		flushInterval (float, default LOG_FLUSH_INTERVAL) - longest time in
+			seconds between two flushes while records are being written.
+		encoding (string, default 'utf-8') - encoding of the file.
+	"""
+
+	def __init__(self, fileName, mode='a', bufferSize=LOG_BUFFER_SIZE,
+			flushInterval=LOG_FLUSH_INTERVAL, encoding='utf-8'):
+		self.bufferSize = bufferSize
+		self.flushInterval = flushInterval
+		self.lastFlush = time.monotonic()
+		logging.FileHandler.__init__(self, fileName, mode=mode, encoding=encoding)
+
+	def _open(self):
+		""" Open the log file with the large buffer. """
+		return open(self.baseFilename, self.mode, buffering=self.bufferSize,
+			encoding=self.encoding)
+
+	def emit(self, record):
+		""" Write the formatted record to the buffer. """
+		if self.stream is None:
+			self.stream = self._open()
+		try:
+			self.stream.write(self.format(record) + self.terminator)
+			if time.monotonic()-self.lastFlush >= self.flushInterval:
+				self.flush()
+		except RecursionError:
+			raise
+		except Exception:
+			self.handleError(record)
+
+	def flush(self):
+		""" Write the buffer to the file. """
+		logging.FileHandler.flush(self)
+		self.lastFlush = time.monotonic()
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+	""" logging.handlers.QueueHandler for a bounded queue, which decides what
+	to do once the queue is full:
+	* 'drop' - drop the record straight away, never delays the logging thread,
+	* 'block' - wait up to `blockTimeout` seconds for room in the queue, which
+	  slows the logging thread down to the speed of the disk, and only then
+	  drop the record.
+	The number of dropped records is counted and noted in the log as soon as
+	there's room for that.
+
+	Arguments
+	---------
+		logQueue (queue.Queue) - queue shared with a QueueListener.
+
+	Optional
+	---------
+		policy (string, default 'drop') - one of ['drop', 'block'].
+		blockTimeout (float, default BLOCK_TIMEOUT) - longest time to wait for
+			room in the queue in seconds, with the 'block' policy.
+	"""
+
+	def __init__(self, logQueue, policy='drop', blockTimeout=BLOCK_TIMEOUT):
+		if policy not in ['drop', 'block']:
+			raise ValueError("Queue policy {} not supported.".format(policy))
+		logging.handlers.QueueHandler.__init__(self, logQueue)
+		self.policy = policy
+		self.blockTimeout = blockTimeout
+		self.dropped = 0 # Number of records dropped so far.
+		self._reportedDropped = 0 # Number of those already noted in the log.
+
+	def enqueue(self, record):
+		""" Put the record in the queue, or drop it if the queue is full. """
+		if self.dropped > self._reportedDropped:
+			self._reportDropped(record)
+		try:
+			if self.policy == 'drop':
+				self.queue.put_nowait(record)
+			else:
+				self.queue.put(record, timeout=self.blockTimeout)
+		except queue.Full:
+			self.dropped += 1
+
+	def _reportDropped(self, record):
+		""" Note the records dropped since the last report in the log. """
+		note = logging.LogRecord(record.name, logging.WARNING, __file__, 0,
+			'Log queue full, dropped {} records.'.format(self.dropped-self._reportedDropped),
+			None, None)
+		try:
+			self.queue.put_nowait(note)
+			self._reportedDropped = self.dropped
+		except queue.Full:
+			pass
+
+class BlockingQueueListener(logging.handlers.QueueListener):
+	""" logging.handlers.QueueListener that waits for room in a bounded queue
+	to tell its thread to stop, instead of failing with queue.Full. """
+
+	def enqueue_sentinel(self):
+		""" Put the sentinel at the end of the queue, after all the records. """
+		self.queue.put(self._sentinel)
+
+class AsyncFileLogger(object):
+	""" Writes the records of any logger it's attached to to a file, from a
+	background thread. Attach `queueHandler` to the loggers after `start`.
+
+	Arguments
+	---------
+		fileName (string) - path to the log file.
+
+	Optional
+	---------
+		formatter (logging.Formatter, default None) - formats the records in the
+			file, only the message if None.
+		mode (string, default 'a') - mode in which to open the file.
+		bufferSize (int, default LOG_BUFFER_SIZE) - size of the file buffer in
+			bytes.
+		flushInterval (float, default LOG_FLUSH_INTERVAL) - longest time in
+			seconds that the records can stay in the buffer.
+		maxQueueSize (int, default LOG_QUEUE_SIZE) - largest number of records
+			waiting to be written.
+		policy (string, default 'drop') - what to do with the records logged
+			while the queue is full, see `BoundedQueueHandler`.
+	"""
+
+	def __init__(self, fileName, formatter=None, mode='a', bufferSize=LOG_BUFFER_SIZE,
+			flushInterval=LOG_FLUSH_INTERVAL, maxQueueSize=LOG_QUEUE_SIZE, policy='drop'):
+		self.fileName = fileName
+		self.flushInterval = flushInterval
+		self.fileHandler = BufferedFileHandler(fileName, mode=mode, bufferSize=bufferSize,
+			flushInterval=flushInterval)
+		if formatter is not None:
+			self.fileHandler.setFormatter(formatter)
+
+		self.queue = queue.Queue(maxQueueSize)
+		self.queueHandler = BoundedQueueHandler(self.queue, policy)
+		self.listener = BlockingQueueListener(self.queue, self.fileHandler,
+			respect_handler_level=True)
+
+		self._flusher = None # Thread flushing the file while nothing is logged.
+		self._stopEvent = threading.Event()
+
+	@property
+	def dropped(self):
+		""" Number of records dropped because the queue was full. """
+		return self.queueHandler.dropped
+
+	def start(self):
+		""" Start writing the queued records to the file. """
+		self.listener.start()
+		self._stopEvent.clear()
+		self._flusher = threading.Thread(target=self._flushPeriodically,
+			name="AsyncFileLogger flusher")
+		self._flusher.daemon = True
+		self._flusher.start()
+
+	def stop(self):
+		""" Detach `queueHandler` from all the loggers, so that nothing more is
+		queued, then write all the queued records to the file and close it. """
+		loggers = [logging.getLogger()]+list(logging.Logger.manager.loggerDict.values())
+		for logger in loggers:
+			if isinstance(logger, logging.Logger): # Not a logging.PlaceHolder.
+				logger.removeHandler(self.queueHandler)
+		if self._flusher is not None:
+			self._stopEvent.set()
+			self._flusher.join()
+			self._flusher = None
+			self.listener.stop() # Processes what's been queued until now.
+		self.fileHandler.close()
+
+	def _flushPeriodically(self):
+		""" Flush the file every flushInterval, also when nothing is logged. """
+		while not self._stopEvent.wait(self.flushInterval):
+			self.fileHandler.flush()
@@ -0,0 +1,1205 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+Graphical interface of the SerialMonitor, built with wx on top of the classes
+generated by wxFormbuilder in serialMonitorBaseClasses. Only imported when the
+GUI is started, so that wx isn't needed to use the rest of the package.
+"""
+
+import SerialMonitor.serialMonitorBaseClasses as baseClasses
+import SerialMonitor.capture as capture
+import SerialMonitor.commsInterface as commsInterface
+import SerialMonitor.consoleBuffer as consoleBuffer
+import SerialMonitor.consoleView as consoleView
+import SerialMonitor.fileLogger as fileLogger
+import SerialMonitor.logIndex as logIndex
+import SerialMonitor.portInventory as portInventory
+import SerialMonitor.portSession as portSession
+
+import wx
+import os, time
+import serial
+import logging
+
+# Default maximum number of times per second the console gets updated.
+CONSOLE_REFRESH_RATE = 20
+# Default maximum number of lines shown in the console. The older ones are
+# removed from it but are still available in the log file.
+CONSOLE_SCROLLBACK_LINES = 10000
+# Same for the virtual console, which only draws the visible lines and so can
+# hold many more.
+VIRTUAL_CONSOLE_SCROLLBACK_LINES = 1000000
+# How often, in seconds, the reader checks that an idle port still works. Reads
+# fail straight away when a device is unplugged on most platforms anyway.
+CONNECTION_PROBE_INTERVAL = 5.
+
+class pleaseReconnectDialog(wx.Dialog):
+    def __init__(self,parent):
+        """ Tells the user to reconnect to the serial port for the new connection
+        settings to take effect."""
+        wx.Dialog.__init__(self,parent,-1,'Please reconnect',size=(300,120))
+        self.CenterOnScreen(wx.BOTH)
+
+        okButton = wx.Button(self, wx.ID_OK, 'OK')
+        okButton.SetDefault()
+        text = wx.StaticText(self, -1, 'Please reconnect to the serial port for the changes to take effect.')
+
+        vbox = wx.BoxSizer(wx.VERTICAL)
+        vbox.Add(text, 1, wx.ALIGN_CENTER|wx.TOP, 10)
+        vbox.Add(okButton, 1, wx.ALIGN_CENTER|wx.BOTTOM, 10)
+        self.SetSizer(vbox)
+
+class serialDetailsDialog( baseClasses.serialDetailsDialog ):
+    def __init__(self, parent, currentStopBits, currentParity, currentByteSize):
+        """ Parent is the parent object, currentStopBits, currentPartiy and
+        currentByte size are the currently used serial.Serial settings, which
+        will be selected when the dialog is opened.
+        """
+        # initialise the underlying object
+        baseClasses.serialDetailsDialog.__init__( self, parent )
+
+        # create bespoke fields for holding the vailable choices
+        self.stopBitsChoices = []
+        self.parityChoices = []
+        self.byteSizeChoices = []
+
+        # Add the selections to the dropdown menus (defined by the pySerial module).
+        for stopBit in serial.Serial.STOPBITS:
+            self.stopBitsChoice.Append(str(stopBit))
+            self.stopBitsChoices.append(stopBit)
+        self.stopBitsChoice.SetSelection(self.stopBitsChoices.index(currentStopBits))
+
+        for key, val in serial.PARITY_NAMES.items():
+            self.parityChoice.Append(val)
+            self.parityChoices.append(key)
+        self.parityChoice.SetSelection(self.parityChoices.index(currentParity))
+
+        for byteSize in serial.Serial.BYTESIZES:
+            self.byteSizeChoice.Append(str(byteSize))
+            self.byteSizeChoices.append(byteSize)
+        self.byteSizeChoice.SetSelection(self.byteSizeChoices.index(currentByteSize))
+
+class serialMonitorGuiMainFrame( baseClasses.mainFrame ):
+
+    #============================
+    # CONSTRUCTOR
+    #============================
+
+    def __init__(self):
+        """ Create the main frame, deriving from a baseline object which has all the panels, buttons, etc.
+        already defined. """
+        # initialise the underlying object
+        baseClasses.mainFrame.__init__(self, None)
+
+        # File logger name.
+        self.fileLoggerName = None # Overwrite with a file name when user chooses to log to a file.
+        self.fileLogger = None # Writes the log file in the background while logging to it.
+        self.captureWriter = None # Records the raw data of all the ports when chosen.
+        self.captureMenuItem = self.fileMenu.InsertCheckItem(0, wx.ID_ANY,
+            u"Capture raw data", u"Record the exact bytes of all the ports in a binary file")
+        self.Bind(wx.EVT_MENU, self.onToggleCapture, id=self.captureMenuItem.GetId())
+        self.openLogMenuItem = self.fileMenu.Insert(1, wx.ID_ANY, u"Open capture/log...",
+            u"View a capture or a log file of any size")
+        self.Bind(wx.EVT_MENU, self.onOpenLog, id=self.openLogMenuItem.GetId())
+        self.loggingLevel = "ERROR"
+
+        # Create a logger for the application.
+        self.logger = logging.getLogger("SMLog") # It stands for Serial Monitor, right ;)
+        self.handler = logging.StreamHandler() # Will output to STDERR.
+        self.logger.setLevel(logging.DEBUG) # Collect all levels in the main logger.
+        self.formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        self.handler.setFormatter(self.formatter)
+        self.handler.setLevel(self.loggingLevel) # Filter logs at the handler level.
+                                                # Logging to file will log everything.
+        self.logger.addHandler(self.handler)
+
+        # serial communication
+        self.portOpen = False # indicates if the serial communication port is open
+        self.currentPort = 'None' # currently chosen port
+        self.currentSerialConnection = 0 # holds the serial connection object once it has been initialised
+        self.mainSession = None # PortSession of currentSerialConnection, while it's open.
+        # One background thread reads all the open ports, see onNewSession.
+        self.readerPool = commsInterface.ReaderPool(probeInterval=CONNECTION_PROBE_INTERVAL)
+        self.readerPool.start()
+        self.sessionPanels = [] # portSessionPanels of the other monitored ports.
+
+        # Text waiting to be shown in the console, as [list of strings, colour]
+        # runs. It's shown in one go at most maxRefreshRate times per second.
+        self.pendingConsoleText = []
+        self.consoleFlushPending = False # A flush of the pending text has been scheduled.
+        self.lastConsoleFlush = 0. # time.monotonic() of the last flush.
+        self.maxRefreshRate = CONSOLE_REFRESH_RATE
+        # The most recent lines shown in the console, used to trim it.
+        self.scrollback = consoleBuffer.ScrollbackBuffer(maxLines=CONSOLE_SCROLLBACK_LINES)
+        # Shown instead of logFileTextControl when chosen in the View menu.
+        self.virtualConsole = None
+        self.useVirtualConsole = False
+
+        # Let the user choose the console in a menu that isn't in the base classes.
+        self.viewMenu = wx.Menu()
+        self.virtualConsoleMenuItem = self.viewMenu.AppendCheckItem(wx.ID_ANY,
+            u"Virtual console", u"Only draw the visible lines, for very long sessions")
+        self.m_menubar1.Append(self.viewMenu, u"View")
+        self.Bind(wx.EVT_MENU, self.onToggleVirtualConsole, id=self.virtualConsoleMenuItem.GetId())
+
+        # Every monitored port gets its own tab, the first one is the main port.
+        self.createSessionNotebook()
+
+        # set default values
+        self.readDelay = int(self.readDelayTxtCtrl.GetValue())
+        # The read delay is adapted to how busy the port is, the user only
+        # chooses how long it can get while the port is idle.
+        self.readDelayText.SetLabel(u"Max read delay [ms]")
+        self.readScheduler = commsInterface.ReadScheduler()
+        self.setMaxReadDelay(self.readDelay)
+        self.noCharsSinceTick = 0 # Characters received since the last timer tick.
+        self.lastTick = time.monotonic()
+        self.statusBar = self.CreateStatusBar(2) # Read rate and lost data counters.
+        self.BaudRate = int(self.baudRateTxtCtrl.GetValue())
+
+        # No raw output so hexOutputCheckbox checkbox won't change anything.
+        # Disable it not to confuse the users.
+        self.hexOutputCheckbox.Enable(False)
+
+        # Current serial connection details.
+        self.currentStopBits = serial.STOPBITS_ONE
+        self.currentParity = serial.PARITY_NONE
+        self.currentByteSize = serial.EIGHTBITS
+
+        # Whether to open every candidate port when looking for active ones,
+        # not only list the ones known to the OS. Slower, so chosen in the menu.
+        self.probePorts = False
+        self.probePortsMenuItem = self.serialMenu.AppendCheckItem(wx.ID_ANY,
+            u"Probe all ports", u"Try to open every possible port when updating the ports")
+        self.Bind(wx.EVT_MENU, self.onToggleProbePorts, id=self.probePortsMenuItem.GetId())
+        self.newSessionMenuItem = self.serialMenu.Append(wx.ID_ANY,
+            u"Monitor another port", u"Open another port in a new tab")
+        self.Bind(wx.EVT_MENU, self.onNewSession, id=self.newSessionMenuItem.GetId())
+
+        # Cached list of the available ports, kept up to date in the background.
+        self.portInventory = portInventory.PortInventory(notify=lambda added, removed:
+            wx.CallAfter(self.onPortsChanged, added, removed))
+        self.portInventory.start()
+        self.currentPortIdentity = None # Identity of the hardware behind currentPort.
+        self.lostPortIdentity = None # Reconnect to this hardware once it's plugged back in.
+
+        # Data are read by self.readerPool as soon as they arrive and the GUI is
+        # notified via wx.CallAfter. The timer only makes sure that nothing gets
+        # stuck in the session's queue, and it's restarted after every tick with
+        # the interval chosen by self.readScheduler.
+        self.parseOutputsTimer.Start(int(self.readScheduler.interval*1000), wx.TIMER_ONE_SHOT)
+
+        # update the ports available at start-up
+        self.updatePorts(suppressWarn=True)
+        self.portChoice.SetSelection(0)
+
+        self.Layout() # Make sure everything is nicely located in the sizers on startup.
+
+    #============================
+    # EVENT HANDLING FUNCTIONS
+    #============================
+
+    def onClose(self, event):
+        """ close the serial port before terminating, need to make sure it isn't left hanging """
+        self.portInventory.stop(timeout=1)
+        for panel in list(self.sessionPanels):
+            self.closeSession(panel)
+        if self.portOpen:
+            self.stopReader()
+            self.currentSerialConnection.close()
+            self.logger.info('Disconnected from port before shutdown.')
+        self.readerPool.stop(timeout=2)
+        self.stopFileLogger()
+        self.stopCapture()
+        self.Destroy()
+
+    def onSendInput(self, event):
+        """ pass the message from the txtControl to the message parsing method that
+        links with the comms protocol. """
+        self.sendMessage( self.inputTextControl.GetLineText(0) )
+        self.inputTextControl.Clear()
+
+    def onChoseSerialPort(self, event):
+        """ picks up the newly selected port and attempts to connect to a peripheral device via it """
+        self.logger.debug('Choosing serial port.')
+        # ignore the None option
+        if self.portChoice.GetStringSelection() != 'None':
+            try:
+                # don't re-open a working stream
+                if self.portChoice.GetStringSelection() != self.currentPort:
+                    # close any open ports if present
+                    if self.portOpen:
+                        self.stopReader()
+                        self.currentSerialConnection.close()
+
+                    self.currentSerialConnection = serial.Serial(port=self.portChoice.GetStringSelection(),
+                                                                 baudrate=self.BaudRate,
+                                                                 timeout=2,
+                                                                 stopbits=self.currentStopBits,
+                                                                 parity=self.currentParity,
+                                                                 bytesize=self.currentByteSize)
+
+                    self.logger.debug('Checking {}'.format(self.currentSerialConnection))
+                    if self.checkConnection(): # Try to connnect to the user-selected port.
+                        self.portOpen = True
+                        self.currentPort = self.portChoice.GetStringSelection()
+                        self.currentPortIdentity = self.portInventory.getIdentity(self.currentPort)
+                        self.lostPortIdentity = None
+                        self.logger.info('Connected to port {}'.format(self.currentPort))
+                        # To verify the setting of the serial connection details.
+                        self.logger.debug('baud={},stop bits={},parity={},byte size={}'.format(
+                            self.currentSerialConnection.baudrate,
+                            self.currentSerialConnection.stopbits,
+                            self.currentSerialConnection.parity,
+                            self.currentSerialConnection.bytesize,))
+                        self.startReader()
+                    else: # Something's wrong, couldn't connect.
+                        wx.MessageBox('Cannot connect to port {}.'.format(
+                            self.portChoice.GetStringSelection()), 'Error',
+                            wx.OK | wx.ICON_ERROR)
+                        self.logger.error('Could not connect to port {}'.format(
+                            self.portChoice.GetStringSelection()))
+                        self.currentSerialConnection = 0
+                        self.portOpen = False
+                        self.updatePorts()
+                        self.portChoice.SetSelection(0) # Go back to 'None' selection.
+
+            except BaseException as unknonwError:
+                wx.MessageBox('Unknown problem occurred while establishing connection using the chosen port!', 'Error',
+                          wx.OK | wx.ICON_ERROR)
+                self.currentSerialConnection = 0
+                self.portOpen = False
+                self.updatePorts()
+                self.portChoice.SetSelection(0) # Go back to 'None' selection.
+                self.logger.error('Failed to connect to a port due to {}.'.format(unknonwError))
+
+        # if None is chosen then close the current port
+        else:
+            self.disconnect()
+
+    def onUpdatePorts(self, event):
+        """ call the update ports method - need a wrapper to be able to call it during initialisation """
+        self.logger.debug('Attempting to update avaialble ports.')
+        self.updatePorts(rescan=True)
+        self.Layout() # makes sure the choice dropdown is big enough to fit all the choice options
+
+    def onDisconnect(self, event):
+        """ Call the disconnect method """
+        self.disconnect()
+
+    def onParseOutputs(self, event):
+        """ Get information from the data received via the serial port, if there
+        is anything available, and schedule the next tick depending on how much
+        has been received. The ports are read by self.readerPool as soon as
+        data arrive, so self.readScheduler only paces collecting them. """
+        self.parseOutputs()
+
+        # Use what the reader thread already knows, no need for a system call here.
+        noWaiting = 0
+        if self.mainSession is not None:
+            noWaiting = self.mainSession.noWaiting
+        now = time.monotonic()
+        interval = self.readScheduler.update(self.noCharsSinceTick, noWaiting,
+            elapsed=now-self.lastTick)
+        self.noCharsSinceTick = 0
+        self.lastTick = now
+        self.parseOutputsTimer.Start(max(1, int(interval*1000)), wx.TIMER_ONE_SHOT)
+        if self.captureWriter is not None:
+            self.captureWriter.flushIfDue()
+        self.statusBar.SetStatusText(u"Display refreshed every {:.0f} ms ({:.1f} Hz)".format(
+            interval*1000, self.readScheduler.rate), 0)
+        if self.mainSession is not None:
+            self.statusBar.SetStatusText(self.mainSession.overflowMonitor.describe(), 1)
+
+    def onUpdateBaudRate(self, event):
+        """ Update the Baud rate but do not restart the connection; the change will take effect
+        when the next connection gets established """
+        # attempt to retrieve the entire contenst of the txtCtrl. If they are
+        # an int, use them. otherwise, revert back to the old value and let the
+        # user figure out they're making a mistake
+        self.logger.debug('Attempting to update baud rate.')
+        try:
+            newValue = int(self.baudRateTxtCtrl.GetValue())
+            self.BaudRate = newValue
+            self.notifyToReconnect() # Some people are confused about how this works.
+        except ValueError as ve:
+            self.baudRateTxtCtrl.SetValue("{:d}".format(self.BaudRate))
+            self.logger.error('ValueError while updating read delay: {}'.format(ve))
+            wx.MessageBox('Please specify integer baud rate','Incorrect baud rate',
+                wx.OK | wx.ICON_WARNING)
+
+    def onUpdateReadDelay(self, event):
+        """ Update the rate at which outputs are being read from the serial port
+        and restart the timer for the changes to take effect """
+        self.logger.debug('Attempting to update read delay.')
+        try:
+            newValue = int(self.readDelayTxtCtrl.GetValue())
+            self.setMaxReadDelay(newValue)
+            self.readDelay = newValue
+            self.parseOutputsTimer.Start(max(1, int(self.readScheduler.interval*1000)),
+                wx.TIMER_ONE_SHOT)
+            self.logger.info('Changed maximum read delay to {} ms.'.format(self.readDelay))
+        except ValueError as ve:
+            self.readDelayTxtCtrl.SetValue("{:d}".format(self.readDelay))
+            self.logger.error('ValueError while updating read delay: {}'.format(ve))
+
+    def onClearConsole(self, event):
+        """ Clear the output/input console """
+        self.logger.debug('Console cleared.')
+        self.pendingConsoleText = []
+        self.scrollback.clear()
+        self.logFileTextControl.Clear()
+        if self.virtualConsole is not None:
+            self.virtualConsole.refresh()
+
+    def onToggleVirtualConsole(self, event):
+        """ Switch between the rich text and the virtual console. """
+        self.setVirtualConsole(event.IsChecked())
+
+    def onToggleLogFile(self, event):
+        """ Open a log file if none is active, or close the existing one. """
+        self.logger.debug('Attempting to open a log file.')
+
+        if self.fileLoggerName is None:
+            fileDialog = wx.FileDialog(self, "Choose log file", os.getcwd(),
+                                    time.strftime("%Y%m%d%H%M%S_SM.log"),
+                                    "Log files (*.log)|*.log",
+                                         wx.FD_SAVE|wx.FD_OVERWRITE_PROMPT)
+            fileDialog.ShowModal() # Wait for response.
+            self.fileLoggerName = fileDialog.GetPath() # User-chosen log file.
+            # Only queue the records here, they're written to the file by another
+            # thread, so a slow disk doesn't stall the GUI. Drop the records
+            # rather than wait if the disk can't keep up at all.
+            self.fileLogger = fileLogger.AsyncFileLogger(self.fileLoggerName,
+                formatter=self.formatter, policy='drop') # Default log formatter.
+            self.fileLogger.start()
+            self.logger.addHandler(self.fileLogger.queueHandler) # Already logs to STDERR, now also the file.
+        else:
+            dlg=wx.MessageDialog(self, "Stop logging?", "Stop", wx.YES_NO|wx.ICON_QUESTION)
+            if dlg.ShowModal() == wx.ID_YES: # Avoid accidental log termination.
+                self.stopFileLogger()
+            else: # The checkbox should still be checked if we don't stop logging.
+                self.fileLogCheckbox.SetValue(True)
+
+    def onToggleCapture(self, event):
+        """ Start recording the raw data of all the monitored ports in a capture
+        file, or stop recording. """
+        if event.IsChecked():
+            fileDialog = wx.FileDialog(self, "Choose capture file", os.getcwd(),
+                time.strftime("%Y%m%d%H%M%S_SM.smcap"), "Captures (*.smcap)|*.smcap",
+                wx.FD_SAVE|wx.FD_OVERWRITE_PROMPT)
+            if fileDialog.ShowModal() != wx.ID_OK:
+                self.captureMenuItem.Check(False)
+                return
+            try:
+                self.captureWriter = capture.CaptureWriter(fileDialog.GetPath(),
+                    compression='gzip', append=False)
+            except (OSError, ValueError) as err:
+                self.captureMenuItem.Check(False)
+                self.logger.error('Could not open capture file due to {}.'.format(err))
+                return
+            self.logger.info('Capturing raw data to {}.'.format(fileDialog.GetPath()))
+        else:
+            self.stopCapture()
+        self.setSessionCaptures()
+
+    def onOpenLog(self, event):
+        """ Let the user choose a capture or a log file and show it in a new
+        window. """
+        fileDialog = wx.FileDialog(self, "Open capture or log file", os.getcwd(), "",
+            "Captures and logs (*.smcap;*.log)|*.smcap;*.log|All files (*)|*",
+            wx.FD_OPEN|wx.FD_FILE_MUST_EXIST)
+        if fileDialog.ShowModal() != wx.ID_OK:
+            return
+        fileName = fileDialog.GetPath()
+        try:
+            # The file is only scanned the first time, which can take a while.
+            with wx.BusyInfo('Indexing {}...'.format(os.path.basename(fileName))):
+                index = logIndex.openIndex(fileName)
+        except (OSError, ValueError) as err:
+            wx.MessageBox('Cannot open {}.'.format(fileName), 'Error', wx.OK | wx.ICON_ERROR)
+            self.logger.error('Could not open {} due to {}.'.format(fileName, err))
+            return
+        logViewerFrame(self, index, font=self.logFileTextControl.GetFont()).Show()
+
+    def onRawOutputTicked(self, event):
+        """ Raw output checkbox status defines whether hex output can also be
+        enabled or not. Grey it out when it won't affect the program not to
+        confuse the users. """
+        self.logger.debug('Raw output ticked: {}. Current raw output state: {}.'.format(
+            event.IsChecked(),self.hexOutputCheckbox.GetValue()))
+
+        if event.IsChecked(): # Hex output can now be enabled.
+            self.hexOutputCheckbox.Enable(True)
+        else: # Now hex output won't change anything.
+            self.hexOutputCheckbox.Enable(False) # Grey it out.
+            # Upon re-enabling raw output start from the default state of the hex output, too.
+            self.hexOutputCheckbox.SetValue(False)
+
+    def onEditSerialPort( self, event ):
+        """ Edit the more fine details of the serial connection, like the parity
+        or the stopbits. """
+        self.logger.debug('Attempting to edit serial connection details.')
+        # Main frame is the parent of this.
+        serialDialog = serialDetailsDialog(self, self.currentStopBits,
+            self.currentParity, self.currentByteSize)
+        result = serialDialog.ShowModal() # Need a user to click OK or cancel.
+        if result == wx.ID_OK: # User selected new settings so change the current defaults.
+            self.currentStopBits = serialDialog.stopBitsChoices[serialDialog.stopBitsChoice.GetSelection()]
+            self.currentParity = serialDialog.parityChoices[serialDialog.parityChoice.GetSelection()]
+            self.currentByteSize = serialDialog.byteSizeChoices[serialDialog.byteSizeChoice.GetSelection()]
+            self.logger.debug('Changed serial settings to: stop bits={}, parity={}, byte size={}'.format(
+                self.currentStopBits,self.currentParity,self.currentByteSize))
+            # Tell the user to reconnect for changes to take effect.
+            self.notifyToReconnect()
+        else: # Nothing's changed.
+            pass
+
+    def onPortsChanged(self, added, removed):
+        """ Add the ports that have been plugged in to the dropdown menu and
+        remove the unplugged ones, without looking up all the ports again. If
+        the hardware behind a lost connection has been plugged back in, possibly
+        under another name, reconnect to it. """
+        self.logger.debug('Ports added: {}, removed: {}.'.format(added, removed))
+        for port in removed:
+            # The current port is removed when its connection is found to be lost.
+            index = self.portChoice.FindString(port, caseSensitive=True)
+            if index != wx.NOT_FOUND and port != self.currentPort:
+                self.portChoice.Delete(index)
+        for port in added:
+            if self.portChoice.FindString(port, caseSensitive=True) == wx.NOT_FOUND:
+                self.portChoice.Append(port)
+
+        if not self.portOpen and self.lostPortIdentity is not None:
+            port = self.portInventory.findByIdentity(self.lostPortIdentity)
+            if port in added:
+                self.logger.info('Reconnecting to {}.'.format(port))
+                self.portChoice.SetStringSelection(port)
+                self.onChoseSerialPort(None)
+        self.Layout()
+
+    def onNewSession(self, event):
+        """ Let the user choose another port to monitor in a new tab. """
+        inUse = [self.currentPort] + [panel.session.name for panel in self.sessionPanels]
+        ports = [port for port in self.portInventory.getPorts() if port not in inUse]
+        if len(ports) == 0:
+            wx.MessageBox('All the available ports are already being monitored.',
+                'No ports', wx.OK | wx.ICON_INFORMATION)
+            return
+        dialog = wx.SingleChoiceDialog(self, 'Port to monitor', 'Monitor another port', ports)
+        if dialog.ShowModal() == wx.ID_OK:
+            self.openSession(dialog.GetStringSelection())
+        dialog.Destroy()
+
+    def onToggleProbePorts(self, event):
+        """ Choose whether all the candidate ports are opened when updating
+        the ports, and update them straight away. """
+        self.probePorts = event.IsChecked()
+        self.logger.debug('Probing all ports: {}.'.format(self.probePorts))
+        self.updatePorts()
+        self.Layout()
+
+    def onLoggingLevelChosen(self, event):
+        """ Check if the new logging level is different to the currently selected
+        one and, if so, do an update. """
+        # Retrieve the new selection.
+        newLevel = self.loggingLevelChoice.GetStringSelection()
+        if (newLevel != self.loggingLevel):
+            self.loggingLevel = newLevel
+            if self.loggingLevel == "ERROR":
+                self.handler.setLevel(logging.ERROR)
+            elif self.loggingLevel == "WARNING":
+                self.handler.setLevel(logging.WARNING)
+            elif self.loggingLevel == "INFO":
+                self.handler.setLevel(logging.INFO)
+            elif self.loggingLevel == "DEBUG":
+                self.handler.setLevel(logging.DEBUG)
+            else:
+                self.logger.warning("Incorrect logging level {} selected, falling back to DEBUG".format(newLevel))
+                self.loggingLevel = "DEBUG"
+                logget.setLevel(logging.DEBUG)
+                self.loggingLevelChoice.SetStringSelection("DEBUG")
+
+    #============================
+    # OTHER FUNCTIONS
+    #============================
+
+    def stopCapture(self):
+        """ Stop recording the raw data, if they're being recorded. """
+        if self.captureWriter is not None:
+            captureWriter, self.captureWriter = self.captureWriter, None
+            self.setSessionCaptures()
+            captureWriter.close()
+            self.logger.info('Stopped capturing raw data to {}.'.format(captureWriter.fileName))
+
+    def setSessionCaptures(self):
+        """ Make all the sessions record to the current capture, if any. """
+        for session in [self.mainSession] + [panel.session for panel in self.sessionPanels]:
+            if session is not None:
+                session.captureWriter = self.captureWriter
+
+    def stopFileLogger(self):
+        """ Stop logging to the file, if it's being logged to, once everything
+        that's been logged so far has been written. """
+        if self.fileLogger is not None:
+            self.logger.removeHandler(self.fileLogger.queueHandler)
+            self.fileLogger.stop()
+            if self.fileLogger.dropped > 0:
+                self.logger.warning('Dropped {} records not to fall behind with the log file.'.format(
+                    self.fileLogger.dropped))
+            self.fileLogger = None
+        self.fileLoggerName = None # Reset.
+
+    def updatePorts(self, suppressWarn=False, rescan=False):
+        """ Checks the list of open serial ports and updates the internal list
+        and the options shown in the dropdown selection menu.
+
+        Args
+        -----
+        suppressWarn (bool): whether to suppress showing a wx.MessageBox with
+            a warning if no active ports are found.
+        rescan (bool): whether to list the ports again rather than use the ones
+            kept by self.portInventory. Ports are always probed if chosen by
+            the user.
+        """
+
+        # check what ports are currently open
+        if self.probePorts:
+            ports = commsInterface.getActivePorts(probe=True)
+        else:
+            if rescan:
+                self.portInventory.refresh(notify=False)
+            ports = self.portInventory.getPorts()
+        if len(ports) <= 0 and not suppressWarn:
+            wx.MessageBox('Check connection and port permissions.', 'Found no active ports!',
+                wx.ICON_ERROR, None)
+
+        # save current selection
+        currentSelection = self.portChoice.GetStringSelection()
+
+        # Remove the current options
+        for i in range(len(self.portChoice.GetStrings())-1, -1, -1):
+            self.portChoice.Delete(i)
+
+        # add the newly found ports
+        self.portChoice.Append('None')
+        for port in ports:
+            self.portChoice.Append(port)
+
+        # attempt to return to the last selected port, use None if it's not found
+        if currentSelection in ports:
+            for i in range(len(ports)):
+                if ports[i] == currentSelection:
+                    self.portChoice.SetSelection(i+1)
+        else:
+            self.portChoice.SetSelection(0)
+            self.currentPort = 'None'
+
+    def disconnect(self):
+        """ Drop the current connection with the serial port """
+        if self.portOpen:
+            self.stopReader()
+            self.currentSerialConnection.close()
+        self.currentSerialConnection = 0
+        self.portOpen = False
+        self.portChoice.SetSelection(0)
+        self.currentPort = 'None'
+        self.lostPortIdentity = None # Don't reconnect, the user doesn't want to.
+        self.logger.info('User disconnected from port.')
+
+    def checkConnection(self):
+        """ Checks if there is anything still connected to the port.
+
+		Returns
+		-------
+		True if `self.currentSerialConnection` port is readable, False otherwise.
+		"""
+
+        if not commsInterface.checkConnection(self.currentSerialConnection):
+            # handle all internal nuts and bolts related to the connection
+            # by setting them back to defaults.
+            self.stopReader()
+            self.currentSerialConnection = 0
+            self.portOpen = False
+            self.currentPort = 'None'
+            self.lostPortIdentity = self.currentPortIdentity # Reconnect when it's back.
+            # let the user know something's wrong
+            self.logger.error('Lost port connection.')
+            wx.MessageBox('Port isn\'t readable! Check the connection...', 'Error',
+                wx.OK | wx.ICON_ERROR)
+            # check what ports are open once the user has had a chance to react.
+            self.updatePorts()
+            return False
+        else: # All is good.
+            return True
+
+    def startReader(self):
+        """ Start reading from the current serial connection in the background
+        and get notified when new data have been decoded. """
+        self.stopReader()
+        self.mainSession = portSession.PortSession(self.currentSerialConnection,
+            self.getOutputFormat(), logger=self.logger,
+            notify=lambda: wx.CallAfter(self.parseOutputs))
+        self.mainSession.captureWriter = self.captureWriter
+        self.mainSession.start(self.readerPool)
+        self.sessionNotebook.SetPageText(0, self.currentSerialConnection.name)
+
+    def stopReader(self):
+        """ Stop reading from the current serial connection, if it's being
+        read. Any outputs still waiting in the session's queue are discarded. """
+        if self.mainSession is not None:
+            self.mainSession.stop(timeout=2)
+            self.mainSession = None
+            self.sessionNotebook.SetPageText(0, u"No port")
+
+    def createSessionNotebook(self):
+        """ Move the console and the input box of the main port to the first
+        page of a notebook, to which the other monitored ports are added. """
+        sizer = self.logFileTextControl.GetContainingSizer()
+        for i, item in enumerate(sizer.GetChildren()):
+            if item.GetWindow() is self.logFileTextControl:
+                index = i
+                break
+
+        self.sessionNotebook = wx.Notebook(self)
+        mainPage = wx.Panel(self.sessionNotebook)
+        pageSizer = wx.BoxSizer(wx.VERTICAL)
+        for control, proportion in [(self.logFileTextControl, 1), (self.inputTextControl, 0)]:
+            sizer.Detach(control)
+            control.Reparent(mainPage)
+            pageSizer.Add(control, proportion, wx.ALL|wx.EXPAND, 5)
+        mainPage.SetSizer(pageSizer)
+        self.sessionNotebook.AddPage(mainPage, u"No port")
+        sizer.Insert(index, self.sessionNotebook, 1, wx.EXPAND|wx.ALL, 5)
+
+    def openSession(self, portName):
+        """ Open another port with the current connection settings and monitor
+        it in a new tab.
+
+        Arguments
+        ---------
+            portName (string) - name of the port to open.
+        """
+        try:
+            port = serial.Serial(port=portName, baudrate=self.BaudRate, timeout=2,
+                                 stopbits=self.currentStopBits,
+                                 parity=self.currentParity,
+                                 bytesize=self.currentByteSize)
+        except (OSError, serial.SerialException) as err:
+            wx.MessageBox('Cannot connect to port {}.'.format(portName), 'Error',
+                wx.OK | wx.ICON_ERROR)
+            self.logger.error('Could not connect to port {} due to {}.'.format(portName, err))
+            return
+
+        session = portSession.PortSession(port, self.getOutputFormat())
+        session.captureWriter = self.captureWriter
+        panel = portSessionPanel(self.sessionNotebook, self, session)
+        self.sessionPanels.append(panel)
+        self.sessionNotebook.AddPage(panel, portName, select=True)
+        self.logger.info('Connected to port {}'.format(portName))
+
+    def closeSession(self, panel):
+        """ Stop monitoring the port shown in one of the extra tabs and close
+        the tab.
+
+        Arguments
+        ---------
+            panel (portSessionPanel) - tab of the port.
+        """
+        panel.close()
+        self.sessionPanels.remove(panel)
+        for i in range(self.sessionNotebook.GetPageCount()):
+            if self.sessionNotebook.GetPage(i) is panel:
+                self.sessionNotebook.DeletePage(i)
+                break
+        self.logger.info('Disconnected from port {}'.format(panel.session.name))
+
+    def getOutputFormat(self):
+        """ Return the output format chosen by the user with the checkboxes,
+        one of ['formatted', 'raw', 'hex']. """
+        if not self.rawOutputCheckbox.GetValue():
+            return "formatted"
+        elif not self.hexOutputCheckbox.GetValue():
+            return "raw"
+        else:
+            return "hex"
+
+    def writeToTextBox(self, msg, prepend="", colour=(0,0,0)):
+        """ Log a message inside the main text display window.
+
+        The message isn't written straight away but collected with all the other
+        messages that arrive before the console is next refreshed. This happens
+        at most `maxRefreshRate` times per second, see `flushTextBox`.
+
+        Arguments
+        ---------
+            msg (string) - string representation of the message to be shown
+
+        Optional
+        ---------
+            prepend (string, default empty) - how to prepend the message, useful
+                for highlighting e.g. in/out directions, etc.
+            colour (int tuple, len=3, default=(0,0,0)) - RGB colour of text
+        """
+
+        # Extend the last run of text if it has the same colour.
+        text = r'{}{}'.format(prepend, msg)
+        if len(self.pendingConsoleText) > 0 and self.pendingConsoleText[-1][1] == colour:
+            self.pendingConsoleText[-1][0].append(text)
+        else:
+            self.pendingConsoleText.append([[text], colour])
+
+        # Schedule the next refresh unless it's already been done.
+        if not self.consoleFlushPending:
+            self.consoleFlushPending = True
+            delay = self.lastConsoleFlush + 1./self.maxRefreshRate - time.monotonic()
+            if delay > 0:
+                wx.CallLater(int(delay*1000)+1, self.flushTextBox)
+            else: # Refresh as soon as the current event has been handled.
+                wx.CallAfter(self.flushTextBox)
+
+    def flushTextBox(self):
+        """ Write all the pending messages in the main text display window.
+
+        Refreshes the position inside the text box, writes the messages, and sets
+        the cursour at the end of the text box to avoid issues with the user
+        accidentally clicking somewhere and disturbing the output process. The
+        text box isn't repainted until all the messages have been written.
+        """
+        self.consoleFlushPending = False
+        if not self or len(self.pendingConsoleText) == 0: # Closed or nothing to do.
+            return
+        self.lastConsoleFlush = time.monotonic()
+
+        if self.useVirtualConsole:
+            # Only the scrollback needs updating, the visible lines are drawn from it.
+            for textRun, colour in self.pendingConsoleText:
+                self.scrollback.append(''.join(textRun), colour)
+            self.pendingConsoleText = []
+            self.scrollback.takeTrim() # Nothing to remove from the virtual console.
+            self.virtualConsole.refresh()
+            return
+
+        self.logFileTextControl.Freeze()
+        try:
+            # Move the cursor to the end of the box
+            self.logFileTextControl.MoveEnd()
+
+            for textRun, colour in self.pendingConsoleText:
+                # Set colour if needed
+                if colour != (0,0,0):
+                    self.logFileTextControl.BeginTextColour(colour)
+
+                text = ''.join(textRun)
+                self.logFileTextControl.WriteText(text)
+                self.scrollback.append(text, colour)
+
+                # Re-set colour to default but only if it's been changed to avoid WX
+                # warning 'Debug: Too many EndStyle calls!"'.
+                if colour != (0,0,0):
+                    self.logFileTextControl.EndTextColour()
+            self.pendingConsoleText = []
+
+            # Remove the lines that no longer fit in the scrollback from the top
+            # of the box. This is done in large chunks, not every time.
+            noTrimmedChars = self.scrollback.takeTrim()
+            if noTrimmedChars > 0:
+                self.logFileTextControl.Remove(0, noTrimmedChars)
+
+            # Scroll to the end of the box.
+            self.logFileTextControl.ShowPosition(self.logFileTextControl.GetLastPosition())
+        finally:
+            self.logFileTextControl.Thaw()
+
+    def setMaxReadDelay(self, readDelay):
+        """ Change the longest time between reads, used while the port is idle.
+        The shortest one is commsInterface.MIN_READ_INTERVAL unless that's longer.
+
+        Arguments
+        ---------
+            readDelay (int) - longest time between reads in ms, must be positive.
+        """
+        if readDelay <= 0:
+            raise ValueError('Read delay must be positive, got {}.'.format(readDelay))
+        maxInterval = readDelay/1000.
+        self.readScheduler.setLimits(minInterval=min(commsInterface.MIN_READ_INTERVAL, maxInterval),
+            maxInterval=maxInterval)
+
+    def setMaxRefreshRate(self, maxRefreshRate):
+        """ Change the maximum number of times per second the console gets
+        updated. Lower values reduce the load on the GUI thread when a lot of
+        data or warnings are being received.
+
+        Arguments
+        ---------
+            maxRefreshRate (float) - maximum refresh rate in Hz, must be positive.
+        """
+        if maxRefreshRate <= 0:
+            raise ValueError('Refresh rate must be positive, got {}.'.format(maxRefreshRate))
+        self.maxRefreshRate = maxRefreshRate
+
+    def setScrollbackLimit(self, maxLines=None, maxChars=None):
+        """ Change how many lines or characters are kept in the console. Once
+        there are more, the oldest ones are removed. The complete output can still
+        be logged to a file.
+
+        Optional
+        ---------
+            maxLines (int, default None) - maximum number of lines, no limit if None.
+            maxChars (int, default None) - maximum number of characters, no limit
+                if None.
+        """
+        # Move the current contents to the new buffer, which drops whatever
+        # exceeds the new limits, and remove the same text from the console.
+        newScrollback = consoleBuffer.ScrollbackBuffer(maxLines=maxLines, maxChars=maxChars)
+        for i in range(len(self.scrollback)):
+            for text, colour in self.scrollback[i]:
+                newScrollback.append(text, colour)
+        # Text dropped from the old buffer might not have been trimmed yet, too.
+        noTrimmedChars = (self.scrollback.droppedChars + self.scrollback.noChars
+            - newScrollback.noChars)
+        newScrollback.droppedLines = 0 # Will be trimmed here.
+        newScrollback.droppedChars = 0
+        self.scrollback = newScrollback
+
+        if self.virtualConsole is not None:
+            self.virtualConsole.scrollback = self.scrollback
+            self.virtualConsole.firstLineNumber = self.scrollback.firstLineNumber
+            self.virtualConsole.refresh()
+        if noTrimmedChars > 0 and not self.useVirtualConsole:
+            self.logFileTextControl.Remove(0, noTrimmedChars)
+
+    def setVirtualConsole(self, useVirtualConsole):
+        """ Show the received data in a virtual console, which only draws the
+        lines that are visible, or in the rich text control, which allows
+        selecting any part of the text but gets slow with many lines.
+
+        The virtual console keeps up to VIRTUAL_CONSOLE_SCROLLBACK_LINES lines.
+        When switching back to the rich text control, only the newest
+        CONSOLE_SCROLLBACK_LINES are kept and written to it.
+
+        Arguments
+        ---------
+            useVirtualConsole (bool) - whether to show the virtual console.
+        """
+        if useVirtualConsole == self.useVirtualConsole:
+            return
+        self.flushTextBox() # Write the pending text to the current console.
+        sizer = self.logFileTextControl.GetContainingSizer()
+
+        if useVirtualConsole:
+            if self.virtualConsole is None:
+                # Put it right after the text control, with the same layout.
+                self.virtualConsole = consoleView.VirtualConsole(
+                    self.logFileTextControl.GetParent(), self.scrollback,
+                    font=self.logFileTextControl.GetFont())
+                for i, item in enumerate(sizer.GetChildren()):
+                    if item.GetWindow() is self.logFileTextControl:
+                        sizer.Insert(i+1, self.virtualConsole, 1, wx.EXPAND|wx.ALL, 5)
+                        break
+            self.useVirtualConsole = True
+            self.setScrollbackLimit(maxLines=VIRTUAL_CONSOLE_SCROLLBACK_LINES)
+            self.logFileTextControl.Clear() # Don't keep the text twice.
+            self.logFileTextControl.Hide()
+            self.virtualConsole.Show()
+        else:
+            # The text control is empty, so there's nothing to trim from it yet.
+            self.setScrollbackLimit(maxLines=CONSOLE_SCROLLBACK_LINES)
+            self.useVirtualConsole = False
+            self.virtualConsole.Hide()
+            self.logFileTextControl.Show()
+            # Write what's left in the scrollback to the text control in one go.
+            self.logFileTextControl.Freeze()
+            try:
+                for i in range(len(self.scrollback)):
+                    for text, colour in self.scrollback[i]:
+                        if colour != (0,0,0):
+                            self.logFileTextControl.BeginTextColour(colour)
+                        self.logFileTextControl.WriteText(text)
+                        if colour != (0,0,0):
+                            self.logFileTextControl.EndTextColour()
+                self.logFileTextControl.ShowPosition(self.logFileTextControl.GetLastPosition())
+            finally:
+                self.logFileTextControl.Thaw()
+
+        self.virtualConsoleMenuItem.Check(self.useVirtualConsole)
+        self.Layout()
+
+    def sendMessage(self, msg):
+        """ Sends a message to the port via the serial conneciton, but also takes
+        care of any additional operations, such as logging the message.
+
+        Arguments
+        ---------
+            msg (string) - representation of the message to be sent
+        """
+
+        # make sure the connection has not been broken
+        if self.portOpen:
+            if self.checkConnection():
+                # Send the message; need to pass as a regular string to avoid compatibility
+                # issues with new wxWidgets which use unicode string formatting
+                # The session converts msg to bytes, passes them to serial,
+                # captures them if chosen and logs the sent command.
+                self.mainSession.write(msg)
+                # Log in the main display box in new line and in blue to make sure it stands out.
+                self.writeToTextBox(msg+'\n',prepend='\nOUT: ',colour=(0,0,255))
+
+    def parseOutputs(self):
+        """ Collect the data decoded by the background reader thread, if there
+        is anything available, and pass them to the respective handlers.
+
+        The port itself isn't queried here. The reader stops as soon as reading
+        from the port fails, and then the port is closed. """
+        if self.portOpen and self.mainSession is not None:
+            # Everything is queued before the reading stops, so whatever was
+            # read before then is collected below.
+            readerAlive = self.mainSession.alive
+
+            # The format is picked up by the session for the following chunks.
+            self.mainSession.outputFormat = self.getOutputFormat()
+
+            # Grab all the outputs decoded since the last call in one batch.
+            outputs = self.mainSession.getOutputs()
+            output = ''.join(o[0] for o in outputs)
+            self.noCharsSinceTick += len(output)
+
+            # Log and print received data in the text box. output is a string,
+            # which is Unicode in Python 3, so no need to cast.
+            # Only print when there is some message to avoid spamming the logs
+            # with empty lines.
+            if len(output) > 0:
+                # Replace control characters with unicode unknown character.
+                # Otherwise, the log might stall. Never seen this happen in
+                # the wx text box but just to be safe.
+                cleanOutput = commsInterface.sanitiseOutput(output)
+                self.writeToTextBox(cleanOutput)
+                self.logger.info(cleanOutput)
+
+            # Log and print (in red) warnings, if there are any.
+            for warningSummary in (o[1] for o in outputs):
+                for w in warningSummary:
+                    self.writeToTextBox("{}, check the log!\n".format(w), colour=(255,0,0))
+                    self.logger.warning(warningSummary[w])
+
+            if not readerAlive:
+                # The reader has stopped because the port couldn't be read. Don't
+                # start it again, a port that keeps failing would be retried
+                # forever. Close it and let the user reconnect instead.
+                self.logger.error('Reader stopped due to {}.'.format(self.mainSession.error))
+                self.stopReader()
+                try:
+                    self.currentSerialConnection.close()
+                except (OSError, serial.SerialException):
+                    pass # It's broken already.
+                self.currentSerialConnection = 0
+                self.portOpen = False
+                self.currentPort = 'None'
+                self.lostPortIdentity = self.currentPortIdentity # Reconnect if it's plugged back in.
+                self.updatePorts()
+                self.notifyToReconnect()
+
+    def notifyToReconnect(self):
+        """ Notify the user to reconnect to the serial port for the changes they've
+        made to take effect by opening a dialog. It'll automatically disappear
+        after two seconds. """
+        reconnectInfoDialog = pleaseReconnectDialog(self)
+        # Automatically close after some time.
+        wx.CallLater(2000, reconnectInfoDialog.Destroy)
+        reconnectInfoDialog.ShowModal()
+
+class portSessionPanel(wx.Panel):
+    def __init__(self, parent, frame, session):
+        """ Tab showing one of the additional ports monitored by the main frame.
+        The data are shown in a virtual console and logged by the session's
+        logger, and messages can be sent to the port from the input box.
+
+        Arguments
+        ---------
+            parent (wx.Window) - notebook the tab is added to.
+            frame (serialMonitorGuiMainFrame) - main frame, whose output format,
+                refresh rate and reader pool are used.
+            session (portSession.PortSession) - session of the open port,
+                started here.
+        """
+        wx.Panel.__init__(self, parent)
+        self.frame = frame
+        self.session = session
+
+        self.scrollback = consoleBuffer.ScrollbackBuffer(maxLines=VIRTUAL_CONSOLE_SCROLLBACK_LINES)
+        self.console = consoleView.VirtualConsole(self, self.scrollback,
+            font=frame.logFileTextControl.GetFont())
+        self.inputTextControl = wx.TextCtrl(self, wx.ID_ANY, wx.EmptyString,
+            style=wx.TE_PROCESS_ENTER)
+        self.closeButton = wx.Button(self, wx.ID_ANY, u"Close port")
+        # Counters of the lost data, see commsInterface.OverflowMonitor.
+        self.countersText = wx.StaticText(self, wx.ID_ANY, session.overflowMonitor.describe())
+
+        inputSizer = wx.BoxSizer(wx.HORIZONTAL)
+        inputSizer.Add(self.inputTextControl, 1, wx.ALL|wx.EXPAND, 5)
+        inputSizer.Add(self.countersText, 0, wx.ALL|wx.ALIGN_CENTER_VERTICAL, 5)
+        inputSizer.Add(self.closeButton, 0, wx.ALL, 5)
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        sizer.Add(self.console, 1, wx.ALL|wx.EXPAND, 5)
+        sizer.Add(inputSizer, 0, wx.EXPAND, 0)
+        self.SetSizer(sizer)
+
+        self.inputTextControl.Bind(wx.EVT_TEXT_ENTER, self.onSendInput)
+        self.closeButton.Bind(wx.EVT_BUTTON, self.onClosePort)
+
+        self.consoleRefreshPending = False # A refresh of the console has been scheduled.
+        self.lastConsoleRefresh = 0. # time.monotonic() of the last refresh.
+
+        self.session.notify = lambda: wx.CallAfter(self.parseOutputs)
+        self.session.start(frame.readerPool)
+
+    def onSendInput(self, event):
+        """ Send the message typed in the input box to the port. """
+        msg = self.inputTextControl.GetLineText(0)
+        if self.session.alive:
+            self.session.write(msg)
+            self.writeToConsole('\nOUT: '+msg+'\n', colour=(0,0,255))
+        self.inputTextControl.Clear()
+
+    def onClosePort(self, event):
+        """ Stop monitoring the port and close the tab. """
+        wx.CallAfter(self.frame.closeSession, self)
+
+    def parseOutputs(self):
+        """ Show and log the data decoded since the last call, and let the user
+        know if the port can no longer be read. """
+        if not self:
+            return # The tab has been closed already.
+        alive = self.session.alive
+        self.session.outputFormat = self.frame.getOutputFormat()
+        outputs = self.session.getOutputs()
+
+        output = ''.join(o[0] for o in outputs)
+        if len(output) > 0:
+            cleanOutput = commsInterface.sanitiseOutput(output)
+            self.writeToConsole(cleanOutput)
+            self.session.logger.info(cleanOutput)
+
+        for warningSummary in (o[1] for o in outputs):
+            for w in warningSummary:
+                self.writeToConsole("{}, check the log!\n".format(w), colour=(255,0,0))
+                self.session.logger.warning(warningSummary[w])
+            if len(warningSummary) > 0:
+                self.countersText.SetLabel(self.session.overflowMonitor.describe())
+                self.Layout()
+
+        if not alive and self.session.error is not None and self.inputTextControl.IsEnabled():
+            self.session.logger.error('Lost connection to port {} due to {}.'.format(
+                self.session.name, self.session.error))
+            self.writeToConsole('\nLost port connection, close the tab.\n', colour=(255,0,0))
+            self.inputTextControl.Enable(False)
+
+    def writeToConsole(self, text, colour=(0,0,0)):
+        """ Add text to the console, which is refreshed at most as often as the
+        main frame's console.
+
+        Arguments
+        ---------
+            text (string) - text to be shown.
+
+        Optional
+        ---------
+            colour (int tuple, len=3, default=(0,0,0)) - RGB colour of text
+        """
+        self.scrollback.append(text, colour)
+        self.scrollback.takeTrim() # Nothing to remove from the virtual console.
+        if not self.consoleRefreshPending:
+            self.consoleRefreshPending = True
+            delay = self.lastConsoleRefresh + 1./self.frame.maxRefreshRate - time.monotonic()
+            if delay > 0:
+                wx.CallLater(int(delay*1000)+1, self.refreshConsole)
+            else:
+                wx.CallAfter(self.refreshConsole)
+
+    def refreshConsole(self):
+        """ Show the text added since the last refresh. """
+        self.consoleRefreshPending = False
+        if not self:
+            return
+        self.lastConsoleRefresh = time.monotonic()
+        self.console.refresh()
+
+    def close(self):
+        """ Stop reading the port and close it. """
+        self.session.stop(timeout=2)
+        self.session.port.close()
+
+class logViewerFrame(wx.Frame):
+    def __init__(self, parent, index, font=None):
+        """ Window showing a capture or a log file in a virtual console, which
+        only reads the lines that are visible from the disk.
+
+        Arguments
+        ---------
+            parent (wx.Window) - parent window.
+            index (logIndex.LineIndex or logIndex.CaptureIndex) - index of the
+                file, closed together with the window.
+
+        Optional
+        ---------
+            font (wx.Font, default None) - font to use, the default GUI font if None.
+        """
+        wx.Frame.__init__(self, parent, wx.ID_ANY, os.path.basename(index.fileName),
+            size=(900, 600))
+        self.index = index
+
+        panel = wx.Panel(self)
+        self.console = consoleView.VirtualConsole(panel, index, font=font)
+        self.reloadButton = wx.Button(panel, wx.ID_ANY, u"Reload")
+        self.infoText = wx.StaticText(panel, wx.ID_ANY, "")
+
+        buttonSizer = wx.BoxSizer(wx.HORIZONTAL)
+        buttonSizer.Add(self.reloadButton, 0, wx.ALL, 5)
+        buttonSizer.Add(self.infoText, 1, wx.ALL|wx.ALIGN_CENTER_VERTICAL, 5)
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        sizer.Add(self.console, 1, wx.ALL|wx.EXPAND, 5)
+        sizer.Add(buttonSizer, 0, wx.EXPAND, 0)
+        panel.SetSizer(sizer)
+
+        self.reloadButton.Bind(wx.EVT_BUTTON, self.onReload)
+        self.Bind(wx.EVT_CLOSE, self.onClose)
+        self.updateInfo()
+
+    def onReload(self, event):
+        """ Show whatever has been added to the file since it was opened. """
+        if self.index.refresh():
+            self.console.refresh()
+        self.updateInfo()
+
+    def onClose(self, event):
+        """ Close the file together with the window. """
+        self.index.close()
+        self.Destroy()
+
+    def updateInfo(self):
+        """ Show the number of lines and the size of the file. """
+        self.infoText.SetLabel(u"{:,} lines, {:,} bytes".format(len(self.index),
+            self.index.indexedSize))
+
+# implements the GUI class to run a wxApp
+class serialMonitorGuiApp(wx.App):
+    def OnInit(self):
+#TODO Maybe should call the parent wx.App.OnInit method here?
+        self.frame = serialMonitorGuiMainFrame()
+        self.SetTopWindow(self.frame)
+        self.frame.Show(True)
+        return True
+
+def main():
+    """ Build and run the graphical interface. """
+    # need an environment variable on Ubuntu to make the menu bars show correctly
+    env = os.environ
+    if not(('UBUNTU_MENUPROXY' in env) and (env['UBUNTU_MENUPROXY'] == 0)):
+        os.environ["UBUNTU_MENUPROXY"] = "0"
+
+    # start the app
+    app = serialMonitorGuiApp()
+    app.MainLoop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+#!/bin/env/python3
+""" Command-line interface that streams the data received by a serial port to
+the standard output or a file, without the GUI and without importing wx, e.g.
+
+	serialMonitor --headless --port /dev/ttyACM0 --baud 115200 --format hex
+"""
+import argparse
+import logging
+import signal
+import sys
+import time
+
+import serial
+
+import SerialMonitor.capture as capture
+import SerialMonitor.commsInterface as commsInterface
+
+# Size of the output buffer in bytes. Output is written in blocks of this size
+# rather than line by line, which matters at high data rates.
+OUTPUT_BUFFER_SIZE = 1024*1024
+# Longest time in seconds that the output can stay in the buffer, so that the
+# output file can be followed when data are received slowly.
+FLUSH_INTERVAL = 1.
+# Longest time in seconds a single read may block before the output is flushed
+# or the program checks whether it should stop.
+READ_TIMEOUT = 0.5
+
+def parseArguments(argv=None):
+	""" Parse the command-line arguments of the serialMonitor entry point.
+
+	Optional
+	---------
+		argv (list of strings, default None) - arguments without the program
+			name, sys.argv[1:] if None.
+
+	Returns
+	---------
+		(argparse.Namespace) - parsed arguments.
+	"""
+	parser = argparse.ArgumentParser(prog='serialMonitor',
+		description='Communicate with a device via a serial port. Starts the GUI '
+			'unless --headless is given.')
+	parser.add_argument('--headless', action='store_true',
+		help='stream the received data to the standard output or a file instead '
+			'of starting the GUI')
+	parser.add_argument('--port',
+		help='serial port to read, e.g. /dev/ttyACM0, COM3 or any URL supported '
+			'by pySerial, e.g. loop://, or replay://FILE?speed=N to play back a '
+			'capture')
+	parser.add_argument('--baud', type=int, default=9600,
+		help='baud rate (default: %(default)s)')
+	parser.add_argument('--format', choices=['formatted', 'raw', 'hex'],
+		default='formatted', help='output format (default: %(default)s)')
+	parser.add_argument('--output', metavar='FILE',
+		help='file to write the output to instead of the standard output')
+	parser.add_argument('--append', action='store_true',
+		help='append to the output file instead of overwriting it')
+	parser.add_argument('--buffer-size', type=int, default=OUTPUT_BUFFER_SIZE,
+		help='output buffer size in bytes (default: %(default)s)')
+	parser.add_argument('--capture', metavar='FILE',
+		help='also record the raw bytes with timestamps in a binary capture file')
+	parser.add_argument('--capture-compression', choices=['none', 'gzip', 'zstd'],
+		default='none', help='compression of the capture file (default: %(default)s)')
+	parser.add_argument('--list-ports', action='store_true',
+		help='print the available ports and exit')
+	args = parser.parse_args(argv)
+
+	if args.headless and args.port is None and not args.list_ports:
+		parser.error('--port is required with --headless')
+	if args.list_ports:
+		args.headless = True
+	return args
+
+def run(args):
+	""" Stream the data received by the port chosen in `args` until interrupted
+	or the connection is lost.
+
+	Arguments
+	---------
+		args (argparse.Namespace) - see `parseArguments`.
+
+	Returns
+	---------
+		(int) - exit status, 0 if stopped by the user, 1 if the port couldn't
+			be read.
+	"""
+	logger = logging.getLogger("SMLog")
+	if not logger.handlers:
+		handler = logging.StreamHandler() # Will output to STDERR.
+		handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+		logger.addHandler(handler)
+		logger.setLevel(logging.WARNING)
+
+	if args.list_ports:
+		for port in commsInterface.getActivePorts():
+			print(port)
+		return 0
+
+	if args.output is None:
+		# Don't close the standard output when done, only flush it.
+		output = open(sys.stdout.fileno(), 'w', buffering=args.buffer_size,
+			encoding='utf-8', errors='replace', newline='', closefd=False)
+	else:
+		output = open(args.output, 'a' if args.append else 'w',
+			buffering=args.buffer_size, encoding='utf-8', newline='')
+
+	try:
+		port = serial.serial_for_url(args.port, baudrate=args.baud, timeout=READ_TIMEOUT)
+	except (OSError, serial.SerialException) as err:
+		logger.error('Could not connect to port {}: {}'.format(args.port, err))
+		output.close()
+		return 1
+
+	captureWriter = None
+	if args.capture is not None:
+		try:
+			captureWriter = capture.CaptureWriter(args.capture, append=args.append,
+				compression=None if args.capture_compression == 'none' else args.capture_compression)
+		except (OSError, ValueError) as err:
+			logger.error('Could not open capture file {}: {}'.format(args.capture, err))
+			port.close()
+			output.close()
+			return 1
+
+	# Stop cleanly, i.e. flush the output, also when asked to by the system.
+	def onTerminate(signum, frame):
+		raise KeyboardInterrupt
+	signal.signal(signal.SIGTERM, onTerminate)
+
+	try:
+		return stream(port, output, args.format, logger, captureWriter=captureWriter)
+	finally:
+		port.close()
+		if captureWriter is not None:
+			captureWriter.close()
+		try:
+			output.close()
+		except BrokenPipeError:
+			pass
+
+def stream(port, output, outputFormat, logger=None, flushInterval=FLUSH_INTERVAL,
+		captureWriter=None):
+	""" Decode everything received by `port` and write it to `output` until
+	interrupted or the connection is lost.
+
+	Arguments
+	---------
+		port (serial.SerialBase) - instance of an open port interface, with
+			a timeout.
+		output (file) - text file to write the output to.
+		outputFormat (string) - chosen formatting type, must be one of
+			['formatted', 'raw', 'hex'].
+
+	Optional
+	---------
+		logger (logging.Logger, default None) - where to log the warnings and
+			errors, nowhere if None.
+		flushInterval (float, default FLUSH_INTERVAL) - longest time in seconds
+			the output can stay in the buffer.
+		captureWriter (capture.CaptureWriter, default None) - where to also
+			record the raw bytes, nowhere if None.
+
+	Returns
+	---------
+		(int) - 0 if interrupted by the user (KeyboardInterrupt), 1 if the port
+			couldn't be read.
+	"""
+	outputBuffer = commsInterface.LineFramer()
+	overflowMonitor = commsInterface.OverflowMonitor(port, commsInterface.setBufferSize(port))
+	hexSeparator = '' # Separates the hex codes of consecutive chunks.
+	noWaiting = 0 # Bytes known to be waiting in the input buffer.
+	lastFlush = time.monotonic()
+	try:
+		while True:
+			# Block until at least one byte arrives (or the timeout expires),
+			# or grab everything that was waiting after the last read.
+			dataStr = port.read(max(1, noWaiting))
+			if len(dataStr) > 0:
+				noWaiting = port.inWaiting()
+				if captureWriter is not None:
+					captureWriter.write(port.name, capture.IN, dataStr)
+				text, outputBuffer, warningSummary = commsInterface.decodeOutput(
+					dataStr, outputBuffer, outputFormat)
+				warningSummary.update(overflowMonitor.check(len(dataStr), noWaiting))
+				if outputFormat == 'hex':
+					text = hexSeparator + text
+					hexSeparator = ':'
+				output.write(text)
+				if logger is not None:
+					for w in warningSummary:
+						logger.warning(warningSummary[w])
+			else:
+				noWaiting = 0
+
+			if time.monotonic()-lastFlush >= flushInterval:
+				output.flush()
+				if captureWriter is not None:
+					captureWriter.flush()
+				lastFlush = time.monotonic()
+
+	except KeyboardInterrupt:
+		return 0
+	except BrokenPipeError: # E.g. piped into head, which has exited.
+		return 0
+	except (OSError, serial.SerialException) as err:
+		if logger is not None:
+			logger.error('Lost port connection: {}'.format(err))
+		return 1
+	finally:
+		try:
+			output.flush()
+		except BrokenPipeError:
+			pass
@@ -0,0 +1,297 @@
+#!/bin/env/python3
+""" Software stand-in for an Arduino running tests/HILTester/HILTester.ino, so
+that the hardware-in-the-loop (HIL) tests can run without the hardware. The
+simulator owns a pair of pseudo-terminals (pty), reads the command bytes sent
+to its port and replies with the same bytes as the sketch, paced like a UART
+at the chosen baud rate. Only works where os.openpty does, e.g. Linux and macOS.
+
+It can also be used by hand, e.g. to try the GUI:
+
+	python3 -m SerialMonitor.hilSimulator --baud 9600
+
+prints the name of the port to connect to and runs until interrupted.
+"""
+import argparse
+import os
+import select
+import struct
+import sys
+import threading
+import time
+import tty
+
+# Environment variables that configure the simulator used by the HIL tests, see
+# `simulatorFromEnvironment`.
+BAUD_RATE_VARIABLE = 'SM_HIL_BAUD'
+BURST_SIZE_VARIABLE = 'SM_HIL_BURST'
+DEFAULT_BAUD_RATE = 9600 # Same as Serial.begin in the sketch.
+# Bits it takes a UART to send one byte: start, 8 data and stop bits.
+BITS_PER_BYTE = 10
+# How often, in seconds, a waiting simulator checks if it should stop.
+POLL_INTERVAL = 0.1
+
+class _SketchSerial(object):
+	""" The part of the Arduino Serial object used by the sketch. Collects the
+	bytes written between calls to flush into bursts. """
+
+	def __init__(self):
+		self.bursts = []
+		self._pending = bytearray()
+
+	def write(self, data):
+		""" Serial.write of a byte (int) or a string (bytes). """
+		if isinstance(data, int):
+			self._pending.append(data & 0xFF)
+		else:
+			self._pending += data
+
+	def flush(self):
+		""" Serial.flush, the bytes written so far have been sent. """
+		if len(self._pending) > 0:
+			self.bursts.append(bytes(self._pending))
+			self._pending = bytearray()
+
+def _sendLong(serial, value):
+	""" serialSendLong - the two lowest bytes of a long, little-endian. """
+	serial.write(struct.pack('<H', value & 0xFFFF))
+
+def _sendLongs(serial):
+	for value in range(256, 65535, 500):
+		_sendLong(serial, value)
+		serial.flush()
+	_sendLong(serial, 65535)
+	serial.flush()
+
+def _sendASCIITableInOneGo(serial):
+	counter = 10
+	for byte in range(128):
+		serial.write(byte)
+		serial.flush()
+		counter -= 1
+		if counter == 0:
+			counter = 10
+			serial.write(b'\n')
+	serial.write(b'\nOutputBuffer')
+	serial.flush()
+
+def _eachFlushed(data):
+	""" Return a test case that sends the bytes one at a time. """
+	def send(serial):
+		for byte in data:
+			serial.write(byte)
+			serial.flush()
+	return send
+
+def _inOneGo(data):
+	""" Return a test case that sends all the bytes at once. """
+	def send(serial):
+		serial.write(data)
+		serial.flush()
+	return send
+
+# Bytes of the sendSequences, sendControl and sendControlLongs test cases.
+_SEQUENCES = (b'\x80\x81\x82\x80\x00\x82\x80\x82\x00\x00\x80\x82\x80\xa0\x00\x82\xa1'
+	b'\x80\x82\xa1\x00\x00\xa1\x80\x82\x00\xaf\x80\x82\x00\xaf\x00\x00\x00\x00\xaf\x00')
+# sendControl sends every control byte followed by an 'A', except 0x9C.
+_CONTROL = (list(range(0x20))+[0x20, 0x7F, 0x0B, 0x0C, 0x0D, 0x0E, 0x0F, 0x11, 0x12,
+	0x13, 0x18, 0x19, 0x1C, 0x1D, 0x1E, 0x1F]+list(range(0x80, 0x9C))+[None]
+	+list(range(0x9D, 0xA0))+list(range(0x87, 0x9C))+[None]+list(range(0x9D, 0xA0)))
+_CONTROL_LONGS = [0x0001, 0x0203, 0x0405, 0x0607, 0x0809, 0x0A0B, 0x0C0D, 0x0E0F, 0x1011,
+	0x1213, 0x1415, 0x1617, 0x1819, 0x1A1B, 0x1C1D, 0x1E1F, 0x207F, 0x0B0C, 0x0D0E, 0x0F11,
+	0x1213, 0x1819, 0x1C1D, 0x1E1F, 0x8081, 0x8283, 0x8485, 0x8687, 0x8889, 0x8A8B, 0x8C8D,
+	0x8E8F, 0x9091, 0x9293, 0x9495, 0x9697, 0x9899, 0x9A9B, 0x9D, 0x9E9F, 0x8788, 0x898A,
+	0x8B8C, 0x8D8E, 0x8F90, 0x9192, 0x9394, 0x9596, 0x9798, 0x999A, 0x9B, 0x9D9E]
+
+def _sendControl(serial):
+	for byte in _CONTROL:
+		if byte is not None: # Where the sketch skips 0x9C, only 'A' is sent.
+			serial.write(byte)
+		serial.write(0x41)
+	serial.flush()
+
+def _sendControlLongs(serial):
+	for value in _CONTROL_LONGS:
+		_sendLong(serial, value)
+		serial.flush()
+	serial.write(0x9F)
+	serial.flush()
+
+# What the sketch does for every command byte, see loop() in HILTester.ino.
+TEST_CASES = {
+	b'0': _inOneGo(b'Arduino reachable.'),
+	b'A': _inOneGo(b'AAA'),
+	b'Z': _inOneGo(b'0\x00\x00'),
+	b'O': _inOneGo(b'1\x01\x01'),
+	b'S': _eachFlushed(range(128)),
+	b'N': _eachFlushed([128, 129, 130, 138, 139, 143, 159, 160, 161, 200, 240, 254, 255]),
+	b'L': _sendLongs,
+	b'Q': _inOneGo(_SEQUENCES),
+	b'R': _inOneGo(b'\x10\xff\xfe\x10\xff\xff\x11\x00\x00'),
+	b'a': _inOneGo(b'AAA\n'),
+	b'z': _inOneGo(b'0\x00\x00\n'),
+	b'o': _inOneGo(b'1\x01\x01\n'),
+	b's': _sendASCIITableInOneGo,
+	b'V': _inOneGo(b'\x7f\x80'),
+	b'v': _inOneGo(b'\x80\x7e'),
+	b'E': _inOneGo(b'\x7f\n\x80'),
+	b'e': _inOneGo(b'\x80\n\x7e'),
+	# Only used in black-box testing of the GUI.
+	b'u': _inOneGo(b'\x80\x81\x82\xa0\xa1\xaf\x00'),
+	b'l': _inOneGo(b'\x00\x01\xff\xff'),
+	b'm': _eachFlushed([0x41]*131),
+	b'x': _inOneGo(b'\x90'),
+	b'X': _inOneGo(b'A'*10+b'\x90'+b'A'*10),
+	b'y': _inOneGo(b'\x84'),
+	b'c': _sendControl,
+	b'C': _sendControlLongs,
+	b't': _inOneGo(b'\x9c'),
+}
+
+def reply(command):
+	""" Return the bursts of bytes the sketch sends in reply to a command byte,
+	one for every Serial.flush(), or an empty list for unknown commands. """
+	serial = _SketchSerial()
+	if command in TEST_CASES:
+		TEST_CASES[command](serial)
+		serial.flush()
+	return serial.bursts
+
+class HILSimulator(threading.Thread):
+	""" Background thread that acts as an Arduino running HILTester.ino,
+	connected to the port `portName`. Commands are executed one at a time, in
+	the order they're received, like the sketch does.
+
+	Optional
+	---------
+		baudRate (int, default DEFAULT_BAUD_RATE) - rate, in bits per second, at
+			which the replies are sent, with BITS_PER_BYTE bits per byte. The
+			replies are sent as fast as possible if None or 0.
+		burstSize (int, default None) - largest number of bytes written to the
+			port at once. By default, the bytes of every Serial.flush() of the
+			sketch are written together.
+
+	Example
+	---------
+		with HILSimulator(baudRate=115200) as simulator:
+			port = serial.Serial(simulator.portName, timeout=1)
+			port.write(b'0')
+			port.read(18) # b'Arduino reachable.'
+	"""
+
+	def __init__(self, baudRate=DEFAULT_BAUD_RATE, burstSize=None):
+		threading.Thread.__init__(self, name="HILSimulator")
+		self.daemon = True
+		if burstSize is not None and burstSize < 1:
+			raise ValueError('Burst size must be positive, got {}.'.format(burstSize))
+		self.baudRate = baudRate
+		self.burstSize = burstSize
+		self.noCommands = 0 # Command bytes received so far.
+		self.bytesSent = 0
+
+		self._master, self._slave = os.openpty()
+		# The slave end is kept open, so that the port can be opened and closed
+		# by the tests as often as needed. Raw, so that nothing is echoed.
+		tty.setraw(self._slave)
+		self.portName = os.ttyname(self._slave)
+		os.set_blocking(self._master, False)
+		self._stopEvent = threading.Event()
+
+	def __enter__(self):
+		self.start()
+		return self
+
+	def __exit__(self, excType, excValue, traceback):
+		self.stop()
+
+	def stop(self, timeout=None):
+		""" Stop simulating and close the port. """
+		self._stopEvent.set()
+		if self.is_alive() and threading.current_thread() is not self:
+			self.join(timeout)
+		for fd in [self._master, self._slave]:
+			try:
+				os.close(fd)
+			except OSError: # Already closed.
+				pass
+
+	def run(self):
+		""" Execute the commands received until stopped. """
+		while not self._stopEvent.is_set():
+			try:
+				readable, writable, failed = select.select([self._master], [], [],
+					POLL_INTERVAL)
+				if len(readable) == 0:
+					continue
+				commands = os.read(self._master, 1024)
+			except (BlockingIOError, InterruptedError):
+				continue
+			except (OSError, ValueError): # Closed.
+				break
+			for command in commands:
+				self.noCommands += 1
+				for burst in reply(bytes([command])):
+					self._send(burst)
+
+	def _send(self, burst):
+		""" Write a burst of bytes to the port, `burstSize` at a time, taking
+		as long as the UART would. """
+		start = time.monotonic()
+		byteTime = BITS_PER_BYTE/self.baudRate if self.baudRate else 0.
+		sent = 0
+		while sent < len(burst) and not self._stopEvent.is_set():
+			end = len(burst) if self.burstSize is None else min(len(burst), sent+self.burstSize)
+			sent += self._write(burst[sent:end])
+			delay = start+sent*byteTime-time.monotonic()
+			if delay > 0:
+				self._stopEvent.wait(delay)
+		self.bytesSent += sent
+
+	def _write(self, data):
+		""" Write some of the data once the port has room for them, return how
+		many bytes were written. """
+		while not self._stopEvent.is_set():
+			readable, writable, failed = select.select([], [self._master], [], POLL_INTERVAL)
+			if len(writable) > 0:
+				try:
+					return os.write(self._master, data)
+				except BlockingIOError:
+					continue
+		return 0
+
+def simulatorFromEnvironment():
+	""" Return an HILSimulator configured by the environment variables:
+	* SM_HIL_BAUD - baud rate, 0 to send as fast as possible (default 9600),
+	* SM_HIL_BURST - largest number of bytes written at once (default: as the
+	  sketch flushes them).
+	Used to run the HIL tests against slower, faster or more fragmented
+	devices. """
+	baudRate = int(os.environ.get(BAUD_RATE_VARIABLE, DEFAULT_BAUD_RATE))
+	burstSize = os.environ.get(BURST_SIZE_VARIABLE)
+	return HILSimulator(baudRate=baudRate,
+		burstSize=None if burstSize in [None, ''] else int(burstSize))
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description='Simulate an Arduino running '
+		'HILTester.ino on a pseudo-terminal.')
+	parser.add_argument('--baud', type=int, default=DEFAULT_BAUD_RATE,
+		help='baud rate, 0 to reply as fast as possible (default: %(default)s)')
+	parser.add_argument('--burst', type=int, default=None,
+		help='largest number of bytes written at once (default: as the sketch flushes)')
+	args = parser.parse_args(argv)
+
+	simulator = HILSimulator(baudRate=args.baud, burstSize=args.burst)
+	simulator.start()
+	print('Simulating HILTester.ino on {}, stop with Ctrl+C.'.format(simulator.portName))
+	try:
+		while simulator.is_alive():
+			simulator.join(POLL_INTERVAL)
+	except KeyboardInterrupt:
+		pass
+	finally:
+		simulator.stop()
+		print('Received {} commands, sent {} bytes.'.format(simulator.noCommands,
+			simulator.bytesSent))
+	return 0
+
+if __name__ == '__main__':
+	sys.exit(main())
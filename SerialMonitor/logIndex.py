@@ -0,0 +1,420 @@
+#!/bin/env/python3
+""" Random access to the lines of very large log files and to the records of
+capture files, without reading them into memory, so that they can be shown by
+a `consoleView.VirtualConsole` in place of a `consoleBuffer.ScrollbackBuffer`.
+
+The files are memory-mapped and only the offsets of the lines (or blocks of
+records) are kept, in compact arrays. The arrays are saved next to the file,
+with INDEX_SUFFIX appended to its name, so opening the same file again doesn't
+need scanning it. When the file has grown since, e.g. because it's still being
+logged to, only the new part is scanned.
+"""
+import bisect
+import collections
+import itertools
+import json
+import mmap
+import operator
+import os
+import struct
+import time
+import zlib
+from array import array
+
+import SerialMonitor.capture as capture
+import SerialMonitor.commsInterface as commsInterface
+
+# Suffix of the index files saved next to the indexed files.
+INDEX_SUFFIX = '.idx'
+# Number of bytes of the log file scanned for line ends at once.
+SCAN_CHUNK_SIZE = 64*1024*1024
+# Number of bytes at the start of the file whose CRC-32 is kept in the index, to
+# notice that the file has been replaced with another one.
+SIGNATURE_SIZE = 4096
+# Number of decompressed blocks of a capture kept in memory.
+CACHED_BLOCKS = 8
+# Colour of the sent data in the viewed captures, same as in the console.
+OUT_COLOUR = (0,0,255)
+
+# Index file header: magic, size of the indexed part of the file, signature of
+# the file, and the number of items in every array that follows.
+_INDEX_HEADER = struct.Struct('<8sQI3Q')
+_LINE_INDEX_MAGIC = b'SMLIDX1\x00'
+_CAPTURE_INDEX_MAGIC = b'SMCIDX1\x00'
+
+def openIndex(fileName, indexFileName=None):
+	""" Index a capture or a text log, depending on what the file is.
+
+	Arguments
+	---------
+		fileName (string) - path to the file.
+
+	Optional
+	---------
+		indexFileName (string, default None) - where to save the index,
+			fileName+INDEX_SUFFIX if None.
+
+	Returns
+	---------
+		(CaptureIndex or LineIndex) - the index of the file.
+	"""
+	if capture.isCapture(fileName):
+		return CaptureIndex(fileName, indexFileName)
+	return LineIndex(fileName, indexFileName)
+
+class _MappedFileIndex(object):
+	""" Common parts of LineIndex and CaptureIndex: mapping the file, and
+	loading and saving the index file. Subclasses implement `_scan` and
+	`__getitem__`, and set `_MAGIC`. Looks like a ScrollbackBuffer to a
+	VirtualConsole. """
+
+	_MAGIC = None
+
+	def __init__(self, fileName, indexFileName=None):
+		self.fileName = fileName
+		self.indexFileName = fileName+INDEX_SUFFIX if indexFileName is None else indexFileName
+		self.firstLineNumber = 0 # Lines are never dropped, see ScrollbackBuffer.
+		self.indexedSize = 0 # Number of bytes of the file that have been indexed.
+		self._indexSignature = 0 # See _signature.
+
+		self._file = open(fileName, 'rb')
+		self._map = None
+		self._mapFile()
+		if not self._loadIndex():
+			self._reset()
+		self.refresh()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, excType, excValue, traceback):
+		self.close()
+
+	def __getitem__(self, index):
+		""" Return the text runs of a line as a list of (text, colour) tuples. """
+		raise NotImplementedError
+
+	def getText(self, index):
+		""" Return the text of a line, including the '\\n'. """
+		return ''.join(text for text, colour in self[index])
+
+	def refresh(self):
+		""" Index whatever has been added to the file since it was last indexed.
+
+		Returns
+		---------
+			(bool) - whether there were any new data.
+		"""
+		size = os.fstat(self._file.fileno()).st_size
+		if size < self.indexedSize or self._signature(self.indexedSize) != self._indexSignature:
+			# Not the file that's been indexed, start again.
+			self._mapFile()
+			self._reset()
+		if size == self.indexedSize:
+			return False
+		self._mapFile()
+		self._scan(size)
+		self._indexSignature = self._signature(self.indexedSize)
+		self._saveIndex()
+		return True
+
+	def close(self):
+		""" Unmap and close the file. """
+		if self._map is not None:
+			self._map.close()
+			self._map = None
+		self._file.close()
+
+	def _mapFile(self):
+		""" Map the whole file into memory, again if it's grown. """
+		if self._map is not None:
+			self._map.close()
+			self._map = None
+		if os.fstat(self._file.fileno()).st_size > 0: # Empty files can't be mapped.
+			self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+	def _signature(self, length):
+		""" CRC-32 of the first SIGNATURE_SIZE bytes of the file, or of its
+		first `length` bytes if it's shorter, so that appending to the file
+		doesn't change the signature of its indexed part. """
+		if self._map is None:
+			return 0
+		return zlib.crc32(self._map[:min(SIGNATURE_SIZE, length)])
+
+	def _arrays(self):
+		""" The arrays saved in the index file, in order. """
+		raise NotImplementedError
+
+	def _extra(self):
+		""" Anything else to save in the index file, as JSON, or None. """
+		return None
+
+	def _setExtra(self, extra):
+		""" Restore what `_extra` returned. """
+		pass
+
+	def _reset(self):
+		""" Forget the index, so that the file gets scanned from the start. """
+		raise NotImplementedError
+
+	def _scan(self, size):
+		""" Index the file from indexedSize up to size. """
+		raise NotImplementedError
+
+	def _loadIndex(self):
+		""" Load the index file if it's for this file. Return True if loaded. """
+		try:
+			with open(self.indexFileName, 'rb') as indexFile:
+				header = indexFile.read(_INDEX_HEADER.size)
+				magic, indexedSize, signature, *sizes = _INDEX_HEADER.unpack(header)
+				if magic != self._MAGIC or indexedSize > os.fstat(self._file.fileno()).st_size:
+					return False
+				if signature != self._signature(indexedSize):
+					return False
+				self._reset()
+				for indexArray, size in zip(self._arrays(), sizes):
+					indexArray.fromfile(indexFile, size)
+				extra = indexFile.read()
+				if len(extra) > 0:
+					self._setExtra(json.loads(extra.decode('utf-8')))
+		except (OSError, EOFError, ValueError, struct.error):
+			return False
+		self.indexedSize = indexedSize
+		self._indexSignature = signature
+		return True
+
+	def _saveIndex(self):
+		""" Save the index next to the file, if possible. """
+		arrays = list(self._arrays())
+		sizes = [len(a) for a in arrays] + [0]*(3-len(arrays))
+		try:
+			with open(self.indexFileName, 'wb') as indexFile:
+				indexFile.write(_INDEX_HEADER.pack(self._MAGIC, self.indexedSize,
+					self._indexSignature, *sizes))
+				for indexArray in arrays:
+					indexArray.tofile(indexFile)
+				extra = self._extra()
+				if extra is not None:
+					indexFile.write(json.dumps(extra).encode('utf-8'))
+		except OSError:
+			pass # E.g. a read-only directory, the index will be built again next time.
+
+class LineIndex(_MappedFileIndex):
+	""" Lines of a text file, e.g. a log file, which are only read from the
+	disk when they're needed.
+
+	The offsets of the first byte of every line are kept in an array('Q'),
+	i.e. 8 bytes per line. They're found by splitting the file into lines in
+	SCAN_CHUNK_SIZE chunks, which happens at the speed of the disk.
+
+	Arguments
+	---------
+		fileName (string) - path to the file.
+
+	Optional
+	---------
+		indexFileName (string, default None) - where to save the index,
+			fileName+INDEX_SUFFIX if None.
+		encoding (string, default 'utf-8') - encoding of the file, invalid
+			characters are replaced.
+	"""
+
+	_MAGIC = _LINE_INDEX_MAGIC
+
+	def __init__(self, fileName, indexFileName=None, encoding='utf-8'):
+		self.encoding = encoding
+		self.offsets = array('Q') # Offset of the start of every line.
+		_MappedFileIndex.__init__(self, fileName, indexFileName)
+
+	def __len__(self):
+		if len(self.offsets) > 0 and self.offsets[-1] == self.indexedSize:
+			return len(self.offsets)-1 # The file ends with '\n'.
+		return len(self.offsets)
+
+	def __getitem__(self, index):
+		return [(self.getText(index), (0,0,0))]
+
+	def getText(self, index):
+		""" Return the text of a line, with '\\n' at the end. """
+		if index < 0:
+			index += len(self)
+		if index < 0 or index >= len(self):
+			raise IndexError('Line {} out of range.'.format(index))
+		end = self.offsets[index+1] if index+1 < len(self.offsets) else self.indexedSize
+		line = self._map[self.offsets[index]:end].rstrip(b'\r\n')
+		return line.decode(self.encoding, errors='replace')+'\n'
+
+	def _arrays(self):
+		return [self.offsets]
+
+	def _reset(self):
+		self.offsets = array('Q')
+		self.indexedSize = 0
+
+	def _scan(self, size):
+		""" Add the offsets of the lines that start after every '\\n'. """
+		if len(self.offsets) == 0:
+			self.offsets.append(0)
+		position = self.indexedSize
+		while position < size:
+			end = min(position+SCAN_CHUNK_SIZE, size)
+			# Every piece but the last one ends with a '\n', after which the
+			# next line starts. Add the lengths up without a Python loop.
+			pieces = self._map[position:end].split(b'\n')
+			lengths = map(operator.add, map(len, pieces[:-1]), itertools.repeat(1))
+			self.offsets.extend(itertools.islice(itertools.accumulate(lengths,
+				initial=position), 1, None))
+			position = end
+		self.indexedSize = size
+
+class CaptureIndex(_MappedFileIndex):
+	""" Records of a capture file, see `capture`, shown one per line, which are
+	only decompressed when they're needed.
+
+	The offsets of the blocks and the number of the first record of every
+	block are kept in arrays, together with the names of the ports at the start
+	of every block. The records of the last few blocks that have been looked at
+	are kept in memory.
+
+	Arguments
+	---------
+		fileName (string) - path to the capture file.
+
+	Optional
+	---------
+		indexFileName (string, default None) - where to save the index,
+			fileName+INDEX_SUFFIX if None.
+	"""
+
+	_MAGIC = _CAPTURE_INDEX_MAGIC
+
+	def __init__(self, fileName, indexFileName=None):
+		self.blockOffsets = array('Q') # Offset of every block.
+		self.firstRecords = array('Q') # Number of the first record of every block.
+		self.blockStates = array('Q') # Index of the state at the start of every block.
+		# [wall clock offset, {port id: port name}] at the start of the blocks.
+		self.states = []
+		self.noRecords = 0
+		self.truncated = False # Whether the file ends with an incomplete block.
+		self._cache = collections.OrderedDict() # Block number: records.
+		_MappedFileIndex.__init__(self, fileName, indexFileName)
+
+	def __len__(self):
+		return self.noRecords
+
+	def __getitem__(self, index):
+		if index < 0:
+			index += self.noRecords
+		if index < 0 or index >= self.noRecords:
+			raise IndexError('Record {} out of range.'.format(index))
+		blockNumber = bisect.bisect_right(self.firstRecords, index)-1
+		records = self._records(blockNumber)
+		record, wallClockOffset = records[index-self.firstRecords[blockNumber]]
+		timestamp, port, direction, dataStr = record
+
+		if wallClockOffset is None:
+			when = '{:.6f}'.format(timestamp)
+		else:
+			wallTime = wallClockOffset+timestamp
+			when = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(wallTime)) \
+				+ '.{:06d}'.format(int(wallTime%1*1e6))
+		text = commsInterface.sanitiseOutput(dataStr.decode('latin-1').rstrip('\r\n'))
+		colour = OUT_COLOUR if direction == 'OUT' else (0,0,0)
+		return [('{} {} {}: {}\n'.format(when, port, direction, text), colour)]
+
+	def _records(self, blockNumber):
+		""" Return the IN and OUT records of a block as (CaptureRecord, wall
+		clock offset or None if unknown) tuples. """
+		if blockNumber in self._cache:
+			self._cache.move_to_end(blockNumber)
+			return self._cache[blockNumber]
+
+		wallClockOffset, portNames = self.states[self.blockStates[blockNumber]]
+		portNames = dict(portNames)
+		records = []
+		for timestamp, portId, kind, dataStr in capture.parseRecords(self._readBlock(
+				self.blockOffsets[blockNumber])[1]):
+			if kind in capture.DIRECTIONS:
+				records.append((capture.CaptureRecord(timestamp, portNames.get(portId,
+					str(portId)), capture.DIRECTIONS[kind], dataStr), wallClockOffset))
+			elif kind == capture.PORT:
+				portNames[portId] = dataStr.decode('utf-8')
+			elif kind == capture.SYNC:
+				portNames = {}
+				wallClockOffset = capture.wallClockOffset(timestamp, dataStr)
+
+		self._cache[blockNumber] = records
+		if len(self._cache) > CACHED_BLOCKS:
+			self._cache.popitem(last=False)
+		return records
+
+	def _readBlock(self, offset):
+		""" Return the size of the block at offset in the file and its records,
+		or None if it's incomplete. """
+		header = self._map[offset:offset+capture.BLOCK_HEADER.size]
+		if len(header) < capture.BLOCK_HEADER.size:
+			return None
+		compression, storedSize, rawSize, crc = capture.BLOCK_HEADER.unpack(header)
+		start = offset+capture.BLOCK_HEADER.size
+		if start+storedSize > len(self._map):
+			return None
+		stored = self._map[start:start+storedSize]
+		if zlib.crc32(stored) != crc:
+			raise ValueError('Corrupted block at byte {} of {}.'.format(offset, self.fileName))
+		return capture.BLOCK_HEADER.size+storedSize, capture.decompressBlock(compression,
+			stored, rawSize)
+
+	def _arrays(self):
+		return [self.blockOffsets, self.firstRecords, self.blockStates]
+
+	def _extra(self):
+		# JSON only has string keys.
+		return {'states': [[offset, sorted(names.items())] for offset, names in self.states],
+			'noRecords': self.noRecords}
+
+	def _setExtra(self, extra):
+		self.states = [[offset, dict(names)] for offset, names in extra['states']]
+		self.noRecords = extra['noRecords']
+
+	def _reset(self):
+		self.blockOffsets = array('Q')
+		self.firstRecords = array('Q')
+		self.blockStates = array('Q')
+		self.states = [[None, {}]] # The state at the end is always the last one.
+		self.noRecords = 0
+		self.indexedSize = 0
+		self._cache.clear()
+
+	def _scan(self, size):
+		""" Index the complete blocks that follow the indexed ones. """
+		position = self.indexedSize
+		if position == 0: # Skip the file header, checked by capture.isCapture.
+			position = capture.FILE_HEADER.size
+		wallClockOffset, portNames = self.states[-1][0], dict(self.states[-1][1])
+
+		self.truncated = False
+		while position < size:
+			block = self._readBlock(position)
+			if block is None:
+				self.truncated = True
+				break
+			blockSize, records = block
+			if [wallClockOffset, portNames] != self.states[-1]:
+				self.states.append([wallClockOffset, dict(portNames)])
+			self.blockOffsets.append(position)
+			self.firstRecords.append(self.noRecords)
+			self.blockStates.append(len(self.states)-1)
+
+			for timestamp, portId, kind, dataStr in capture.parseRecords(records):
+				if kind in capture.DIRECTIONS:
+					self.noRecords += 1
+				elif kind == capture.PORT:
+					portNames[portId] = dataStr.decode('utf-8')
+				elif kind == capture.SYNC:
+					portNames = {}
+					wallClockOffset = capture.wallClockOffset(timestamp, dataStr)
+			position += blockSize
+
+		if [wallClockOffset, portNames] != self.states[-1]:
+			self.states.append([wallClockOffset, dict(portNames)])
+		self.indexedSize = position
@@ -0,0 +1,237 @@
+#!/bin/env/python3
+""" Cached list of the serial ports available on this machine, which is kept up
+to date in the background instead of rescanning all the ports when needed.
+"""
+import serial.tools.list_ports
+import sys
+import os
+import fnmatch
+import select
+import struct
+import threading
+
+# How often, in seconds, the ports are looked up when inotify isn't available.
+POLL_INTERVAL = 2.
+
+# Names of the Linux devices reported by serial.tools.list_ports.
+_LINUX_PORT_PATTERNS = ('ttyS*', 'ttyUSB*', 'ttyXRUSB*', 'ttyACM*', 'ttyAMA*',
+	'rfcomm*', 'ttyAP*')
+
+# inotify constants from <sys/inotify.h>.
+_IN_ATTRIB = 0x00000004
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_EVENT = struct.Struct('iIII') # wd, mask, cookie, len, followed by the name.
+
+def getIdentity(portInfo):
+	""" Return what identifies the hardware behind a port even if it's given
+	another name after being plugged in again.
+
+	Arguments
+	---------
+		portInfo (serial.tools.list_ports_common.ListPortInfo) - port details.
+
+	Returns
+	---------
+		(tuple) - (VID, PID, serial number) for USB devices that have a serial
+			number, (VID, PID, USB location) for ones that don't, and the device
+			name otherwise.
+	"""
+	if portInfo.vid is not None:
+		if portInfo.serial_number:
+			return (portInfo.vid, portInfo.pid, portInfo.serial_number)
+		elif portInfo.location:
+			return (portInfo.vid, portInfo.pid, portInfo.location)
+	return (portInfo.device,)
+
+class PortInventory(threading.Thread):
+	""" Thread that keeps track of the available serial ports and their details,
+	like the VID, PID, serial number and description.
+
+	The ports are first listed with serial.tools.list_ports. Then, on Linux,
+	only the devices created in or removed from /dev are looked up, as soon as
+	inotify reports them. If inotify can't be used, /sys/class/tty is polled
+	instead, which is also cheap because only new devices are looked up. On
+	other platforms, the ports are listed again every `pollInterval`.
+
+	Optional
+	---------
+		notify (callable, default None) - called from this thread with two lists
+			of device names, (added, removed), every time the ports change.
+		pollInterval (float, default POLL_INTERVAL) - seconds between looking
+			up the ports when inotify isn't available.
+	"""
+
+	def __init__(self, notify=None, pollInterval=POLL_INTERVAL):
+		threading.Thread.__init__(self, name='PortInventory')
+		self.daemon = True # Don't prevent the program from exiting.
+
+		self.notify = notify
+		self.pollInterval = pollInterval
+		self.usingInotify = False # Whether changes are picked up by inotify.
+
+		self._lock = threading.Lock()
+		self._ports = {} # Device name: ListPortInfo.
+		self._stopEvent = threading.Event()
+		self._wakeUpFds = os.pipe() # Interrupts waiting for inotify events.
+		self.refresh(notify=False)
+
+	def getPorts(self):
+		""" Return the sorted names of the available ports. """
+		with self._lock:
+			return sorted(self._ports)
+
+	def getPortInfo(self, device):
+		""" Return the details of the given port, or None if it isn't available. """
+		with self._lock:
+			return self._ports.get(device)
+
+	def getIdentity(self, device):
+		""" Return the identity of the given port, see `getIdentity`, or None if
+		the port isn't available. """
+		portInfo = self.getPortInfo(device)
+		if portInfo is None:
+			return None
+		return getIdentity(portInfo)
+
+	def findByIdentity(self, identity):
+		""" Return the name of the port with the given identity, e.g. of a USB
+		adapter that has been plugged in again, or None if there's no such port. """
+		with self._lock:
+			for device, portInfo in self._ports.items():
+				if getIdentity(portInfo) == identity:
+					return device
+		return None
+
+	def refresh(self, notify=True):
+		""" List all the ports again, e.g. when the user asks for it.
+
+		Optional
+		---------
+			notify (bool, default True) - whether to call `notify` if anything
+				has changed.
+		"""
+		self._update({p.device: p for p in serial.tools.list_ports.comports()},
+			notify=notify)
+
+	def run(self):
+		""" Keep the ports up to date until stopped. """
+		if sys.platform.startswith('linux'):
+			try:
+				self._watchDev()
+			except OSError:
+				self._pollSysfs()
+		else:
+			while not self._stopEvent.wait(self.pollInterval):
+				self.refresh()
+
+	def stop(self, timeout=None):
+		""" Stop looking for changes and wait for the thread to finish.
+
+		Optional
+		---------
+			timeout (float, default None) - how long to wait for the thread to
+				finish, in seconds. Wait indefinitely if None.
+		"""
+		if self._stopEvent.is_set(): # Already stopped.
+			return
+		self._stopEvent.set()
+		os.write(self._wakeUpFds[1], b'x')
+		if self.is_alive():
+			self.join(timeout)
+		if not self.is_alive():
+			for fd in self._wakeUpFds:
+				os.close(fd)
+
+	def _update(self, ports, notify=True):
+		""" Replace the known ports with `ports` and notify about the changes. """
+		with self._lock:
+			added = sorted(set(ports) - set(self._ports))
+			removed = sorted(set(self._ports) - set(ports))
+			self._ports = ports
+		if notify and (added or removed) and self.notify is not None:
+			self.notify(added, removed)
+
+	def _updateDevices(self, names):
+		""" Look up the Linux devices with the given names in /dev and add,
+		update or remove them, as needed. """
+		from serial.tools.list_ports_linux import SysFS
+		with self._lock:
+			ports = dict(self._ports)
+		for name in names:
+			device = os.path.join('/dev', name)
+			ports.pop(device, None)
+			if os.path.exists(device):
+				portInfo = SysFS(device)
+				if portInfo.subsystem != 'platform': # Not a non-present internal port.
+					ports[device] = portInfo
+		self._update(ports)
+
+	def _watchDev(self):
+		""" Update the ports whenever a matching device is created in or
+		removed from /dev. Raises OSError if inotify isn't available. """
+		import ctypes, ctypes.util
+		libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+		try:
+			inotifyFd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+		except AttributeError: # libc without inotify.
+			raise OSError('inotify not available')
+		if inotifyFd < 0:
+			raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+
+		try:
+			mask = _IN_CREATE | _IN_DELETE | _IN_ATTRIB | _IN_MOVED_FROM | _IN_MOVED_TO
+			if libc.inotify_add_watch(inotifyFd, b'/dev', mask) < 0:
+				raise OSError(ctypes.get_errno(), 'inotify_add_watch failed')
+			self.usingInotify = True
+			# Devices might have changed since the ports were listed.
+			self.refresh()
+
+			while not self._stopEvent.is_set():
+				readable = select.select([inotifyFd, self._wakeUpFds[0]], [], [])[0]
+				if inotifyFd not in readable:
+					continue
+				try:
+					data = os.read(inotifyFd, 65536)
+				except BlockingIOError:
+					continue
+
+				# Many events about the same device are common, look it up once.
+				names = set()
+				offset = 0
+				while offset < len(data):
+					wd, eventMask, cookie, length = _IN_EVENT.unpack_from(data, offset)
+					offset += _IN_EVENT.size
+					name = data[offset:offset+length].rstrip(b'\0').decode('utf-8', 'replace')
+					offset += length
+					if any(fnmatch.fnmatchcase(name, p) for p in _LINUX_PORT_PATTERNS):
+						names.add(name)
+				if names:
+					self._updateDevices(names)
+		finally:
+			self.usingInotify = False
+			os.close(inotifyFd)
+
+	def _pollSysfs(self):
+		""" Look up the ports every `pollInterval` using /sys/class/tty, only
+		getting the details of the devices that have appeared or disappeared. """
+		# Devices that match the names but aren't ports, e.g. non-present
+		# internal ones, so that they aren't looked up every time.
+		ignoredNames = set()
+		while not self._stopEvent.wait(self.pollInterval):
+			try:
+				names = set(n for n in os.listdir('/sys/class/tty')
+					if any(fnmatch.fnmatchcase(n, p) for p in _LINUX_PORT_PATTERNS))
+			except OSError:
+				self.refresh()
+				continue
+
+			ignoredNames &= names
+			known = set(os.path.basename(d) for d in self.getPorts())
+			changed = (names - known - ignoredNames) | (known - names)
+			if changed:
+				self._updateDevices(changed)
+				known = set(os.path.basename(d) for d in self.getPorts())
+				ignoredNames |= (changed & names) - known
@@ -0,0 +1,163 @@
+#!/bin/env/python3
+""" Everything needed to monitor one serial port, so that many ports can be
+monitored by one program.
+"""
+import logging
+import queue
+import threading
+import time
+
+import SerialMonitor.capture as capture
+import SerialMonitor.commsInterface as commsInterface
+
+class PortSession(object):
+	""" One monitored serial port: the port itself, the state of decoding the
+	bytes it receives, and the logger for its data.
+
+	The port is read by a shared `commsInterface.ReaderPool`, which calls `feed`
+	from its thread. The decoded outputs are queued until the consumer collects
+	them with `getOutputs`, like with a `commsInterface.PortReader`.
+
+	Arguments
+	---------
+		port (serial.SerialBase) - instance of an open port interface.
+		outputFormat (string) - chosen formatting type, must be one of
+			['formatted', 'raw', 'hex']. Can be changed while the port is read.
+
+	Optional
+	---------
+		logger (logging.Logger, default None) - logger for the data sent and
+			received. A child of the "SMLog" logger named after the port if None,
+			so that the data end up wherever the application logs to.
+		notify (callable, default None) - function without arguments called
+			when new outputs are waiting to be collected, or when the port is no
+			longer read. Called from the reader thread.
+	"""
+
+	def __init__(self, port, outputFormat, logger=None, notify=None):
+		if outputFormat not in ['formatted', 'raw', 'hex']:
+			raise ValueError("Requested output format {} not supported.".format(outputFormat))
+
+		self.port = port
+		self.outputFormat = outputFormat
+		self.outputBuffer = commsInterface.LineFramer()
+		# Counts the signs of lost data, with as large a driver buffer as possible.
+		self.overflowMonitor = commsInterface.OverflowMonitor(port,
+			commsInterface.setBufferSize(port))
+		if logger is None:
+			logger = logging.getLogger("SMLog.{}".format(port.name))
+		self.logger = logger
+		self.notify = notify
+		self.pool = None # ReaderPool reading the port, if any.
+		self.captureWriter = None # capture.CaptureWriter recording the raw data, if any.
+
+		self.outputQueue = queue.Queue() # Holds (output, warningSummary) tuples.
+		self.alive = False # Whether the port is being read.
+		self.error = None # Exception that stopped the reading, if any.
+		self.lastActivity = time.monotonic() # When data were last received.
+		self.noWaiting = 0 # Bytes the reader last saw waiting in the input buffer.
+
+		self._notified = threading.Event() # Set while a notification is pending.
+
+	@property
+	def name(self):
+		""" Name of the port. """
+		return self.port.name
+
+	def start(self, pool):
+		""" Start reading the port with the given pool.
+
+		Arguments
+		---------
+			pool (commsInterface.ReaderPool) - running pool that will read the port.
+		"""
+		self.pool = pool
+		self.alive = True
+		self.error = None
+		pool.add(self)
+
+	def stop(self, timeout=None):
+		""" Stop reading the port. Afterwards, the port can be closed.
+
+		Optional
+		---------
+			timeout (float, default None) - longest time to wait for the port
+				to no longer be read, in seconds. Wait indefinitely if None.
+		"""
+		if self.pool is not None:
+			self.pool.remove(self, timeout)
+			self.pool = None
+		self.alive = False
+
+	def write(self, msg):
+		""" Send a message to the port and log it.
+
+		Arguments
+		---------
+			msg (string) - message to send, encoded with UTF-8.
+		"""
+		dataStr = msg.encode('utf-8')
+		self.port.write(dataStr)
+		if self.captureWriter is not None:
+			self.captureWriter.write(self.name, capture.OUT, dataStr)
+		self.logger.info(r'OUT: {}'.format(msg))
+
+	def feed(self, dataStr, noWaiting=0):
+		""" Decode the bytes received by the port and queue them for the
+		consumer. Called by the reader pool.
+
+		Arguments
+		---------
+			dataStr (bytes) - bytes read from the port.
+
+		Optional
+		---------
+			noWaiting (int, default 0) - number of bytes still waiting to be
+				read, if the reader knows it.
+		"""
+		self.lastActivity = time.monotonic()
+		self.noWaiting = noWaiting
+		if self.captureWriter is not None:
+			self.captureWriter.write(self.name, capture.IN, dataStr, self.lastActivity)
+		# outputBuffer is only ever touched by the reader thread.
+		output, self.outputBuffer, warningSummary = commsInterface.decodeOutput(
+			dataStr, self.outputBuffer, self.outputFormat)
+		warningSummary.update(self.overflowMonitor.check(len(dataStr), noWaiting))
+		self.outputQueue.put((output, warningSummary))
+		self._postNotification()
+
+	def close(self, error):
+		""" The port is no longer read. Called by the reader pool.
+
+		Arguments
+		---------
+			error (Exception) - what stopped the reading, None if the session
+				has been removed from the pool.
+		"""
+		if error is not None:
+			self.error = error
+		self.alive = False
+		self._postNotification() # Let the consumer know that we've stopped.
+
+	def getOutputs(self):
+		""" Collect all the outputs decoded since the last call.
+
+		Returns
+		---------
+			(list) - (string, dict) tuples with the formatted output and the
+				summary of warnings of every chunk read from the port.
+		"""
+		self._notified.clear()
+		outputs = []
+		while True:
+			try:
+				outputs.append(self.outputQueue.get_nowait())
+			except queue.Empty:
+				break
+		return outputs
+
+	def _postNotification(self):
+		""" Notify the consumer unless there already is a pending notification. """
+		if self.notify is not None and not self._notified.is_set():
+			self._notified.set()
+			self.notify()
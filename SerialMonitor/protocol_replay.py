@@ -0,0 +1,5 @@
+#!/bin/env/python3
+""" Handler of replay:// URLs for serial.serial_for_url, which finds it because
+SerialMonitor is in serial.protocol_handler_packages. See SerialMonitor.replay.
+"""
+from SerialMonitor.replay import ReplaySerial as Serial
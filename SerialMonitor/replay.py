@@ -0,0 +1,227 @@
+#!/bin/env/python3
+""" Play back the data received by a port, recorded in a capture file (see
+SerialMonitor.capture), through a port interface that can be used instead of
+a real port, e.g. by `commsInterface.grabPortOutput` or a `PortSession`. This
+reproduces what a device sent, when it sent it, without the device.
+
+The data can be played back with their original timing, `speed` times faster,
+or as fast as they can be read (speed None), which measures how quickly the
+rest of the program can process them.
+
+Example
+---------
+	port = ReplaySerial('session.smcap', speed=10., timeout=0.1)
+	# Or, anywhere a port URL can be given, e.g. serialMonitor --headless --port
+	port = serial.serial_for_url('replay://session.smcap?speed=10', timeout=0.1)
+"""
+import threading
+import time
+import urllib.parse
+
+import serial
+
+import SerialMonitor.capture as capture
+
+# Largest number of bytes held in the input buffer. Records due to be played
+# back wait in the capture until there's room for them, like data waiting in
+# the device, so that replaying fast doesn't read the whole file into memory.
+REPLAY_BUFFER_SIZE = 65536
+
+class ReplaySerial(serial.SerialBase):
+	""" Serial port interface that receives the data recorded in a capture file.
+
+	The capture starts playing when the port is opened. Data written to the port
+	aren't sent anywhere, only counted in `bytesWritten`. Once all the data have
+	been played back, the port stays open and receives nothing, like an idle
+	device, unless `disconnectAtEnd` is set.
+
+	Arguments
+	---------
+		port (string) - path to the capture file, or a URL like
+			replay://session.smcap?speed=10&port=/dev/ttyACM0&disconnect
+			where the parameters set the optional arguments below, and speed
+			can be 'max' to play back as fast as possible. The port is opened
+			straight away if given.
+
+	Optional
+	---------
+		speed (float, default 1) - how many times faster than recorded to play
+			back, as fast as possible if None or 0.
+		portName (string, default None) - port whose data to play back, if the
+			capture has more than one. The first port that received something
+			if None.
+		disconnectAtEnd (bool, default False) - whether reading should raise a
+			serial.SerialException once everything has been played back and
+			read, like when a device is unplugged.
+		Other keyword arguments are the same as of serial.Serial, e.g. timeout.
+	"""
+
+	def __init__(self, *args, speed=1., portName=None, disconnectAtEnd=False, **kwargs):
+		self.speed = speed
+		self.portName = portName
+		self.disconnectAtEnd = disconnectAtEnd
+		self.bytesWritten = 0 # Sent to the port, and ignored.
+		self._records = None # Generator of (due time, data) of the records to play.
+		self._nextRecord = None # Next (due time, data) not yet in the buffer.
+		self._buffer = bytearray() # Played back and not yet read.
+		self._finished = False # Whether all the records have been played back.
+		self._start = 0. # time.monotonic() when playing started.
+		self._cancelRead = threading.Event()
+		serial.SerialBase.__init__(self, *args, **kwargs)
+
+	def open(self):
+		""" Open the capture and start playing it back. """
+		if self._port is None:
+			raise serial.SerialException('Port must be configured before it can be used.')
+		if self.is_open:
+			raise serial.SerialException('Port is already open.')
+		fileName = self.from_url(self._port)
+		try:
+			if not capture.isCapture(fileName):
+				raise ValueError('{} is not a capture file.'.format(fileName))
+		except (OSError, ValueError) as err:
+			raise serial.SerialException('Could not open {}: {}'.format(fileName, err))
+		self._records = self._playback(capture.CaptureReader(fileName))
+		self._nextRecord = None
+		self._buffer = bytearray()
+		self._finished = False
+		self._start = time.monotonic()
+		self.is_open = True
+
+	def close(self):
+		""" Stop playing back. """
+		self.is_open = False
+		if self._records is not None:
+			self._records.close()
+			self._records = None
+		self.cancel_read()
+
+	def from_url(self, url):
+		""" Set the options given in a replay:// URL and return the path to the
+		capture. Plain paths are returned as they are. """
+		if not url.lower().startswith('replay://'):
+			return url
+		parts = urllib.parse.urlsplit(url)
+		for option, values in urllib.parse.parse_qs(parts.query, keep_blank_values=True).items():
+			if option == 'speed':
+				try:
+					self.speed = None if values[0] == 'max' else float(values[0])
+				except ValueError:
+					raise serial.SerialException('Invalid speed {!r} in {}.'.format(values[0], url))
+			elif option == 'port':
+				self.portName = values[0]
+			elif option == 'disconnect':
+				self.disconnectAtEnd = values[0].lower() not in ['0', 'false', 'no']
+			else:
+				raise serial.SerialException('Unknown option {!r} in {}.'.format(option, url))
+		return urllib.parse.unquote(parts.netloc+parts.path)
+
+	def _reconfigure_port(self):
+		""" Nothing to configure, the baud rate etc. don't change the playback. """
+		pass
+
+	@property
+	def in_waiting(self):
+		""" Number of bytes played back and not yet read. """
+		self._checkOpen()
+		self._play()
+		return len(self._buffer)
+
+	@property
+	def finished(self):
+		""" Whether all the data in the capture have been played back. """
+		return self._finished
+
+	def read(self, size=1):
+		""" Read up to `size` bytes, waiting for them for at most `timeout`
+		seconds, or until enough have been played back if timeout is None. Returns
+		fewer bytes once the capture has finished, and waits for `timeout` like
+		an idle port when there's nothing left to read. """
+		self._checkOpen()
+		self._cancelRead.clear()
+		deadline = None if self.timeout is None else time.monotonic()+self.timeout
+		while True:
+			untilNext = self._play()
+			# A full buffer won't take more, return what's in it.
+			if (len(self._buffer) >= min(size, REPLAY_BUFFER_SIZE) or self._cancelRead.is_set()
+					or (self._finished and (len(self._buffer) > 0 or self.disconnectAtEnd))):
+				break
+			wait = None if untilNext == float('inf') else untilNext
+			if deadline is not None:
+				remaining = deadline-time.monotonic()
+				if remaining <= 0:
+					break
+				wait = remaining if wait is None else min(wait, remaining)
+			self._cancelRead.wait(wait)
+		dataStr = bytes(self._buffer[:size])
+		del self._buffer[:size]
+		return dataStr
+
+	def write(self, data):
+		""" Pretend to send the data, nothing receives them. """
+		self._checkOpen()
+		self.bytesWritten += len(data)
+		return len(data)
+
+	def cancel_read(self):
+		""" Stop a read that's waiting for data, from another thread. """
+		self._cancelRead.set()
+
+	def reset_input_buffer(self):
+		""" Discard what's been played back and not yet read. """
+		self._checkOpen()
+		self._play()
+		self._buffer = bytearray()
+
+	def reset_output_buffer(self):
+		""" Nothing is waiting to be sent. """
+		self._checkOpen()
+
+	@property
+	def out_waiting(self):
+		""" Nothing is waiting to be sent. """
+		return 0
+
+	def _checkOpen(self):
+		""" Raise a serial.SerialException if the port can't be used. """
+		if not self.is_open:
+			raise serial.SerialException('Attempting to use a port that is not open.')
+		if self.disconnectAtEnd and self._finished and len(self._buffer) == 0:
+			raise serial.SerialException('Replay of {} finished.'.format(self.name))
+
+	def _play(self):
+		""" Move the records that are due into the buffer, as far as it has room.
+		Return the time in seconds until the next record is due. """
+		now = time.monotonic()-self._start
+		while not self._finished and len(self._buffer) < REPLAY_BUFFER_SIZE:
+			if self._nextRecord is None:
+				self._nextRecord = next(self._records, None)
+				if self._nextRecord is None:
+					self._finished = True
+					break
+			due, dataStr = self._nextRecord
+			if due > now:
+				return due-now
+			self._buffer += dataStr
+			self._nextRecord = None
+		return 0. if len(self._buffer) >= REPLAY_BUFFER_SIZE else float('inf')
+
+	def _playback(self, reader):
+		""" Yield the due times, in seconds since opening, and the data of the
+		records to play back. """
+		previous = None
+		due = 0.
+		for record in reader:
+			if record.direction != 'IN':
+				continue
+			if self.portName is None:
+				self.portName = record.port
+			elif record.port != self.portName:
+				continue
+			if previous is None:
+				previous = record.timestamp
+			if self.speed:
+				# Appended captures restart the clock, don't go back in time.
+				due += max(0., record.timestamp-previous)/self.speed
+			previous = record.timestamp
+			yield due, record.data
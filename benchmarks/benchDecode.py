@@ -0,0 +1,72 @@
+#!/usr/bin/python3
+""" Measure how fast SerialMonitor.commsInterface.decodeOutput, the decoding
+part of grabPortOutput, turns received bytes into text in every outputFormat.
+The data are typical telemetry lines with a byte outside of the ASCII range in
+one in twenty lines, the worst case for the formatted outputFormat, decoded in
+chunks of a typical OS buffer size. Run from the repository root, e.g.
+
+	PYTHONPATH=. python3 benchmarks/benchDecode.py --size 10
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Throughput benchmark of all the outputFormats.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import argparse, json, random, sys, time
+import SerialMonitor as sm
+
+def generateData(size):
+	""" Return at least `size` bytes of noisy telemetry lines. """
+	random.seed(0) # Make the noise repeatable.
+	line = b'T=123.456,V=3.30,I=0.12,STATUS=OK\n'
+	data = bytearray()
+	while len(data) < size:
+		data += line
+		if random.random() < 0.05:
+			data += bytes([random.randint(128,255)])
+	return bytes(data)
+
+def decodeAll(data, outputFormat, chunkSize):
+	""" Decode `data` in chunks of `chunkSize` bytes.
+
+	Returns
+	---------
+		(float) - time it took in seconds.
+	"""
+	outputBuffer = ''
+	start = time.perf_counter()
+	for i in range(0, len(data), chunkSize):
+		output, outputBuffer, warningSummary = sm.commsInterface.decodeOutput(
+			data[i:i+chunkSize], outputBuffer, outputFormat)
+	return time.perf_counter()-start
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description='Throughput of decoding the '
+		'received bytes in every output format.')
+	parser.add_argument('--size', type=float, default=10.,
+		help='MB of data to decode (default: %(default)s)')
+	parser.add_argument('--chunk-size', type=int, default=4096,
+		help='bytes decoded at once (default: %(default)s)')
+	parser.add_argument('--repeat', type=int, default=3,
+		help='take the best of this many runs (default: %(default)s)')
+	parser.add_argument('--json', metavar='FILE',
+		help='also write the results to this JSON file')
+	args = parser.parse_args(argv)
+
+	data = generateData(int(args.size*1024*1024))
+	results = []
+	for outputFormat in ['formatted', 'raw', 'hex']:
+		best = min(decodeAll(data, outputFormat, args.chunk_size) for i in range(args.repeat))
+		results.append({'format': outputFormat, 'bytes': len(data), 'seconds': best,
+			'megabytesPerSecond': len(data)/best/1024./1024.})
+		print('{:>9}: {:.1f} MB/s'.format(outputFormat, results[-1]['megabytesPerSecond']))
+
+	if args.json is not None:
+		with open(args.json, 'w') as outFile:
+			json.dump(results, outFile, indent=1)
+	return 0
+
+if __name__ == '__main__':
+	sys.exit(main())
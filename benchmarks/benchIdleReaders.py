@@ -0,0 +1,131 @@
+#!/usr/bin/python3
+""" Measure how much CPU it takes to watch many idle ports. Pairs of
+pseudo-terminals stand in for the devices, and nothing is written to them.
+
+Two ways of reading the ports are compared:
+* pool - one SerialMonitor.commsInterface.ReaderPool that selects over all of
+  the ports, as used by the GUI,
+* polling - one thread that asks every port how many bytes are waiting every
+  `--read-delay` ms, like a timer-driven reader would.
+
+The CPU usage of the pool should stay flat, i.e. close to zero, however many
+ports there are, while polling grows with the number of ports. Run from the
+repository root, e.g.
+
+	PYTHONPATH=. python3 benchmarks/benchIdleReaders.py --ports 1 8 64
+
+.. module:: SerialMonitor
+   :platform: Unix
+   :synopsis: Benchmark of reading many idle ports.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import argparse, json, os, sys, threading, time
+import SerialMonitor as sm
+
+class _IdleSession(object):
+	""" Minimal ReaderPool session that only counts what it gets. """
+
+	def __init__(self, port):
+		self.port = port
+		self.noChunks = 0
+
+	def feed(self, dataStr, noWaiting=0):
+		self.noChunks += 1
+
+	def close(self, error):
+		pass
+
+def openPtys(noPorts):
+	""" Open `noPorts` pseudo-terminals.
+
+	Returns
+	---------
+		(list) - (master fd, serial.Serial of the slave end) tuples.
+	"""
+	ptys = []
+	for i in range(noPorts):
+		master, slave = os.openpty()
+		port = sm.serial.Serial(os.ttyname(slave), timeout=0.1)
+		os.close(slave)
+		ptys.append((master, port))
+	return ptys
+
+def closePtys(ptys):
+	""" Close everything opened by `openPtys`. """
+	for master, port in ptys:
+		port.close()
+		os.close(master)
+
+def measureCpu(duration):
+	""" Return the CPU time in seconds used by this process while sleeping for
+	`duration` seconds, i.e. used by the background threads. """
+	start = time.process_time()
+	time.sleep(duration)
+	return time.process_time()-start
+
+def benchPool(ports, duration):
+	""" CPU time used by a ReaderPool reading the idle ports. """
+	pool = sm.commsInterface.ReaderPool(probeInterval=5.)
+	pool.start()
+	sessions = [_IdleSession(port) for port in ports]
+	for session in sessions:
+		pool.add(session)
+	time.sleep(0.1) # Let the pool register the ports.
+	try:
+		return measureCpu(duration)
+	finally:
+		pool.stop(timeout=2)
+
+def benchPolling(ports, duration, readDelay):
+	""" CPU time used by polling the idle ports every `readDelay` seconds. """
+	stopEvent = threading.Event()
+	def poll():
+		while not stopEvent.wait(readDelay):
+			for port in ports:
+				if port.inWaiting() > 0:
+					port.read(port.inWaiting())
+	thread = threading.Thread(target=poll)
+	thread.start()
+	try:
+		return measureCpu(duration)
+	finally:
+		stopEvent.set()
+		thread.join()
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description='CPU used to watch idle ports.')
+	parser.add_argument('--ports', type=int, nargs='+', default=[1, 8, 64],
+		help='numbers of ports to try (default: %(default)s)')
+	parser.add_argument('--duration', type=float, default=5.,
+		help='seconds to measure for (default: %(default)s)')
+	parser.add_argument('--read-delay', type=float, default=10.,
+		help='polling interval in ms (default: %(default)s)')
+	parser.add_argument('--json', metavar='FILE',
+		help='also write the results to this JSON file')
+	args = parser.parse_args(argv)
+
+	results = []
+	print('{:>6} {:>14} {:>14}'.format('ports', 'pool CPU %', 'polling CPU %'))
+	for noPorts in args.ports:
+		ptys = openPtys(noPorts)
+		try:
+			ports = [port for master, port in ptys]
+			pool = benchPool(ports, args.duration)
+			polling = benchPolling(ports, args.duration, args.read_delay/1000.)
+		finally:
+			closePtys(ptys)
+		results.append({'ports': noPorts, 'duration': args.duration,
+			'poolCpuPercent': 100.*pool/args.duration,
+			'pollingCpuPercent': 100.*polling/args.duration})
+		print('{:>6d} {:>14.2f} {:>14.2f}'.format(noPorts, results[-1]['poolCpuPercent'],
+			results[-1]['pollingCpuPercent']))
+
+	if args.json is not None:
+		with open(args.json, 'w') as outFile:
+			json.dump(results, outFile, indent=1)
+	return 0
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -0,0 +1,68 @@
+#!/usr/bin/python3
+""" Measure how long it takes to import SerialMonitor and the modules it
+imports, with python -X importtime in new processes, so that nothing has been
+imported already. Most of the time should be spent importing pySerial, and wx
+shouldn't be imported at all. Run from the repository root, e.g.
+
+	PYTHONPATH=. python3 benchmarks/benchImportTime.py --top 10
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Benchmark of the time it takes to import the package.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import argparse, json, os, subprocess, sys
+
+# Make the package importable by the child processes, also from a raw git clone.
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def measureImport(module):
+	""" Import `module` in a new Python process.
+
+	Returns
+	---------
+		(dict) - cumulative import time in microseconds of every module imported
+			in the process, including `module`.
+	"""
+	env = dict(os.environ)
+	env['PYTHONPATH'] = PACKAGE_DIR + os.pathsep + env.get('PYTHONPATH', '')
+	process = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+		'import {}'.format(module)], env=env, stdout=subprocess.PIPE,
+		stderr=subprocess.PIPE, universal_newlines=True, timeout=60)
+	times = {}
+	for line in process.stderr.splitlines():
+		# import time: self [us] | cumulative | imported package
+		if line.startswith('import time:') and '|' in line:
+			self_, cumulative, name = line[len('import time:'):].split('|')
+			if cumulative.strip().isdigit():
+				times[name.strip()] = int(cumulative)
+	return times
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description='Time it takes to import the package.')
+	parser.add_argument('--module', default='SerialMonitor',
+		help='module to import (default: %(default)s)')
+	parser.add_argument('--repeat', type=int, default=5,
+		help='take the best of this many imports (default: %(default)s)')
+	parser.add_argument('--top', type=int, default=10,
+		help='number of the slowest modules to list (default: %(default)s)')
+	parser.add_argument('--json', metavar='FILE',
+		help='also write the results to this JSON file')
+	args = parser.parse_args(argv)
+
+	runs = [measureImport(args.module) for i in range(args.repeat)]
+	best = min(runs, key=lambda times: times.get(args.module, float('inf')))
+	print('import {}: {:.1f} ms (best of {})'.format(args.module,
+		best.get(args.module, float('nan'))/1000., args.repeat))
+	for name, cumulative in sorted(best.items(), key=lambda item: -item[1])[:args.top]:
+		print('{:>10.1f} ms  {}'.format(cumulative/1000., name))
+
+	if args.json is not None:
+		with open(args.json, 'w') as outFile:
+			json.dump({'module': args.module, 'cumulativeMicroseconds': best}, outFile, indent=1)
+	return 0
+
+if __name__ == '__main__':
+	sys.exit(main())
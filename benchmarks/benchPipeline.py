@@ -0,0 +1,350 @@
+#!/usr/bin/python3
+""" Measure the throughput and latency of every step the received data go
+through, with synthetic streams, so that the results can be compared between
+releases. The steps (stages) are:
+* grab - bytes written to a port by another thread and read with
+  grabPortOutput, over loop:// or a pair of pseudo-terminals (pty),
+* sanitise - sanitiseOutput of the decoded text,
+* textbox - writeToTextBox and flushTextBox of a hidden main frame, which
+  needs wx and a display, and is skipped otherwise,
+* logger - the decoded text logged to a file with fileLogger.AsyncFileLogger.
+
+The streams are made of ASCII text lines, random binary data, or text with
+many control characters, split into chunks of the given sizes. Every
+combination of the chosen stages, distributions, chunk sizes and transports is
+a case, run in its own process so that its peak RSS (resident memory) can be
+told apart. For every case, the throughput in MB/s and the median (p50), 99th
+percentile (p99) and longest latency of the chunks are reported. The latency
+is the time from a chunk being written (grab) or handed to the stage (the
+others) until it's been fully processed. pySerial's loop:// handles the data
+one byte at a time, so it's far slower than a pty and measures mostly itself.
+Run from the repository root, e.g.
+
+	PYTHONPATH=. python3 benchmarks/benchPipeline.py --size 4 --json results.json
+	PYTHONPATH=. python3 benchmarks/benchPipeline.py --stages grab --transports pty \\
+		--distributions binary --chunk-sizes 1 4096
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Benchmark of reading, decoding, displaying and logging data.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import argparse, collections, itertools, json, logging, multiprocessing, os
+import platform, random, sys, tempfile, threading, time
+import SerialMonitor as sm
+
+try:
+	import resource
+except ImportError: # Windows.
+	resource = None
+
+STAGES = ['grab', 'sanitise', 'textbox', 'logger']
+DISTRIBUTIONS = ['ascii', 'binary', 'control']
+TRANSPORTS = ['loop', 'pty']
+# Longest time in seconds to wait for a grab case to receive everything.
+GRAB_TIMEOUT = 120.
+
+# Bytes that aren't shown as they are, used by the control-heavy streams.
+_CONTROL_BYTES = bytes(list(range(0, 32))+list(range(127, 160)))
+_PRINTABLE_BYTES = bytes(range(32, 127))
+
+def generateStream(size, distribution, seed=0):
+	""" Return `size` reproducible bytes.
+
+	Arguments
+	---------
+		size (int) - number of bytes.
+		distribution (string) - one of DISTRIBUTIONS:
+			* ascii - lines of printable characters, 10 to 120 long,
+			* binary - uniformly random bytes,
+			* control - lines where half of the characters are control
+				characters, including the C1 ones (0x80-0x9f).
+
+	Optional
+	---------
+		seed (int, default 0) - seed of the random generator.
+	"""
+	rng = random.Random(seed)
+	if distribution == 'binary':
+		return rng.getrandbits(8*size).to_bytes(size, 'little') if size > 0 else b''
+	elif distribution not in DISTRIBUTIONS:
+		raise ValueError('Distribution {} not supported.'.format(distribution))
+	stream = bytearray()
+	while len(stream) < size:
+		line = rng.choices(_PRINTABLE_BYTES, k=rng.randint(10, 120))
+		if distribution == 'control':
+			for i in rng.sample(range(len(line)), len(line)//2):
+				line[i] = rng.choice(_CONTROL_BYTES)
+		stream += bytes(line)+b'\n'
+	return bytes(stream[:size])
+
+def splitChunks(dataStr, chunkSize, randomChunks=False, seed=0):
+	""" Split the data into chunks of `chunkSize` bytes, or of random sizes
+	between 1 and 2*`chunkSize` bytes if `randomChunks`. """
+	rng = random.Random(seed)
+	chunks = []
+	position = 0
+	while position < len(dataStr):
+		size = rng.randint(1, 2*chunkSize) if randomChunks else chunkSize
+		chunks.append(dataStr[position:position+size])
+		position += size
+	return chunks
+
+def decodeChunks(chunks, outputFormat):
+	""" Return the text decodeOutput makes of every chunk, as the stages after
+	grab get it. """
+	outputBuffer = sm.commsInterface.LineFramer()
+	texts = []
+	for chunk in chunks:
+		output, outputBuffer, warningSummary = sm.commsInterface.decodeOutput(chunk,
+			outputBuffer, outputFormat)
+		texts.append(output)
+	return texts
+
+def summarise(latencies):
+	""" Return p50, p99 and the longest of the latencies, in milliseconds. """
+	if len(latencies) == 0:
+		return {'p50Ms': None, 'p99Ms': None, 'maxMs': None}
+	latencies = sorted(latencies)
+	def percentile(fraction):
+		return 1000.*latencies[min(len(latencies)-1, int(fraction*len(latencies)))]
+	return {'p50Ms': percentile(0.5), 'p99Ms': percentile(0.99), 'maxMs': 1000.*latencies[-1]}
+
+def peakRss():
+	""" Return the peak resident memory of this process in MB, or None if
+	unknown. """
+	if resource is None:
+		return None
+	maxRss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	# Bytes on macOS, kB elsewhere.
+	return maxRss/1e6 if sys.platform == 'darwin' else maxRss/1e3
+
+def openTransport(transport):
+	""" Open a port to read and a function writing bytes to it.
+
+	Returns
+	---------
+		(serial.SerialBase) - the port.
+		(function) - writes all of the given bytes to the port.
+		(function) - closes everything.
+	"""
+	if transport == 'loop':
+		port = sm.serial.serial_for_url('loop://', timeout=0)
+		return port, port.write, port.close
+	elif transport == 'pty':
+		master, slave = os.openpty()
+		port = sm.serial.Serial(os.ttyname(slave), timeout=0)
+		os.close(slave)
+		def write(dataStr):
+			view = memoryview(dataStr)
+			while len(view) > 0: # Blocks while the pty buffer is full.
+				view = view[os.write(master, view):]
+		def close():
+			port.close()
+			os.close(master)
+		return port, write, close
+	raise ValueError('Transport {} not supported.'.format(transport))
+
+def benchGrab(chunks, transport, outputFormat, readDelay):
+	""" Write the chunks to a port from another thread and read them with
+	grabPortOutput every `readDelay` seconds. """
+	port, write, close = openTransport(transport)
+	written = collections.deque() # (end of the chunk in the stream, write time).
+	def writeAll():
+		end = 0
+		for chunk in chunks:
+			end += len(chunk)
+			written.append((end, time.perf_counter()))
+			write(chunk)
+	noBytes = [0] # Read so far, counted by wrapping the read of the port.
+	portRead = port.read
+	def countingRead(size=1):
+		dataStr = portRead(size)
+		noBytes[0] += len(dataStr)
+		return dataStr
+	port.read = countingRead
+
+	total = sum(len(chunk) for chunk in chunks)
+	latencies = []
+	outputBuffer = sm.commsInterface.LineFramer()
+	writer = threading.Thread(target=writeAll, daemon=True)
+	start = time.perf_counter()
+	writer.start()
+	try:
+		while noBytes[0] < total and time.perf_counter()-start < GRAB_TIMEOUT:
+			output, outputBuffer, warningSummary = sm.commsInterface.grabPortOutput(port,
+				outputBuffer, outputFormat)
+			now = time.perf_counter()
+			while len(written) > 0 and written[0][0] <= noBytes[0]:
+				latencies.append(now-written.popleft()[1])
+			if readDelay > 0:
+				time.sleep(readDelay)
+		seconds = time.perf_counter()-start
+	finally:
+		close()
+	return {'seconds': seconds, 'bytes': noBytes[0], 'complete': noBytes[0] == total,
+		'latencies': latencies}
+
+def benchSanitise(chunks, outputFormat):
+	""" Sanitise the decoded chunks. """
+	texts = decodeChunks(chunks, outputFormat)
+	latencies = []
+	start = time.perf_counter()
+	for text in texts:
+		chunkStart = time.perf_counter()
+		sm.commsInterface.sanitiseOutput(text)
+		latencies.append(time.perf_counter()-chunkStart)
+	return {'seconds': time.perf_counter()-start, 'latencies': latencies}
+
+def benchTextBox(chunks, outputFormat):
+	""" Sanitise the decoded chunks and write them to the console of a hidden
+	main frame, refreshing it after every chunk, like the GUI does when the
+	chunks arrive slower than the refresh rate. """
+	import wx
+	import SerialMonitor.gui as gui
+	app = wx.App(False)
+	frame = gui.serialMonitorGuiMainFrame() # Never shown.
+	frame.logger.removeHandler(frame.handler) # Don't measure logging to STDERR.
+	texts = decodeChunks(chunks, outputFormat)
+	latencies = []
+	try:
+		start = time.perf_counter()
+		for text in texts:
+			chunkStart = time.perf_counter()
+			frame.writeToTextBox(sm.commsInterface.sanitiseOutput(text))
+			frame.flushTextBox()
+			latencies.append(time.perf_counter()-chunkStart)
+		seconds = time.perf_counter()-start
+	finally:
+		# Stop the frame's threads, e.g. the port inventory, like closing it does,
+		# so that they don't skew the stages that follow.
+		frame.onClose(None)
+		app.Destroy()
+	return {'seconds': seconds, 'latencies': latencies}
+
+class _LatencyFormatter(logging.Formatter):
+	""" Formats like the GUI does and collects the time from logging every
+	record until it's formatted, just before it's written to the file. """
+
+	def __init__(self):
+		logging.Formatter.__init__(self, '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+		self.latencies = []
+
+	def format(self, record):
+		self.latencies.append(time.perf_counter()-record.perfCounter)
+		return logging.Formatter.format(self, record)
+
+def benchLogger(chunks, outputFormat):
+	""" Log the sanitised chunks to a file in the background, until they've all
+	been written. """
+	texts = [sm.commsInterface.sanitiseOutput(text) for text in decodeChunks(chunks,
+		outputFormat)]
+	logger = logging.getLogger('SMLog.benchPipeline')
+	logger.setLevel(logging.DEBUG)
+	logger.propagate = False
+	formatter = _LatencyFormatter()
+	with tempfile.TemporaryDirectory() as tempDir:
+		fileLogger = sm.fileLogger.AsyncFileLogger(os.path.join(tempDir, 'bench.log'),
+			formatter=formatter, policy='block')
+		fileLogger.start()
+		logger.addHandler(fileLogger.queueHandler)
+		try:
+			start = time.perf_counter()
+			for text in texts:
+				logger.info(text, extra={'perfCounter': time.perf_counter()})
+		finally:
+			logger.removeHandler(fileLogger.queueHandler)
+			fileLogger.stop() # Waits for everything to be written.
+		seconds = time.perf_counter()-start
+	return {'seconds': seconds, 'latencies': formatter.latencies, 'dropped': fileLogger.dropped}
+
+def runCase(case):
+	""" Run one case, described by a dict of its parameters, and return its
+	results. Meant to be run in a fresh process. """
+	chunks = splitChunks(generateStream(case['size'], case['distribution'], case['seed']),
+		case['chunkSize'], case['randomChunks'], case['seed'])
+	result = dict(case)
+	try:
+		if case['stage'] == 'grab':
+			measured = benchGrab(chunks, case['transport'], case['format'], case['readDelay'])
+		elif case['stage'] == 'sanitise':
+			measured = benchSanitise(chunks, case['format'])
+		elif case['stage'] == 'textbox':
+			measured = benchTextBox(chunks, case['format'])
+		else:
+			measured = benchLogger(chunks, case['format'])
+	except ImportError as err: # No wx.
+		result['skipped'] = str(err)
+		return result
+	latencies = measured.pop('latencies')
+	result.update(measured)
+	result.update(summarise(latencies))
+	result['megabytesPerSecond'] = result.get('bytes', case['size'])/1e6/result['seconds']
+	result['peakRssMb'] = peakRss()
+	return result
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description='Throughput and latency of reading, '
+		'decoding, displaying and logging synthetic data.')
+	parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES,
+		help='stages to measure (default: %(default)s)')
+	parser.add_argument('--distributions', nargs='+', choices=DISTRIBUTIONS,
+		default=DISTRIBUTIONS, help='kinds of data (default: %(default)s)')
+	parser.add_argument('--transports', nargs='+', choices=TRANSPORTS, default=TRANSPORTS,
+		help='ports used by the grab stage (default: %(default)s)')
+	parser.add_argument('--size', type=float, default=4.,
+		help='MB of data per case (default: %(default)s)')
+	parser.add_argument('--chunk-sizes', type=int, nargs='+', default=[64, 4096],
+		help='bytes per chunk (default: %(default)s)')
+	parser.add_argument('--random-chunks', action='store_true',
+		help='make the chunks between 1 and twice the chunk size long')
+	parser.add_argument('--format', choices=['formatted', 'raw', 'hex'],
+		default='formatted', help='output format (default: %(default)s)')
+	parser.add_argument('--read-delay', type=float, default=1.,
+		help='ms between the reads of the grab stage (default: %(default)s)')
+	parser.add_argument('--seed', type=int, default=0,
+		help='seed of the generated data (default: %(default)s)')
+	parser.add_argument('--json', metavar='FILE',
+		help='also write the results to this JSON file')
+	args = parser.parse_args(argv)
+
+	cases = []
+	for stage, distribution, chunkSize in itertools.product(args.stages,
+			args.distributions, args.chunk_sizes):
+		for transport in (args.transports if stage == 'grab' else [None]):
+			cases.append({'stage': stage, 'distribution': distribution, 'chunkSize': chunkSize,
+				'transport': transport, 'size': int(args.size*1e6), 'seed': args.seed,
+				'randomChunks': args.random_chunks, 'format': args.format,
+				'readDelay': args.read_delay/1000.})
+
+	print('{:>9} {:>8} {:>6} {:>5} {:>8} {:>9} {:>9} {:>9} {:>8}'.format('stage',
+		'data', 'chunk', 'port', 'MB/s', 'p50 ms', 'p99 ms', 'max ms', 'RSS MB'))
+	results = []
+	# A new process for every case, so that the peak RSS is of that case only.
+	context = multiprocessing.get_context('spawn')
+	for case in cases:
+		with context.Pool(1) as pool:
+			result = pool.apply(runCase, (case,))
+		results.append(result)
+		if 'skipped' in result:
+			print('{:>9} skipped: {}'.format(case['stage'], result['skipped']))
+			continue
+		print('{:>9} {:>8} {:>6d} {:>5} {:>8.2f} {:>9.3f} {:>9.3f} {:>9.3f} {:>8}'.format(
+			case['stage'], case['distribution'], case['chunkSize'], case['transport'] or '-',
+			result['megabytesPerSecond'], result['p50Ms'] or 0., result['p99Ms'] or 0.,
+			result['maxMs'] or 0., '-' if result['peakRssMb'] is None
+				else '{:.1f}'.format(result['peakRssMb'])))
+		if not result.get('complete', True):
+			print('{:>9} only received {} of {} bytes'.format('', result['bytes'], case['size']))
+
+	if args.json is not None:
+		with open(args.json, 'w') as outFile:
+			json.dump({'version': sm.__version__, 'python': platform.python_version(),
+				'platform': platform.platform(), 'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+				'results': results}, outFile, indent=1)
+	return 0
+
+if __name__ == '__main__':
+	sys.exit(main())
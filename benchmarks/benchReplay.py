@@ -0,0 +1,127 @@
+#!/usr/bin/python3
+""" Play back a capture through the same steps the GUI takes for every read:
+grabPortOutput decodes the bytes, sanitiseOutput cleans them up, and they're
+added to the ScrollbackBuffer that the console is drawn from.
+
+By default the capture is played back as fast as possible, which measures the
+throughput of the whole pipeline. With --speed, it's played back with its
+original timing (or N times faster) and read every --read-delay ms, like the
+GUI does, which reproduces what happened while it was recorded. The longest
+time spent in a single read shows any stalls. Without a capture file, one is
+generated with lines of every byte value, like the tests of HILTester.ino.
+Run from the repository root, e.g.
+
+	PYTHONPATH=. python3 benchmarks/benchReplay.py --format raw
+	PYTHONPATH=. python3 benchmarks/benchReplay.py session.smcap --speed 1
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Benchmark of the decoding and display of the received data.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import argparse, json, os, sys, tempfile, time
+from SerialMonitor import capture, commsInterface, consoleBuffer, replay
+
+def generateCapture(fileName, size, chunkSize=4096):
+	""" Write a capture of `size` bytes received in chunks of `chunkSize`, one
+	every millisecond. The data are lines of all the byte values, so every
+	formatting and sanitising path is taken. """
+	line = bytes(b for b in range(256) if b != ord('\n'))+b'\n'
+	pattern = line*(chunkSize//len(line)+1)
+	with capture.CaptureWriter(fileName, append=False) as writer:
+		for i in range(size//chunkSize):
+			offset = i*chunkSize%len(line)
+			writer.write('generated', capture.IN, pattern[offset:offset+chunkSize],
+				timestamp=i*0.001)
+
+def runPipeline(port, outputFormat, readDelay=0.):
+	""" Read everything played back by `port` and put it through the pipeline.
+
+	Arguments
+	---------
+		port (replay.ReplaySerial) - open port playing back a capture.
+		outputFormat (string) - one of ['formatted', 'raw', 'hex'].
+
+	Optional
+	---------
+		readDelay (float, default 0) - seconds between the reads.
+
+	Returns
+	---------
+		(dict) - number of bytes, reads and lines, time taken and longest time
+			spent in one read, in seconds.
+	"""
+	scrollback = consoleBuffer.ScrollbackBuffer(maxLines=1000)
+	outputBuffer = commsInterface.LineFramer()
+	noBytes = noReads = noLines = 0
+	longestRead = 0.
+	start = time.perf_counter()
+	while not port.finished or port.inWaiting() > 0:
+		readStart = time.perf_counter()
+		noWaiting = port.inWaiting()
+		output, outputBuffer, warningSummary = commsInterface.grabPortOutput(port,
+			outputBuffer, outputFormat)
+		if len(output) > 0:
+			scrollback.append(commsInterface.sanitiseOutput(output))
+			scrollback.takeTrim()
+			noLines += output.count('\n')
+		longestRead = max(longestRead, time.perf_counter()-readStart)
+		noBytes += noWaiting
+		noReads += 1
+		if readDelay > 0:
+			time.sleep(readDelay)
+	return {'bytes': noBytes, 'reads': noReads, 'lines': noLines,
+		'seconds': time.perf_counter()-start, 'longestRead': longestRead}
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description='Throughput of decoding and '
+		'displaying a played back capture.')
+	parser.add_argument('capture', nargs='?',
+		help='capture file to play back, a generated one if not given')
+	parser.add_argument('--size', type=float, default=20.,
+		help='MB of data to generate (default: %(default)s)')
+	parser.add_argument('--format', choices=['formatted', 'raw', 'hex'],
+		default='formatted', help='output format (default: %(default)s)')
+	parser.add_argument('--speed', type=float, default=None,
+		help='play back N times faster than recorded instead of as fast as possible')
+	parser.add_argument('--read-delay', type=float, default=0.,
+		help='ms between the reads (default: %(default)s)')
+	parser.add_argument('--port-name',
+		help='port to play back if the capture has more than one')
+	parser.add_argument('--json', metavar='FILE',
+		help='also write the results to this JSON file')
+	args = parser.parse_args(argv)
+
+	tempDir = None
+	fileName = args.capture
+	if fileName is None:
+		tempDir = tempfile.TemporaryDirectory()
+		fileName = os.path.join(tempDir.name, 'generated.smcap')
+		generateCapture(fileName, int(args.size*1e6))
+
+	try:
+		port = replay.ReplaySerial(fileName, speed=args.speed, portName=args.port_name,
+			timeout=0)
+		try:
+			result = runPipeline(port, args.format, args.read_delay/1000.)
+		finally:
+			port.close()
+	finally:
+		if tempDir is not None:
+			tempDir.cleanup()
+
+	result.update({'capture': args.capture, 'format': args.format, 'speed': args.speed,
+		'megabytesPerSecond': result['bytes']/1e6/result['seconds']})
+	print('{:.1f} MB in {:.2f} s: {:.2f} MB/s, {} reads, longest read {:.1f} ms'.format(
+		result['bytes']/1e6, result['seconds'], result['megabytesPerSecond'],
+		result['reads'], result['longestRead']*1000.))
+
+	if args.json is not None:
+		with open(args.json, 'w') as outFile:
+			json.dump(result, outFile, indent=1)
+	return 0
+
+if __name__ == '__main__':
+	sys.exit(main())
@@ -4,6 +4,7 @@ Author: Aleksander Lidtke
 URL: https://github.com/AleksanderLidtke
 """
 from setuptools import setup, find_packages
+from setuptools.command.build_py import build_py
 # To use a consistent encoding
 from codecs import open
 import os
@@ -16,9 +17,22 @@ with open(os.path.join(os.getcwd(), 'README.md'), encoding='utf-8') as f:
 with open(os.path.join(os.getcwd(), 'VERSION'), encoding='utf-8') as version_file:
     ver=version_file.read().strip()
 
+class build_py_with_version(build_py):
+    """ Also put the version in the built package, where it can be found
+    quickly at run time. Only the build directory is written to. """
+    def run(self):
+        build_py.run(self)
+        if not self.dry_run:
+            version_path = os.path.join(self.build_lib, 'SerialMonitor', '_version.py')
+            self.mkpath(os.path.dirname(version_path))
+            with open(version_path, 'w', encoding='utf-8') as version_file:
+                version_file.write('# Generated by setup.py from the VERSION file, do not edit.\n')
+                version_file.write('__version__ = "{}"\n'.format(ver))
+
 setup(
     name='SerialMonitor',
     version=ver, # Use the version from the file.
+    cmdclass={'build_py': build_py_with_version},
 
     description='Application that reads and writes to a serial port.',
     long_description=long_description, # From the README.md
@@ -49,6 +63,7 @@ setup(
     extras_require={
         'dev': ['pdb'],
         'test': ['unittest'],
+        'zstd': ['zstandard'],
     },
 
     package_data={
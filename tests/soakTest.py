@@ -0,0 +1,312 @@
+#!/usr/bin/python3
+""" Soak test - keep the whole pipeline busy for a long time and watch that the
+resources it uses stay flat. Not run by runAllTests, it takes hours, e.g.
+
+	PYTHONPATH=.. python3 soakTest.py --duration 604800 --baud 115200 --json soak.json
+
+A simulated Arduino (SerialMonitor.hilSimulator) keeps replying to the test
+commands of HILTester.ino, sent whenever it's about to run out of work. Its
+data are read by a ReaderPool, decoded by a PortSession, sanitised, shown in a
+console and logged to a file in the background, like the GUI does. The console
+is a ScrollbackBuffer of the same size as the GUI's, or the console of a hidden
+main frame with --gui (needs wx and a display).
+
+Every `--interval` seconds, the resident memory (RSS), open file descriptors,
+threads, depths of the queues and buffers, and the time it took to decode the
+chunks received are sampled. After `--warmup` seconds, the first sample is the
+baseline: the test fails if the RSS grows more than `--max-growth` MB above it,
+or if more file descriptors are open. The exit status is 0 if the test passed.
+
+.. module:: SerialMonitor
+   :platform: Unix
+   :synopsis: Long-running test of the resources used by the pipeline.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import argparse, json, logging, os, sys, tempfile, threading, time
+import SerialMonitor as sm
+from SerialMonitor import commsInterface, consoleBuffer, fileLogger, hilSimulator, portSession
+
+try:
+	import resource
+except ImportError: # Windows.
+	resource = None
+
+# Test commands sent to the simulator in turn. They include the control bytes
+# that used to stall the log, see blackBoxTestingLog.
+COMMANDS = 'sLcCQmX0'
+# Bytes of replies the simulator can have left to send before the next command
+# is sent, so that it never runs out of work but doesn't queue up commands.
+REPLY_BACKLOG = 4096
+# Seconds without any data after which the commands are sent again, in case
+# some replies have been lost.
+STALL_TIMEOUT = 5.
+# Lines kept by the console, same as gui.CONSOLE_SCROLLBACK_LINES.
+CONSOLE_LINES = 10000
+# Default threshold of the RSS growth above the baseline in MB.
+MAX_RSS_GROWTH = 50.
+
+class _TimedSession(portSession.PortSession):
+	""" PortSession that counts the received bytes and times decoding them. """
+
+	def __init__(self, *args, **kwargs):
+		portSession.PortSession.__init__(self, *args, **kwargs)
+		self.bytesReceived = 0
+		self.decodeTimes = [] # Seconds spent in feed since the last sample.
+
+	def feed(self, dataStr, noWaiting=0):
+		start = time.perf_counter()
+		portSession.PortSession.feed(self, dataStr, noWaiting)
+		self.decodeTimes.append(time.perf_counter()-start)
+		self.bytesReceived += len(dataStr)
+
+class _ScrollbackConsole(object):
+	""" Console without a display, keeps the same lines as the GUI would. """
+
+	def __init__(self):
+		self.scrollback = consoleBuffer.ScrollbackBuffer(maxLines=CONSOLE_LINES)
+
+	def write(self, text):
+		self.scrollback.append(text)
+		self.scrollback.takeTrim()
+
+	def size(self):
+		""" Number of characters held. """
+		return self.scrollback.noChars
+
+	def close(self):
+		pass
+
+class _FrameConsole(object):
+	""" Console of a hidden main frame of the GUI. """
+
+	def __init__(self):
+		import wx
+		import SerialMonitor.gui as gui
+		self.app = wx.App(False)
+		self.frame = gui.serialMonitorGuiMainFrame() # Never shown.
+		self.frame.logger.removeHandler(self.frame.handler) # Don't spam STDERR.
+
+	def write(self, text):
+		self.frame.writeToTextBox(text)
+		self.frame.flushTextBox()
+
+	def size(self):
+		""" Number of characters held. """
+		return self.frame.logFileTextControl.GetLastPosition()
+
+	def close(self):
+		self.frame.readerPool.stop(timeout=2)
+		self.frame.Destroy()
+		self.app.Destroy()
+
+def residentMemory():
+	""" Return the current RSS of this process in MB, or the peak RSS where the
+	current one isn't known. None if neither is. """
+	try:
+		with open('/proc/self/statm') as statm:
+			return int(statm.read().split()[1])*os.sysconf('SC_PAGE_SIZE')/1e6
+	except (OSError, ValueError):
+		pass
+	if resource is None:
+		return None
+	maxRss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	return maxRss/1e6 if sys.platform == 'darwin' else maxRss/1e3 # Bytes on macOS.
+
+def openFileDescriptors():
+	""" Return the number of open file descriptors, or None if unknown. """
+	for fdDirectory in ['/proc/self/fd', '/dev/fd']:
+		try:
+			return len(os.listdir(fdDirectory))
+		except OSError:
+			pass
+	return None
+
+def runSoak(duration, interval=10., warmup=None, baudRate=115200, burstSize=None,
+		commands=COMMANDS, outputFormat='formatted', maxGrowth=MAX_RSS_GROWTH, gui=False,
+		report=print):
+	""" Run the soak test.
+
+	Arguments
+	---------
+		duration (float) - how long to run for, in seconds.
+
+	Optional
+	---------
+		interval (float, default 10) - seconds between the samples.
+		warmup (float, default None) - seconds after which the baseline is
+			sampled. A tenth of the duration if None.
+		baudRate (int, default 115200) - baud rate of the simulator, 0 for as
+			fast as possible.
+		burstSize (int, default None) - largest number of bytes the simulator
+			writes at once, see hilSimulator.HILSimulator.
+		commands (string, default COMMANDS) - test commands to send in turn.
+		outputFormat (string, default 'formatted') - one of ['formatted', 'raw',
+			'hex'].
+		maxGrowth (float, default MAX_RSS_GROWTH) - largest allowed growth of
+			the RSS above the baseline, in MB.
+		gui (bool, default False) - whether to show the data in a hidden main
+			frame rather than a ScrollbackBuffer.
+		report (callable, default print) - called with a line of text for every
+			sample and failure.
+
+	Returns
+	---------
+		(dict) - 'passed' (bool), 'failures' (list of strings), 'baseline' and
+			'samples' (dicts of the sampled values).
+	"""
+	if warmup is None:
+		warmup = duration/10.
+	console = _FrameConsole() if gui else _ScrollbackConsole()
+	tempDir = tempfile.TemporaryDirectory()
+	logger = logging.getLogger('SMLog.soakTest')
+	logger.setLevel(logging.DEBUG)
+	logger.propagate = False
+	asyncLogger = fileLogger.AsyncFileLogger(os.path.join(tempDir.name, 'soak.log'),
+		formatter=logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'),
+		policy='drop') # Like the GUI.
+	asyncLogger.start()
+	logger.addHandler(asyncLogger.queueHandler)
+
+	simulator = hilSimulator.HILSimulator(baudRate=baudRate, burstSize=burstSize)
+	simulator.start()
+	port = sm.serial.Serial(simulator.portName, timeout=0.1)
+	pool = commsInterface.ReaderPool()
+	pool.start()
+	received = threading.Event()
+	session = _TimedSession(port, outputFormat, logger=logger, notify=received.set)
+	session.start(pool)
+	replyLengths = {c: sum(len(b) for b in hilSimulator.reply(c.encode('ascii')))
+		for c in commands}
+
+	samples = []
+	failures = []
+	baseline = None
+	expected = 0 # Bytes of the replies to the commands sent so far.
+	noCommands = 0
+	lastBytes = 0
+	start = lastSample = lastData = time.monotonic()
+	report('{:>8} {:>8} {:>5} {:>7} {:>8} {:>8} {:>8} {:>9} {:>9} {:>9}'.format('time s',
+		'RSS MB', 'fds', 'threads', 'outputs', 'log', 'pending', 'console', 'MB/s',
+		'p99 ms'))
+	try:
+		while time.monotonic()-start < duration and session.alive:
+			# Keep the simulator busy.
+			now = time.monotonic()
+			if now-lastData > STALL_TIMEOUT:
+				expected = session.bytesReceived # Some replies must've been lost.
+			while expected-session.bytesReceived < REPLY_BACKLOG:
+				command = commands[noCommands % len(commands)]
+				session.write(command)
+				expected += replyLengths[command]
+				noCommands += 1
+
+			# Consume the outputs like the GUI.
+			received.wait(0.05)
+			received.clear()
+			outputs = session.getOutputs()
+			output = ''.join(o[0] for o in outputs)
+			if len(output) > 0:
+				lastData = time.monotonic()
+				cleanOutput = commsInterface.sanitiseOutput(output)
+				console.write(cleanOutput)
+				logger.info(cleanOutput)
+
+			if time.monotonic()-lastSample >= interval:
+				now = time.monotonic()
+				decodeTimes, session.decodeTimes = session.decodeTimes, []
+				decodeSummary = sorted(decodeTimes) or [0.]
+				sample = {'time': now-start, 'rssMb': residentMemory(),
+					'fds': openFileDescriptors(), 'threads': threading.active_count(),
+					'outputQueue': session.outputQueue.qsize(),
+					'logQueue': asyncLogger.queue.qsize(),
+					'pendingBytes': len(session.outputBuffer), 'consoleChars': console.size(),
+					'droppedLogRecords': asyncLogger.dropped,
+					'megabytesPerSecond': (session.bytesReceived-lastBytes)/1e6/(now-lastSample),
+					'decodeP50Ms': 1000.*decodeSummary[len(decodeSummary)//2],
+					'decodeP99Ms': 1000.*decodeSummary[int(0.99*(len(decodeSummary)-1))],
+					'decodeMaxMs': 1000.*decodeSummary[-1]}
+				samples.append(sample)
+				lastSample = now
+				lastBytes = session.bytesReceived
+				report('{time:>8.0f} {rssMb:>8.1f} {fds:>5} {threads:>7} {outputQueue:>8} '
+					'{logQueue:>8} {pendingBytes:>8} {consoleChars:>9} {megabytesPerSecond:>9.3f} '
+					'{decodeP99Ms:>9.3f}'.format(**sample))
+
+				if baseline is None and sample['time'] >= warmup:
+					baseline = sample
+				elif baseline is not None:
+					for failure in _check(sample, baseline, maxGrowth):
+						failures.append(failure)
+						report('FAIL: {}'.format(failure))
+				if len(failures) > 0:
+					break
+		if not session.alive:
+			failures.append('Port stopped being read: {}'.format(session.error))
+			report('FAIL: {}'.format(failures[-1]))
+	finally:
+		session.stop(timeout=2)
+		pool.stop(timeout=2)
+		port.close()
+		simulator.stop()
+		logger.removeHandler(asyncLogger.queueHandler)
+		asyncLogger.stop()
+		console.close()
+		tempDir.cleanup()
+
+	return {'passed': len(failures) == 0, 'failures': failures, 'baseline': baseline,
+		'samples': samples, 'bytesReceived': session.bytesReceived, 'commands': noCommands}
+
+def _check(sample, baseline, maxGrowth):
+	""" Return the descriptions of the ways in which `sample` has grown too
+	much since the `baseline`. """
+	failures = []
+	if sample['rssMb'] is not None and sample['rssMb'] > baseline['rssMb']+maxGrowth:
+		failures.append('RSS grew from {:.1f} MB to {:.1f} MB after {:.0f} s.'.format(
+			baseline['rssMb'], sample['rssMb'], sample['time']))
+	if sample['fds'] is not None and sample['fds'] > baseline['fds']:
+		failures.append('Open file descriptors grew from {} to {} after {:.0f} s.'.format(
+			baseline['fds'], sample['fds'], sample['time']))
+	return failures
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description='Run the pipeline against a simulated '
+		'device for a long time and check that it doesn\'t leak.')
+	parser.add_argument('--duration', type=float, default=3600.,
+		help='seconds to run for (default: %(default)s)')
+	parser.add_argument('--interval', type=float, default=10.,
+		help='seconds between the samples (default: %(default)s)')
+	parser.add_argument('--warmup', type=float, default=None,
+		help='seconds before the baseline is sampled (default: a tenth of the duration)')
+	parser.add_argument('--baud', type=int, default=115200,
+		help='baud rate of the device, 0 for as fast as possible (default: %(default)s)')
+	parser.add_argument('--burst', type=int, default=None,
+		help='largest number of bytes the device writes at once')
+	parser.add_argument('--commands', default=COMMANDS,
+		help='HILTester.ino commands to send in turn (default: %(default)s)')
+	parser.add_argument('--format', choices=['formatted', 'raw', 'hex'],
+		default='formatted', help='output format (default: %(default)s)')
+	parser.add_argument('--max-growth', type=float, default=MAX_RSS_GROWTH,
+		help='largest allowed RSS growth in MB (default: %(default)s)')
+	parser.add_argument('--gui', action='store_true',
+		help='show the data in a hidden main frame, needs wx and a display')
+	parser.add_argument('--json', metavar='FILE',
+		help='also write the samples to this JSON file')
+	args = parser.parse_args(argv)
+	unknown = set(args.commands)-set(c.decode('ascii') for c in hilSimulator.TEST_CASES)
+	if len(unknown) > 0:
+		parser.error('unknown commands: {}'.format(''.join(sorted(unknown))))
+
+	result = runSoak(args.duration, interval=args.interval, warmup=args.warmup,
+		baudRate=args.baud, burstSize=args.burst, commands=args.commands,
+		outputFormat=args.format, maxGrowth=args.max_growth, gui=args.gui)
+	print('{} after {:.1f} MB and {} commands.'.format('PASSED' if result['passed']
+		else 'FAILED', result['bytesReceived']/1e6, result['commands']))
+	if args.json is not None:
+		with open(args.json, 'w') as outFile:
+			json.dump(result, outFile, indent=1)
+	return 0 if result['passed'] else 1
+
+if __name__ == '__main__':
+	sys.exit(main())
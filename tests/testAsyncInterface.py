@@ -0,0 +1,153 @@
+#!/usr/bin/python3
+""" Test the SerialMonitor.asyncInterface without using actual hardware, on
+a loop:// port and on pseudo-terminals.
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Automated testing of the asyncio interface.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest, asyncio, os, sys
+if not sys.platform.startswith('win'):
+	import tty
+import SerialMonitor as sm
+from SerialMonitor import asyncInterface
+
+TEST_PORT = 'loop://' # Type of the test port. This one is a simple RX <-> TX
+	# type to be used for unit testing.
+	# https://pyserial.readthedocs.io/en/latest/url_handlers.html#loop
+
+class Tests(unittest.TestCase):
+
+	def setUp(self):
+		""" Prepare resources for testing. """
+		self.loop = asyncio.new_event_loop()
+		asyncio.set_event_loop(self.loop)
+
+	def tearDown(self):
+		""" Done testing, get rid of the test resources."""
+		self.loop.close()
+		asyncio.set_event_loop(None)
+
+	def runAsync(self, coroutine, timeout=5):
+		""" Run the coroutine until it completes, but not for too long. """
+		return self.loop.run_until_complete(asyncio.wait_for(coroutine, timeout))
+
+	def testLoopFormatted(self):
+		""" Lines written to a loop:// port should come back as separate frames,
+		and incomplete lines should wait for their EOL. """
+		port = sm.serial.serial_for_url(url=TEST_PORT, baudrate=9600, timeout=0.1)
+		async def test():
+			frames = []
+			async with asyncInterface.AsyncPortMonitor(port, 'formatted') as monitor:
+				await monitor.write(b'Hello\nWor')
+				await monitor.write(b'ld\x80\nAgain')
+				async for frame in monitor.frames():
+					frames.append(frame)
+					if len(frames) == 2:
+						break
+				self.assertEqual(monitor.outputBuffer.pending,b'Again',msg='Expected Again pending.')
+				self.assertIn('UnicodeDecodeError0',[k for w in monitor.warnings for k in w],
+					msg='Expected a warning about the non-ASCII byte.')
+			return frames
+		self.assertEqual(self.runAsync(test()),['Hello\n','World\n'],msg='Expected two lines.')
+
+	def testLoopHex(self):
+		""" Hex frames should contain the hex codes of the bytes. """
+		port = sm.serial.serial_for_url(url=TEST_PORT, baudrate=9600, timeout=0.1)
+		async def test():
+			output = []
+			async with asyncInterface.AsyncPortMonitor(port, 'hex') as monitor:
+				await monitor.write(b'\x00\x01\x0a')
+				async for frame in monitor.frames():
+					output.append(frame)
+					if len(':'.join(output)) >= len('0x00:0x01:0x0a'):
+						break
+			return ':'.join(output)
+		self.assertEqual(self.runAsync(test()),'0x00:0x01:0x0a',msg='Expected hex codes.')
+
+	def testFramesFinishWhenClosed(self):
+		""" Iterating over the frames should finish once the monitor is closed. """
+		port = sm.serial.serial_for_url(url=TEST_PORT, baudrate=9600, timeout=0.1)
+		async def test():
+			monitor = asyncInterface.AsyncPortMonitor(port, 'raw')
+			monitor.start()
+			await monitor.write(b'Raw')
+			await asyncio.sleep(0.2)
+			await monitor.close()
+			return [frame async for frame in monitor.frames()]
+		self.assertEqual(''.join(self.runAsync(test())),'Raw',msg='Expected Raw.')
+
+	def testStartOutsideLoop(self):
+		""" Starting without a running event loop should fail, even though the
+		loop has been set as the current one. """
+		port = sm.serial.serial_for_url(url=TEST_PORT, baudrate=9600, timeout=0.1)
+		monitor = asyncInterface.AsyncPortMonitor(port, 'raw')
+		with self.assertRaises(RuntimeError,msg='Expected no running loop to be found.'):
+			monitor.start()
+		port.close()
+
+	@unittest.skipIf(sys.platform.startswith('win'), 'Pseudo-terminals are only available on Unix.')
+	def testPty(self):
+		""" The fd of a pseudo-terminal should be watched by the event loop and
+		the iteration should fail when the other end goes away. """
+		master, slave = os.openpty()
+		port = sm.serial.Serial(os.ttyname(slave), timeout=0.1)
+		os.close(slave)
+		async def test():
+			frames = []
+			monitor = asyncInterface.AsyncPortMonitor(port, 'formatted')
+			monitor.start()
+			self.assertIsNotNone(monitor._fd,msg='Expected the fd to be watched.')
+			os.write(master, b'One\nTwo\n')
+			async for frame in monitor.frames():
+				frames.append(frame)
+				if len(frames) == 2:
+					os.close(master) # Hang up.
+			return frames
+		try:
+			with self.assertRaises(sm.serial.SerialException):
+				self.runAsync(test())
+		finally:
+			port.close()
+
+	@unittest.skipIf(sys.platform.startswith('win'), 'Pseudo-terminals are only available on Unix.')
+	def testWriteBackpressure(self):
+		""" Writing more than the pseudo-terminal accepts should wait until the
+		other end reads the bytes, and all of them should arrive in order. """
+		master, slave = os.openpty()
+		port = sm.serial.Serial(os.ttyname(slave), timeout=0.1)
+		os.close(slave)
+		os.set_blocking(master, False)
+		tty.setraw(master)
+		data = bytes(range(256))*4096 # 1 MiB, much more than the tty buffer.
+		received = bytearray()
+		def onReadable():
+			try:
+				received.extend(os.read(master, 65536))
+			except BlockingIOError:
+				pass
+		async def test():
+			monitor = asyncInterface.AsyncPortMonitor(port, 'raw', writeBufferLimit=4096)
+			monitor.start()
+			writing = self.loop.create_task(monitor.write(data))
+			await asyncio.sleep(0.1)
+			self.assertFalse(writing.done(),msg='Expected write to wait for the reader.')
+			self.loop.add_reader(master, onReadable)
+			await writing
+			await monitor.drain()
+			while len(received) < len(data):
+				await asyncio.sleep(0.01)
+			self.loop.remove_reader(master)
+			await monitor.close()
+		try:
+			self.runAsync(test())
+		finally:
+			port.close()
+			os.close(master)
+		self.assertEqual(bytes(received),data,msg='Expected all the bytes in order.')
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,159 @@
+#!/usr/bin/python3
+""" Test recording and reading the raw traffic of the ports with
+SerialMonitor.capture, without using actual hardware.
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Automated testing of the binary capture files.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest, os, shutil, tempfile, threading, time
+import SerialMonitor as sm
+from SerialMonitor import capture
+
+TEST_PORT = 'loop://' # Type of the test port. This one is a simple RX <-> TX
+	# type to be used for unit testing.
+	# https://pyserial.readthedocs.io/en/latest/url_handlers.html#loop
+
+try:
+	import zstandard
+	ZSTD_AVAILABLE = True
+except ImportError:
+	ZSTD_AVAILABLE = False
+
+class Tests(unittest.TestCase):
+
+	def setUp(self):
+		""" Prepare resources for testing. """
+		self.tempDir = tempfile.mkdtemp()
+		self.fileName = os.path.join(self.tempDir, 'test.smcap')
+
+	def tearDown(self):
+		""" Done testing, get rid of the test resources."""
+		shutil.rmtree(self.tempDir)
+
+	def roundTrip(self, compression):
+		""" Write chunks of all the possible bytes and check they're read back. """
+		chunks = [bytes(range(256))*i for i in range(1, 50)]
+		with capture.CaptureWriter(self.fileName, compression=compression,
+				append=False, blockSize=4096) as writer:
+			for i, chunk in enumerate(chunks):
+				writer.write('/dev/ttyA', capture.IN, chunk, timestamp=float(i))
+			writer.write('/dev/ttyB', capture.OUT, b'0')
+		records = list(capture.CaptureReader(self.fileName))
+
+		self.assertEqual([r.data for r in records[:-1]],chunks,msg='Expected the same bytes.')
+		self.assertEqual([r.timestamp for r in records[:-1]],[float(i) for i in range(49)],
+			msg='Expected the timestamps.')
+		self.assertEqual(records[-1][1:],('/dev/ttyB','OUT',b'0'),
+			msg='Expected the port and direction of the last record.')
+		return os.path.getsize(self.fileName)
+
+	def testUncompressed(self):
+		""" Uncompressed records should be read back as written. """
+		self.roundTrip(None)
+
+	def testGzip(self):
+		""" gzip blocks should be read back and smaller for repetitive data. """
+		compressedSize = self.roundTrip('gzip')
+		self.assertLess(compressedSize,self.roundTrip(None)//10,
+			msg='Expected a much smaller file.')
+
+	@unittest.skipUnless(ZSTD_AVAILABLE, 'zstandard is not installed.')
+	def testZstd(self):
+		""" zstd blocks should be read back, too. """
+		self.roundTrip('zstd')
+
+	def testAppend(self):
+		""" Appending should keep the old records and the ports should keep
+		their names, although every writer numbers them anew. """
+		with capture.CaptureWriter(self.fileName) as writer:
+			writer.write('A', capture.IN, b'1')
+		with capture.CaptureWriter(self.fileName, compression='gzip') as writer:
+			writer.write('B', capture.IN, b'2')
+			writer.write('A', capture.IN, b'3')
+		reader = capture.CaptureReader(self.fileName)
+		records = [(r.port, r.data) for r in reader]
+		self.assertEqual(records,[('A',b'1'),('B',b'2'),('A',b'3')],
+			msg='Expected the records of both writers.')
+		self.assertAlmostEqual(reader.wallClockOffset+time.monotonic(),time.time(),delta=60,
+			msg='Expected the wall-clock time to be known.')
+
+	def testTruncated(self):
+		""" A file cut short should yield the complete blocks. """
+		with capture.CaptureWriter(self.fileName) as writer:
+			writer.write('A', capture.IN, b'complete')
+			writer.flush()
+			writer.write('A', capture.IN, b'cut short')
+		with open(self.fileName, 'rb+') as captureFile:
+			captureFile.truncate(os.path.getsize(self.fileName)-3)
+		reader = capture.CaptureReader(self.fileName)
+		self.assertEqual([r.data for r in reader],[b'complete'],msg='Expected the first block.')
+		self.assertTrue(reader.truncated,msg='Expected the file to be truncated.')
+
+	def testAppendToTruncated(self):
+		""" Appending to a file cut short should drop the incomplete block, so
+		that the new records can be read. """
+		with capture.CaptureWriter(self.fileName) as writer:
+			writer.write('A', capture.IN, b'complete')
+			writer.flush()
+			writer.write('A', capture.IN, b'cut short')
+		with open(self.fileName, 'rb+') as captureFile:
+			captureFile.truncate(os.path.getsize(self.fileName)-3)
+		with capture.CaptureWriter(self.fileName) as writer:
+			writer.write('A', capture.IN, b'appended')
+		reader = capture.CaptureReader(self.fileName)
+		self.assertEqual([r.data for r in reader],[b'complete',b'appended'],
+			msg='Expected the complete and the appended blocks.')
+		self.assertFalse(reader.truncated,msg='Expected a complete file.')
+
+	def testInvalid(self):
+		""" Corrupted and foreign files should be rejected. """
+		with capture.CaptureWriter(self.fileName) as writer:
+			writer.write('A', capture.IN, b'data')
+		with open(self.fileName, 'rb+') as captureFile:
+			captureFile.seek(-2, os.SEEK_END)
+			captureFile.write(b'XX')
+		with self.assertRaises(ValueError,msg='Expected a ValueError for a corrupted block.'):
+			list(capture.CaptureReader(self.fileName))
+
+		with open(self.fileName, 'w') as textFile:
+			textFile.write('Not a capture')
+		with self.assertRaises(ValueError,msg='Expected a ValueError for a text file.'):
+			list(capture.CaptureReader(self.fileName))
+		with self.assertRaises(ValueError,msg='Expected a ValueError when appending.'):
+			capture.CaptureWriter(self.fileName)
+
+	def testSession(self):
+		""" A PortSession should capture what it sends and receives. """
+		port = sm.serial.serial_for_url(url=TEST_PORT, baudrate=9600, timeout=0.1)
+		pool = sm.commsInterface.ReaderPool()
+		pool.start()
+		received = threading.Event()
+		try:
+			with capture.CaptureWriter(self.fileName) as writer:
+				session = sm.portSession.PortSession(port, 'formatted', notify=received.set)
+				session.captureWriter = writer
+				session.start(pool)
+				session.write('Hello\n')
+				output = ''
+				end = time.monotonic()+2
+				while len(output) < 6 and time.monotonic() < end:
+					received.wait(0.1)
+					received.clear()
+					output += ''.join(o[0] for o in session.getOutputs())
+				session.stop(timeout=2)
+		finally:
+			pool.stop(timeout=2)
+			port.close()
+		records = list(capture.CaptureReader(self.fileName))
+		self.assertEqual((records[0].direction,records[0].data),('OUT',b'Hello\n'),
+			msg='Expected the sent data first.')
+		# The received data can be read in more than one chunk.
+		self.assertEqual(b''.join(r.data for r in records[1:] if r.direction == 'IN'),
+			b'Hello\n',msg='Expected the received data.')
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,136 @@
+#!/usr/bin/python3
+""" Test logging to a file in the background with SerialMonitor.fileLogger.
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Automated testing of the asynchronous file logging.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest, logging, os, queue, shutil, tempfile, threading, time
+import SerialMonitor as sm
+
+class Tests(unittest.TestCase):
+
+	def setUp(self):
+		""" Prepare resources for testing. """
+		self.tempDir = tempfile.mkdtemp()
+		self.fileName = os.path.join(self.tempDir, 'test.log')
+		self.logger = logging.getLogger('SMLog.testFileLogger')
+		self.logger.setLevel(logging.DEBUG)
+		self.logger.propagate = False # Don't spam STDERR.
+		self.fileLogger = None
+
+	def tearDown(self):
+		""" Done testing, get rid of the test resources."""
+		if self.fileLogger is not None:
+			self.logger.removeHandler(self.fileLogger.queueHandler)
+			self.fileLogger.stop()
+		shutil.rmtree(self.tempDir)
+
+	def read(self):
+		""" Return the lines of the log file. """
+		with open(self.fileName, encoding='utf-8') as logFile:
+			return logFile.read().splitlines()
+
+	def testAllWritten(self):
+		""" Everything logged before stopping should end up in the file, in order. """
+		self.fileLogger = sm.fileLogger.AsyncFileLogger(self.fileName,
+			formatter=logging.Formatter('%(levelname)s - %(message)s'), policy='block')
+		self.fileLogger.start()
+		self.logger.addHandler(self.fileLogger.queueHandler)
+		for i in range(10000):
+			self.logger.info('Line {}'.format(i))
+		self.logger.removeHandler(self.fileLogger.queueHandler)
+		self.fileLogger.stop()
+		lines = self.read()
+		self.fileLogger = None
+
+		self.assertEqual(len(lines),10000,msg='Expected all the lines.')
+		self.assertEqual(lines[0],'INFO - Line 0',msg='Expected the formatter to be used.')
+		self.assertEqual(lines[-1],'INFO - Line 9999',msg='Expected the lines in order.')
+
+	def testPeriodicFlush(self):
+		""" Records should reach the file within the flush interval, also when
+		nothing else is logged. """
+		self.fileLogger = sm.fileLogger.AsyncFileLogger(self.fileName, flushInterval=0.05)
+		self.fileLogger.start()
+		self.logger.addHandler(self.fileLogger.queueHandler)
+		self.logger.info('Hello')
+		end = time.monotonic()+2
+		while self.read() != ['Hello'] and time.monotonic() < end:
+			time.sleep(0.05)
+		self.assertEqual(self.read(),['Hello'],msg='Expected the record to be flushed.')
+
+	def testDropPolicy(self):
+		""" Records logged while the queue is full should be dropped and
+		counted, and this should be noted in the log. """
+		self.fileLogger = sm.fileLogger.AsyncFileLogger(self.fileName, maxQueueSize=5,
+			policy='drop')
+		self.logger.addHandler(self.fileLogger.queueHandler) # Not started, so nothing's written.
+		for i in range(10):
+			self.logger.info('Line {}'.format(i))
+		self.assertEqual(self.fileLogger.dropped,5,msg='Expected 5 dropped records.')
+
+		self.fileLogger.start()
+		end = time.monotonic()+2
+		while not self.fileLogger.queue.empty() and time.monotonic() < end:
+			time.sleep(0.01)
+		self.logger.info('Line 10')
+		self.logger.removeHandler(self.fileLogger.queueHandler)
+		self.fileLogger.stop()
+		lines = self.read()
+		self.fileLogger = None
+		self.assertEqual(lines,['Line {}'.format(i) for i in range(5)]
+			+['Log queue full, dropped 5 records.','Line 10'],
+			msg='Expected the dropped records to be noted.')
+
+	def testStopWhenFull(self):
+		""" Stopping while the queue is full should wait for it to be written,
+		not fail, and stop logging to the queue. """
+		self.fileLogger = sm.fileLogger.AsyncFileLogger(self.fileName, maxQueueSize=5,
+			policy='drop')
+		originalEmit = self.fileLogger.fileHandler.emit
+		writing = threading.Event()
+		diskReady = threading.Event()
+		def emit(record): # A disk that stalls until it's ready.
+			writing.set()
+			diskReady.wait()
+			originalEmit(record)
+		self.fileLogger.fileHandler.emit = emit
+		self.fileLogger.start()
+		self.logger.addHandler(self.fileLogger.queueHandler)
+		self.logger.info('Line 0')
+		writing.wait(2) # The listener is stuck writing Line 0, fill the queue.
+		for i in range(1, 20):
+			self.logger.info('Line {}'.format(i))
+		self.assertTrue(self.fileLogger.queue.full(),msg='Expected a full queue.')
+		threading.Timer(0.1, diskReady.set).start()
+		self.fileLogger.stop()
+		self.assertNotIn(self.fileLogger.queueHandler,self.logger.handlers,
+			msg='Expected the handler to be detached.')
+		self.assertIsNone(self.fileLogger.listener._thread,msg='Expected the listener to stop.')
+		self.assertIsNone(self.fileLogger.fileHandler.stream,msg='Expected the file to be closed.')
+		lines = self.read()
+		self.fileLogger = None
+		self.assertEqual(lines[:5],['Line {}'.format(i) for i in range(5)],
+			msg='Expected the queued records to be written.')
+
+	def testBlockPolicy(self):
+		""" With the block policy, logging should wait for room in the queue
+		before dropping the record. """
+		self.fileLogger = sm.fileLogger.AsyncFileLogger(self.fileName, maxQueueSize=1,
+			policy='block')
+		self.fileLogger.queueHandler.blockTimeout = 0.1
+		self.logger.addHandler(self.fileLogger.queueHandler)
+		start = time.monotonic()
+		self.logger.info('Fits')
+		self.logger.info('Waits')
+		self.assertGreaterEqual(time.monotonic()-start,0.1,msg='Expected to wait.')
+		self.assertEqual(self.fileLogger.dropped,1,msg='Expected 1 dropped record.')
+		with self.assertRaises(ValueError,msg='Expected a ValueError for unknown policies.'):
+			sm.fileLogger.BoundedQueueHandler(queue.Queue(), policy='ignore')
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,64 @@
+#!/usr/bin/python3
+""" Test the SerialMonitor.commsInterface.getActivePorts on pseudo-terminals,
+without using actual hardware.
+
+.. module:: SerialMonitor
+   :platform: Unix
+   :synopsis: Automated testing of finding the active ports.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest, os, sys, time
+import SerialMonitor as sm
+
+@unittest.skipIf(sys.platform.startswith('win'), 'Pseudo-terminals are only available on Unix.')
+class Tests(unittest.TestCase):
+
+	def setUp(self):
+		""" Prepare resources for testing. """
+		self.ptys = [os.openpty() for i in range(8)]
+		self.portNames = [os.ttyname(slave) for master, slave in self.ptys]
+
+	def tearDown(self):
+		""" Done testing, get rid of the test resources."""
+		for master, slave in self.ptys:
+			os.close(master)
+			os.close(slave)
+
+	def testListedPorts(self):
+		""" Without probing, no port should be opened and a list returned. """
+		ports = sm.commsInterface.getActivePorts()
+		self.assertIsInstance(ports,list,msg='Expected a list.')
+
+	def testProbe(self):
+		""" Only the candidates that can be opened should be returned, in the
+		same order. """
+		candidates = self.portNames[:4] + ['/dev/ttyDoesNotExist'] + self.portNames[4:]
+		ports = sm.commsInterface.getActivePorts(candidatePorts=candidates)
+		self.assertEqual(ports,self.portNames,msg='Expected all the pseudo-terminals.')
+
+	def testProbeFewWorkers(self):
+		""" There can be fewer workers than ports. """
+		ports = sm.commsInterface.getActivePorts(candidatePorts=self.portNames,maxWorkers=3)
+		self.assertEqual(ports,self.portNames,msg='Expected all the pseudo-terminals.')
+
+	def testTimeout(self):
+		""" Ports that take too long to open should be skipped without waiting
+		for them. """
+		originalProbe = sm.commsInterface._probePort
+		def slowProbe(port):
+			if port == self.portNames[0]:
+				time.sleep(1)
+			return originalProbe(port)
+		sm.commsInterface._probePort = slowProbe
+		try:
+			start = time.monotonic()
+			ports = sm.commsInterface.getActivePorts(candidatePorts=self.portNames,timeout=0.2)
+			self.assertLess(time.monotonic()-start,0.9,msg='Expected not to wait for the slow port.')
+		finally:
+			sm.commsInterface._probePort = originalProbe
+		self.assertEqual(ports,self.portNames[1:],msg='Expected the slow port to be skipped.')
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,84 @@
+#!/usr/bin/python3
+""" Test the decoding used by SerialMonitor.grabPortOutput on a long stream
+without using actual hardware. Focus on noisy lines, i.e. ones with some bytes
+outside of the ASCII range, which are the worst case for the formatted
+outputFormat. How fast this is is measured by benchmarks/benchDecode.py.
+
+The loop:// port passes one byte at a time and would be the bottleneck here,
+so the received bytes are fed straight to the decoding part of grabPortOutput.
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Automated testing of decoding long streams in all the outputFormats.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest, random
+import SerialMonitor as sm
+
+DATA_SIZE = 1024*1024 # Bytes to decode in each test case.
+CHUNK_SIZE = 4096 # Bytes returned by one port.read, typical OS buffer size.
+
+class Tests(unittest.TestCase):
+
+	def setUp(self):
+		""" Prepare a long stream of mixed traffic. """
+		random.seed(0) # Make the noise repeatable.
+
+		# Typical telemetry line with an invalid byte in one in twenty lines.
+		line = b'T=123.456,V=3.30,I=0.12,STATUS=OK\n'
+		self.data = bytearray()
+		self.noNoiseBytes = 0
+		while len(self.data) < DATA_SIZE:
+			self.data += line
+			if random.random() < 0.05:
+				self.data += bytes([random.randint(128,255)])
+				self.noNoiseBytes += 1
+		self.data = bytes(self.data)
+
+	def tearDown(self):
+		""" Done testing, get rid of the test resources."""
+		del self.data
+
+	def decodeAll(self, outputFormat):
+		""" Decode self.data in chunks and return the output and the number
+		of warnings. """
+		outputBuffer = ''
+		output = []
+		noWarnings = 0
+		for i in range(0, len(self.data), CHUNK_SIZE):
+			chunkOutput, outputBuffer, warningSummary = sm.commsInterface.decodeOutput(
+				self.data[i:i+CHUNK_SIZE], outputBuffer, outputFormat)
+			output.append(chunkOutput)
+			noWarnings += len(warningSummary)
+		return ''.join(output)+outputBuffer, noWarnings
+
+	def testFormatted(self):
+		""" Formatted output should report every invalid byte of mixed traffic. """
+		output, noWarnings = self.decodeAll('formatted')
+		# Only the invalid bytes should have been dropped, each with a warning.
+		self.assertEqual(noWarnings, self.noNoiseBytes,
+			msg='Expected one warning per invalid byte.')
+		self.assertEqual(len(output), len(self.data)-self.noNoiseBytes,
+			msg='Expected all valid bytes in the output.')
+
+	def testRaw(self):
+		""" Raw output should have exactly one character per received byte. """
+		output, noWarnings = self.decodeAll('raw')
+		self.assertEqual(noWarnings, 0, msg='Expected no warnings.')
+		self.assertEqual(len(output), len(self.data),
+			msg='Expected one character per byte.')
+
+	def testHex(self):
+		""" Every chunk of hex output should be formatted separately, without
+		a trailing ':'. """
+		output, noWarnings = self.decodeAll('hex')
+		self.assertEqual(noWarnings, 0, msg='Expected no warnings.')
+		# 0xAB for every byte plus ':' between all the bytes within a chunk.
+		noChunks = (len(self.data)+CHUNK_SIZE-1)//CHUNK_SIZE
+		self.assertEqual(len(output), 5*len(self.data)-noChunks,
+			msg='Expected five characters per byte.')
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,71 @@
+#!/usr/bin/python3
+""" Test the simulated Arduino of SerialMonitor.hilSimulator, which replies to
+the commands of HILTester.ino on a pseudo-terminal.
+
+.. module:: SerialMonitor
+   :platform: Unix
+   :synopsis: Automated testing of the HIL simulator.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest, time
+import SerialMonitor as sm
+from SerialMonitor import hilSimulator
+
+class Tests(unittest.TestCase):
+
+	def startSimulator(self, **kwargs):
+		""" Start a simulator and open its port, both closed after the test. """
+		simulator = hilSimulator.HILSimulator(**kwargs)
+		simulator.start()
+		self.addCleanup(simulator.stop)
+		port = sm.serial.Serial(simulator.portName, timeout=2)
+		self.addCleanup(port.close)
+		return simulator, port
+
+	def testReplies(self):
+		""" The replies should be the bytes the sketch sends, flushed the same way. """
+		self.assertEqual(hilSimulator.reply(b'0'),[b'Arduino reachable.'],
+			msg='Expected the reply to the test command.')
+		self.assertEqual(hilSimulator.reply(b'S'),[bytes([i]) for i in range(128)],
+			msg='Expected the ASCII table, one byte at a time.')
+		longs = hilSimulator.reply(b'L')
+		self.assertEqual((longs[0],longs[-1],len(longs)),(b'\x00\x01',b'\xff\xff',132),
+			msg='Expected 0x0100 to 0xFFFF, little-endian.')
+		self.assertTrue(b''.join(hilSimulator.reply(b's')).endswith(
+			b'vw\nxyz{|}~\x7f\nOutputBuffer'),msg='Expected groups of ten and OutputBuffer.')
+		self.assertNotIn(0x9C,b''.join(hilSimulator.reply(b'c')+hilSimulator.reply(b'C')),
+			msg='Expected no terminating byte.')
+		self.assertEqual(hilSimulator.reply(b'?'),[],msg='Expected no reply to unknown commands.')
+
+	def testPacing(self):
+		""" Replies should take as long as sending them at the baud rate. """
+		simulator, port = self.startSimulator(baudRate=9600)
+		start = time.monotonic()
+		port.write(b'L')
+		self.assertEqual(len(port.read(264)),264,msg='Expected 132 longs.')
+		self.assertGreaterEqual(time.monotonic()-start,264*10/9600.,
+			msg='Expected the baud rate to be respected.')
+
+	def testBursts(self):
+		""" With a burst size, bytes should be written that many at a time. """
+		simulator, port = self.startSimulator(baudRate=1000, burstSize=5)
+		port.write(b'0')
+		time.sleep(0.02) # Just over the time of the first burst.
+		self.assertEqual(port.read(port.inWaiting()),b'Ardui',msg='Expected one burst.')
+		self.assertEqual(port.read(13),b'no reachable.',msg='Expected the rest.')
+
+	def testStress(self):
+		""" Many commands sent at once, replied to as fast as possible, should be
+		received complete and in order. """
+		simulator, port = self.startSimulator(baudRate=0, burstSize=1)
+		commands = b'0ASLQRcCsm'*20
+		expected = b''.join(b''.join(hilSimulator.reply(bytes([c]))) for c in commands)
+		port.write(commands)
+		received = port.read(len(expected))
+		self.assertEqual(received,expected,msg='Expected all the replies in order.')
+		self.assertEqual(simulator.noCommands,len(commands),msg='Expected every command.')
+
+if __name__ == '__main__':
+	unittest.main()
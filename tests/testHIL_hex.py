@@ -1,7 +1,8 @@
 #!/usr/bin/python3
 """ Test the SerialMonitor.grabPortOutput by talking to an Arduino that is
 programmed to reply with known data to specific commands. This test verifies
-that the data are correctly received and interpreted.
+that the data are correctly received and interpreted. Without an Arduino, it's
+simulated on a pseudo-terminal by SerialMonitor.hilSimulator.
 
 .. module:: SerialMonitor
    :platform: Unix, Windows
@@ -10,7 +11,7 @@ that the data are correctly received and interpreted.
 .. moduleauthor:: Alek, Artur
 
 """
-import unittest, time
+import unittest, os, time
 import SerialMonitor as sm
 
 TEST_PORT = 'loop://' # Type of the test port. This one is a simple RX <-> TX
@@ -19,6 +20,24 @@ TEST_PORT = 'loop://' # Type of the test port. This one is a simple RX <-> TX
 
 TIMEOUT = 20 # Will wait for data to come from the Arduino TIMEOUT*100 ms.
 
+# Port of an Arduino running HILTester.ino, e.g. /dev/ttyACM0, or 'auto' for the
+# first active port. If not set, the Arduino is simulated, at the baud rate and
+# with the burst size given by SM_HIL_BAUD and SM_HIL_BURST, if any.
+HIL_PORT = os.environ.get('SM_HIL_PORT')
+simulator = None # The simulated Arduino, if used.
+
+def setUpModule():
+	""" Start simulating the Arduino, unless a real one is used. """
+	global simulator
+	if HIL_PORT is None:
+		simulator = sm.hilSimulator.simulatorFromEnvironment()
+		simulator.start()
+
+def tearDownModule():
+	""" Stop simulating the Arduino. """
+	if simulator is not None:
+		simulator.stop()
+
 class Tests(unittest.TestCase):
 
 	def setUp(self):
@@ -32,14 +51,20 @@ class Tests(unittest.TestCase):
 		self.currentParity = sm.serial.PARITY_NONE
 		self.currentByteSize = sm.serial.EIGHTBITS
 
-		# See what ports we've got active.
-		ports = sm.commsInterface.getActivePorts()
-		if len(ports)<1:
-			raise BaseException('No active ports, connect the Arduino!')
-
-		# Open a port that we'll use to communicate with the Arduino. Assume it's
-		# the only currently connected device, hence use ports[0].
-		self.fixture = sm.serial.Serial(port=ports[0],
+		if simulator is not None:
+			port = simulator.portName
+		elif HIL_PORT != 'auto':
+			port = HIL_PORT
+		else:
+			# See what ports we've got active.
+			ports = sm.commsInterface.getActivePorts()
+			if len(ports)<1:
+				raise BaseException('No active ports, connect the Arduino!')
+			# Assume it's the only currently connected device, hence use ports[0].
+			port = ports[0]
+
+		# Open a port that we'll use to communicate with the Arduino.
+		self.fixture = sm.serial.Serial(port=port,
 										baudrate=self.BaudRate,
 										timeout=2,
 										stopbits=self.currentStopBits,
@@ -47,7 +72,8 @@ class Tests(unittest.TestCase):
 										bytesize=self.currentByteSize)
 
 		# Check that the port is readable.
-		time.sleep(2) # Need to let the things settle a bit. 1 second won't work.
+		if simulator is None: # The simulator doesn't reset when the port is opened.
+			time.sleep(2) # Need to let the things settle a bit. 1 second won't work.
 		if not sm.commsInterface.checkConnection(self.fixture):
 			self.fixture.close()
 			raise BaseException('Port {} is unreadable.'.format(self.fixture.port))
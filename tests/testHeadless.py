@@ -0,0 +1,86 @@
+#!/usr/bin/python3
+""" Test the SerialMonitor.headless command-line interface without using actual
+hardware or a display.
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Automated testing of the headless mode.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest, io, os, sys, subprocess, threading, time, signal
+import SerialMonitor as sm
+from SerialMonitor import headless
+
+TEST_PORT = 'loop://' # Type of the test port. This one is a simple RX <-> TX
+	# type to be used for unit testing.
+	# https://pyserial.readthedocs.io/en/latest/url_handlers.html#loop
+
+# Make the package importable by the child processes, also from a raw git clone.
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(sm.__file__)))
+
+def runPython(code, **kwargs):
+	""" Start a Python process that runs `code` with this SerialMonitor. """
+	env = dict(os.environ)
+	env['PYTHONPATH'] = PACKAGE_DIR + os.pathsep + env.get('PYTHONPATH', '')
+	return subprocess.Popen([sys.executable, '-c', code], env=env,
+		stdout=subprocess.PIPE, stderr=subprocess.PIPE, **kwargs)
+
+class Tests(unittest.TestCase):
+
+	def testArguments(self):
+		""" The defaults should be filled in and --port required when headless. """
+		args = headless.parseArguments(['--headless', '--port', 'loop://'])
+		self.assertTrue(args.headless,msg='Expected headless mode.')
+		self.assertEqual((args.baud,args.format,args.output),(9600,'formatted',None),
+			msg='Expected default baud rate, format and no output file.')
+		self.assertFalse(headless.parseArguments([]).headless,msg='Expected the GUI.')
+		with open(os.devnull, 'w') as devnull:
+			stderr, sys.stderr = sys.stderr, devnull
+			try:
+				self.assertRaises(SystemExit,headless.parseArguments,['--headless'])
+				self.assertRaises(SystemExit,headless.parseArguments,
+					['--headless','--port','loop://','--format','binary'])
+			finally:
+				sys.stderr = stderr
+
+	def testStream(self):
+		""" Whole lines should be written to the output and the streaming should
+		stop with an error when the port goes away. """
+		port = sm.serial.serial_for_url(url=TEST_PORT, baudrate=9600, timeout=0.1)
+		output = io.StringIO()
+		port.write(b'Hello\nWorld\nAgain')
+		threading.Timer(0.5, port.close).start()
+		self.assertEqual(headless.stream(port, output, 'formatted'),1,
+			msg='Expected exit status 1 for a lost connection.')
+		self.assertEqual(output.getvalue(),'Hello\nWorld\n',msg='Expected two lines.')
+
+	def testNoWx(self):
+		""" The headless mode shouldn't import wx. """
+		process = runPython('import sys, SerialMonitor, SerialMonitor.headless; '
+			'print("wx" in sys.modules)')
+		stdout, stderr = process.communicate(timeout=30)
+		self.assertEqual(stdout.strip(),b'False',msg='Expected wx not to be imported.')
+
+	@unittest.skipIf(sys.platform.startswith('win'), 'Pseudo-terminals are only available on Unix.')
+	def testCommandLine(self):
+		""" Run the entry point on a pseudo-terminal and stop it like the system
+		would, which should still write all the output. """
+		master, slave = os.openpty()
+		try:
+			process = runPython('import SerialMonitor; SerialMonitor.main(["--headless", '
+				'"--port", "{}", "--format", "hex"])'.format(os.ttyname(slave)))
+			time.sleep(1) # Let it open the port.
+			os.write(master, b'\x00\x01\n')
+			time.sleep(0.5)
+			process.send_signal(signal.SIGTERM)
+			stdout, stderr = process.communicate(timeout=10)
+		finally:
+			os.close(master)
+			os.close(slave)
+		self.assertEqual(process.returncode,0,msg='Expected exit status 0: {}'.format(stderr))
+		self.assertEqual(stdout,b'0x00:0x01:0x0a',msg='Expected hex codes of three bytes.')
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,60 @@
+#!/usr/bin/python3
+""" Check that importing SerialMonitor doesn't import the GUI or other slow
+modules until they're needed, using python -X importtime. How long the import
+takes is measured by benchmarks/benchImportTime.py.
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Automated testing of the import time.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest, os, sys, subprocess
+import SerialMonitor as sm
+
+# Modules that mustn't be imported with the package.
+SLOW_MODULES = ['wx', 'pkg_resources', 'SerialMonitor.gui',
+	'SerialMonitor.serialMonitorBaseClasses', 'concurrent.futures']
+# Make the package importable by the child processes, also from a raw git clone.
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(sm.__file__)))
+
+def measureImport(module):
+	""" Import `module` in a new Python process.
+
+	Returns
+	---------
+		(dict) - cumulative import time in microseconds of every module imported
+			in the process, including `module`.
+	"""
+	env = dict(os.environ)
+	env['PYTHONPATH'] = PACKAGE_DIR + os.pathsep + env.get('PYTHONPATH', '')
+	process = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+		'import {}'.format(module)], env=env, stdout=subprocess.PIPE,
+		stderr=subprocess.PIPE, universal_newlines=True, timeout=60)
+	times = {}
+	for line in process.stderr.splitlines():
+		# import time: self [us] | cumulative | imported package
+		if line.startswith('import time:') and '|' in line:
+			self_, cumulative, name = line[len('import time:'):].split('|')
+			if cumulative.strip().isdigit():
+				times[name.strip()] = int(cumulative)
+	return times
+
+class Tests(unittest.TestCase):
+
+	def testSlowModules(self):
+		""" The GUI, pkg_resources etc. shouldn't be imported with the package. """
+		times = measureImport('SerialMonitor')
+		self.assertIn('SerialMonitor',times,msg='Expected SerialMonitor to be imported.')
+		for module in SLOW_MODULES:
+			self.assertNotIn(module,times,msg='Expected {} not to be imported.'.format(module))
+
+	def testUnknownAttribute(self):
+		""" Looking up attributes that don't exist shouldn't import the GUI. """
+		self.assertFalse(hasattr(sm,'noSuchAttribute'),msg='Expected no such attribute.')
+		self.assertNotIn('SerialMonitor.gui',sys.modules,msg='Expected the GUI not to be imported.')
+		self.assertIsNotNone(sm.headless,msg='Expected the submodules to be found.')
+
+if __name__ == '__main__':
+	unittest.main()
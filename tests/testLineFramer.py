@@ -0,0 +1,107 @@
+#!/usr/bin/python3
+""" Test the SerialMonitor.commsInterface.LineFramer without using actual hardware,
+also when it's passed to grabPortOutput instead of a string outputBuffer.
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Automated testing of splitting the received bytes into lines.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest, time
+import SerialMonitor as sm
+
+TEST_PORT = 'loop://' # Type of the test port. This one is a simple RX <-> TX
+	# type to be used for unit testing.
+	# https://pyserial.readthedocs.io/en/latest/url_handlers.html#loop
+
+class Tests(unittest.TestCase):
+
+	def setUp(self):
+		""" Prepare resources for testing. """
+		self.fixture = sm.serial.serial_for_url(url=TEST_PORT, baudrate=9600,
+												 timeout=2)
+		self.framer = sm.commsInterface.LineFramer()
+
+	def tearDown(self):
+		""" Done testing, get rid of the test resources."""
+		del self.fixture
+		del self.framer
+
+	def testNoDelimiter(self):
+		""" Bytes without an EOL should be kept pending. """
+		self.assertEqual(self.framer.feed(b'Hello'),[],msg='Expected no frames.')
+		self.assertEqual(self.framer.feed(b'World'),[],msg='Expected no frames.')
+		self.assertEqual(self.framer.pending,b'HelloWorld',msg='Expected HelloWorld pending.')
+		self.assertEqual(len(self.framer),10,msg='Expected ten pending bytes.')
+
+	def testSplitFrames(self):
+		""" Frames split between many chunks should be put together, and many
+		frames in one chunk should be returned separately. """
+		self.assertEqual(self.framer.feed(b'Hel'),[],msg='Expected no frames.')
+		self.assertEqual(self.framer.feed(b'lo\nWorld\n\nAgain'),
+			[b'Hello\n',b'World\n',b'\n'],msg='Expected three frames.')
+		self.assertEqual(self.framer.pending,b'Again',msg='Expected Again pending.')
+		self.assertEqual(self.framer.feed(b'\n'),[b'Again\n'],msg='Expected one frame.')
+		self.assertEqual(self.framer.pending,b'',msg='Expected nothing pending.')
+
+	def testInitialAndClear(self):
+		""" Initial contents should start the first frame, clear() should drop
+		the pending bytes. """
+		framer = sm.commsInterface.LineFramer(b'Dummy')
+		self.assertEqual(framer.feed(b'Buff\nx'),[b'DummyBuff\n'],msg='Expected DummyBuff.')
+		framer.clear()
+		self.assertEqual(framer.pending,b'',msg='Expected nothing pending.')
+		self.assertEqual(framer.feed(b'y\n'),[b'y\n'],msg='Expected only y.')
+
+	def testMultiByteDelimiter(self):
+		""" Delimiters split between chunks should be found. """
+		framer = sm.commsInterface.LineFramer(delimiter=b'\r\n')
+		self.assertEqual(framer.feed(b'a\r'),[],msg='Expected no frames.')
+		self.assertEqual(framer.feed(b'\nb\rc\r'),[b'a\r\n'],msg='Expected one frame.')
+		self.assertEqual(framer.feed(b'\n'),[b'b\rc\r\n'],msg='Expected one frame.')
+		self.assertRaises(ValueError,sm.commsInterface.LineFramer,delimiter=b'')
+
+	def testByteAtATime(self):
+		""" Feeding one byte at a time should give the same frames as feeding
+		everything at once. """
+		data = b''.join('line {}\n'.format(i).encode('ascii') for i in range(1000))
+		frames = []
+		for i in range(len(data)):
+			frames += self.framer.feed(data[i:i+1])
+		self.assertEqual(b''.join(frames),data,msg='Expected all the lines.')
+		self.assertEqual(len(frames),1000,msg='Expected 1000 frames.')
+
+	def testGrabPortOutput(self):
+		""" grabPortOutput should keep the incomplete line in the framer and
+		return the very same object. """
+		self.fixture.write(b'Hello\nWor')
+		time.sleep(0.1) # In case there's a delay (to be expected on Windows).
+		output, outputBuffer, warningSummary = sm.commsInterface.grabPortOutput(
+			self.fixture,self.framer,'formatted')
+		self.assertEqual(output,'Hello\n',msg='Expected Hello\\n.')
+		self.assertIs(outputBuffer,self.framer,msg='Expected the same framer back.')
+		self.assertEqual(self.framer.pending,b'Wor',msg='Expected Wor pending.')
+		self.assertEqual(warningSummary,{},msg='Expected empty warning dict.')
+
+		self.fixture.write(b'\x80ld\n')
+		time.sleep(0.1) # In case there's a delay (to be expected on Windows).
+		output, outputBuffer, warningSummary = sm.commsInterface.grabPortOutput(
+			self.fixture,self.framer,'formatted')
+		self.assertEqual(output,'World\n',msg='Expected World\\n.')
+		self.assertEqual(self.framer.pending,b'',msg='Expected nothing pending.')
+		self.assertIn('UnicodeDecodeError0',list(warningSummary.keys()),
+			msg='Expected UnicodeDecodeError0 in the dict keys.')
+
+		# Raw and hex outputs shouldn't touch the framer.
+		self.fixture.write(b'Raw')
+		time.sleep(0.1) # In case there's a delay (to be expected on Windows).
+		output, outputBuffer, warningSummary = sm.commsInterface.grabPortOutput(
+			self.fixture,self.framer,'raw')
+		self.assertEqual(output,'Raw',msg='Expected Raw.')
+		self.assertIs(outputBuffer,self.framer,msg='Expected the same framer back.')
+		self.assertEqual(self.framer.pending,b'',msg='Expected nothing pending.')
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/python3
+""" Test the random access to the lines of log files and the records of
+captures with SerialMonitor.logIndex.
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Automated testing of indexing large files.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest, os, shutil, tempfile
+from SerialMonitor import capture, logIndex
+
+class Tests(unittest.TestCase):
+
+	def setUp(self):
+		""" Prepare resources for testing. """
+		self.tempDir = tempfile.mkdtemp()
+		self.fileName = os.path.join(self.tempDir, 'test.log')
+		self.scanChunkSize = logIndex.SCAN_CHUNK_SIZE
+		logIndex.SCAN_CHUNK_SIZE = 7 # Lines span many chunks.
+
+	def tearDown(self):
+		""" Done testing, get rid of the test resources."""
+		logIndex.SCAN_CHUNK_SIZE = self.scanChunkSize
+		shutil.rmtree(self.tempDir)
+
+	def writeLog(self, data, mode='wb'):
+		with open(self.fileName, mode) as logFile:
+			logFile.write(data)
+
+	def testLines(self):
+		""" Lines should be read as in the file, with or without '\\n' at the end. """
+		lines = ['Line {}\n'.format(i)*(i%3) for i in range(100)]
+		self.writeLog(''.join(lines).encode('utf-8')+b'last\r\n')
+		with logIndex.openIndex(self.fileName) as index:
+			self.assertIsInstance(index,logIndex.LineIndex,msg='Expected a LineIndex.')
+			self.assertEqual([index.getText(i) for i in range(len(index))],
+				''.join(lines).splitlines(True)+['last\n'],msg='Expected the same lines.')
+			self.assertEqual(index[-1],[('last\n',(0,0,0))],msg='Expected one black run.')
+			with self.assertRaises(IndexError,msg='Expected an IndexError past the end.'):
+				index.getText(len(index))
+
+	def testEmpty(self):
+		""" Empty files should have no lines, until something is written. """
+		self.writeLog(b'')
+		with logIndex.LineIndex(self.fileName) as index:
+			self.assertEqual(len(index),0,msg='Expected no lines.')
+			self.writeLog(b'Hello', 'ab')
+			self.assertTrue(index.refresh(),msg='Expected new data.')
+			self.assertEqual(index.getText(0),'Hello\n',msg='Expected one line.')
+
+	def testGrowingFile(self):
+		""" Appended data should extend the saved index, also when the last
+		line was incomplete. """
+		self.writeLog(b'First\nSec')
+		with logIndex.LineIndex(self.fileName) as index:
+			self.assertEqual(len(index),2,msg='Expected two lines.')
+		self.writeLog(b'ond\nThird\n', 'ab')
+		with logIndex.LineIndex(self.fileName) as index:
+			self.assertEqual([index.getText(i) for i in range(len(index))],
+				['First\n','Second\n','Third\n'],msg='Expected the lines to be extended.')
+			self.assertFalse(index.refresh(),msg='Expected no new data.')
+
+	def testSavedIndex(self):
+		""" The index should be saved next to the file and reused, but not
+		for another file. """
+		self.writeLog(b'a\nb\nc\n')
+		logIndex.LineIndex(self.fileName).close()
+		self.assertTrue(os.path.exists(self.fileName+logIndex.INDEX_SUFFIX),
+			msg='Expected the index file.')
+		with logIndex.LineIndex(self.fileName) as index:
+			self.assertEqual(list(index.offsets),[0,2,4,6],msg='Expected the saved offsets.')
+
+		self.writeLog(b'longer line\nx\n') # Replaced with another file.
+		with logIndex.LineIndex(self.fileName) as index:
+			self.assertEqual([index.getText(i) for i in range(len(index))],
+				['longer line\n','x\n'],msg='Expected the new file to be indexed.')
+
+	def testCapture(self):
+		""" Every IN and OUT record of a capture should be a line. """
+		fileName = os.path.join(self.tempDir, 'test.smcap')
+		with capture.CaptureWriter(fileName, blockSize=100) as writer:
+			for i in range(50):
+				writer.write('A' if i%2 else 'B', capture.OUT if i%5 == 0 else capture.IN,
+					'msg {}\n'.format(i).encode('ascii'))
+		for attempt in range(2): # Built, then loaded.
+			with logIndex.openIndex(fileName) as index:
+				self.assertIsInstance(index,logIndex.CaptureIndex,msg='Expected a CaptureIndex.')
+				self.assertEqual(len(index),50,msg='Expected 50 records.')
+				self.assertGreater(len(index.blockOffsets),5,msg='Expected many blocks.')
+				text, colour = index[10][0]
+				self.assertTrue(text.endswith(' B OUT: msg 10\n'),msg='Expected record 10.')
+				self.assertEqual(colour,logIndex.OUT_COLOUR,msg='Expected OUT in colour.')
+				self.assertTrue(index.getText(49).endswith(' A IN: msg 49\n'),
+					msg='Expected record 49.')
+
+if __name__ == '__main__':
+	unittest.main()
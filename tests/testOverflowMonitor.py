@@ -0,0 +1,122 @@
+#!/usr/bin/python3
+""" Test the SerialMonitor.commsInterface.OverflowMonitor, which counts the
+signs of data lost by the serial driver, without using actual hardware.
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Automated testing of the dropped-data accounting.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest, os, sys
+import SerialMonitor as sm
+
+TEST_PORT = 'loop://' # Type of the test port. This one is a simple RX <-> TX
+	# type to be used for unit testing.
+	# https://pyserial.readthedocs.io/en/latest/url_handlers.html#loop
+
+class Tests(unittest.TestCase):
+
+	def setUp(self):
+		""" Prepare resources for testing. """
+		self.fixture = sm.serial.serial_for_url(url=TEST_PORT, baudrate=9600,
+												 timeout=2)
+		self.monitor = sm.commsInterface.OverflowMonitor(self.fixture, bufferSize=4095)
+		self.readErrorCounters = sm.commsInterface.readErrorCounters
+
+	def tearDown(self):
+		""" Done testing, get rid of the test resources."""
+		sm.commsInterface.readErrorCounters = self.readErrorCounters
+		self.fixture.close()
+
+	def testByteRateLimit(self):
+		""" 8N1 takes 10 bits per byte. """
+		self.assertEqual(self.monitor.byteRateLimit,960.,msg='Expected 960 B/s at 9600 baud.')
+		self.fixture.parity = sm.serial.PARITY_EVEN
+		self.fixture.stopbits = sm.serial.STOPBITS_TWO
+		self.assertEqual(self.monitor.byteRateLimit,800.,msg='Expected 800 B/s for 8E2.')
+
+	def testBufferFull(self):
+		""" Reads that found the driver buffer full should be counted. """
+		self.assertEqual(self.monitor.check(100),{},msg='Expected no warnings.')
+		self.assertIn('BufferFull',self.monitor.check(4095),msg='Expected a full buffer.')
+		self.assertIn('BufferFull',self.monitor.check(10, noWaiting=4095),
+			msg='Expected a full buffer from noWaiting.')
+		self.assertEqual(self.monitor.counters['bufferFull'],2,msg='Expected two full buffers.')
+
+	def testSaturation(self):
+		""" Windows with more data than the baud rate allows should be counted,
+		but only the first one of a series should be reported. """
+		self.monitor._windowStart -= sm.commsInterface.SATURATION_WINDOW
+		self.assertIn('LineSaturated',self.monitor.check(1000),msg='Expected saturation.')
+		self.monitor._windowStart -= sm.commsInterface.SATURATION_WINDOW
+		self.assertEqual(self.monitor.check(1000),{},msg='Expected no repeated warning.')
+		self.assertEqual(self.monitor.counters['saturated'],2,msg='Expected two windows.')
+		self.monitor._windowStart -= sm.commsInterface.SATURATION_WINDOW
+		self.assertEqual(self.monitor.check(10),{},msg='Expected no warning when idle.')
+		self.assertFalse(self.monitor._saturated,msg='Expected the saturation to end.')
+
+	def testDriverCounters(self):
+		""" New errors counted by the driver should be reported and lost bytes
+		added up. """
+		counters = {'framing': 0, 'overrun': 0, 'parity': 0, 'break': 0, 'bufferOverrun': 0}
+		sm.commsInterface.readErrorCounters = lambda port: dict(counters)
+		monitor = sm.commsInterface.OverflowMonitor(self.fixture, counterInterval=0.)
+		self.assertEqual(monitor.check(10),{},msg='Expected no warnings.')
+
+		counters['overrun'] = 3
+		counters['parity'] = 1
+		warningSummary = monitor.check(10)
+		self.assertEqual(sorted(warningSummary),['OverrunError','ParityError'],
+			msg='Expected overrun and parity errors.')
+		counters['bufferOverrun'] = 2
+		monitor.check(10)
+		self.assertEqual(monitor.counters['droppedBytes'],5,msg='Expected 5 dropped bytes.')
+		self.assertIn('overrun: 3',monitor.describe(),msg='Expected the overruns described.')
+
+	def testDriverCounterInterval(self):
+		""" The driver counters should only be read every counterInterval, and
+		no longer once reading them fails. """
+		reads = []
+		def readErrorCounters(port):
+			reads.append(port)
+			return {'framing': 0, 'overrun': len(reads), 'parity': 0, 'break': 0,
+				'bufferOverrun': 0}
+		sm.commsInterface.readErrorCounters = readErrorCounters
+		monitor = sm.commsInterface.OverflowMonitor(self.fixture, counterInterval=10.)
+		for i in range(100):
+			monitor.check(10)
+		self.assertEqual(len(reads),1,msg='Expected only the initial read.')
+		monitor._lastCounterRead -= 10.
+		self.assertIn('OverrunError',monitor.check(10),msg='Expected the counters to be read.')
+
+		sm.commsInterface.readErrorCounters = lambda port: None
+		monitor._lastCounterRead -= 10.
+		self.assertEqual(monitor.check(10),{},msg='Expected no warnings.')
+		self.assertNotIn('overrun',monitor.describe(),msg='Expected the counters to be dropped.')
+
+	def testUnsupported(self):
+		""" Ports without the driver counters or a settable buffer size should
+		still work. """
+		self.assertIsNone(sm.commsInterface.readErrorCounters(self.fixture),
+			msg='Expected no counters for loop://.')
+		self.assertEqual(sm.commsInterface.setBufferSize(self.fixture),
+			sm.commsInterface.DRIVER_BUFFER_SIZE,msg='Expected the default buffer size.')
+		self.assertNotIn('overrun',self.monitor.describe(),msg='Expected no driver counters.')
+
+	@unittest.skipIf(sys.platform.startswith('win'), 'Pseudo-terminals are only available on Unix.')
+	def testPty(self):
+		""" Pseudo-terminals don't count errors. """
+		master, slave = os.openpty()
+		port = sm.serial.Serial(os.ttyname(slave))
+		try:
+			self.assertIsNone(sm.commsInterface.readErrorCounters(port),
+				msg='Expected no counters for a pty.')
+		finally:
+			port.close()
+			os.close(slave)
+			os.close(master)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,83 @@
+#!/usr/bin/python3
+""" Test the SerialMonitor.portInventory without using actual hardware.
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Automated testing of the cached list of ports.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest
+import serial.tools.list_ports
+from serial.tools.list_ports_common import ListPortInfo
+from SerialMonitor import portInventory
+
+def makePortInfo(device, vid=None, pid=None, serialNumber=None, location=None):
+	""" Details of a port as they would be reported by list_ports. """
+	portInfo = ListPortInfo(device, skip_link_detection=True)
+	portInfo.vid = vid
+	portInfo.pid = pid
+	portInfo.serial_number = serialNumber
+	portInfo.location = location
+	return portInfo
+
+class Tests(unittest.TestCase):
+
+	def setUp(self):
+		""" Prepare resources for testing. """
+		self.changes = []
+		self.inventory = portInventory.PortInventory(
+			notify=lambda added, removed: self.changes.append((added, removed)))
+
+	def tearDown(self):
+		""" Done testing, get rid of the test resources."""
+		self.inventory.stop(timeout=2)
+
+	def testInitialPorts(self):
+		""" The inventory should start with the ports from list_ports, without
+		notifying about them. """
+		self.assertEqual(self.inventory.getPorts(),
+			sorted(p.device for p in serial.tools.list_ports.comports()),
+			msg='Expected the same ports as list_ports.')
+		self.assertEqual(self.changes,[],msg='Expected no notifications.')
+
+	def testIdentity(self):
+		""" USB devices should be identified by their serial number or location,
+		everything else by the device name. """
+		self.assertEqual(portInventory.getIdentity(makePortInfo('/dev/ttyUSB0',
+			0x2341,0x0043,'75833353035351D0E1A1')),(0x2341,0x0043,'75833353035351D0E1A1'),
+			msg='Expected VID, PID and serial number.')
+		self.assertEqual(portInventory.getIdentity(makePortInfo('/dev/ttyUSB0',
+			0x0403,0x6001,location='1-1.2')),(0x0403,0x6001,'1-1.2'),
+			msg='Expected VID, PID and location.')
+		self.assertEqual(portInventory.getIdentity(makePortInfo('/dev/ttyS0')),
+			('/dev/ttyS0',),msg='Expected device name.')
+
+	def testChangesAndReconnect(self):
+		""" Added and removed ports should be notified, and a device that's been
+		plugged back in under another name should be found by its identity. """
+		self.inventory._update({'/dev/ttyUSB0': makePortInfo('/dev/ttyUSB0',
+			0x2341,0x0043,'1234'), '/dev/ttyS0': makePortInfo('/dev/ttyS0')})
+		identity = self.inventory.getIdentity('/dev/ttyUSB0')
+		self.changes = []
+
+		self.inventory._update({'/dev/ttyUSB1': makePortInfo('/dev/ttyUSB1',
+			0x2341,0x0043,'1234'), '/dev/ttyS0': makePortInfo('/dev/ttyS0')})
+		self.assertEqual(self.changes,[(['/dev/ttyUSB1'],['/dev/ttyUSB0'])],
+			msg='Expected ttyUSB1 added and ttyUSB0 removed.')
+		self.assertEqual(self.inventory.findByIdentity(identity),'/dev/ttyUSB1',
+			msg='Expected to find the device under its new name.')
+		self.assertIsNone(self.inventory.getIdentity('/dev/ttyUSB0'),
+			msg='Expected no identity for a removed port.')
+		self.assertIsNone(self.inventory.findByIdentity((1,2,'3')),
+			msg='Expected unknown identity not to be found.')
+
+	def testStartStop(self):
+		""" The background thread should stop when asked to. """
+		self.inventory.start()
+		self.inventory.stop(timeout=2)
+		self.assertFalse(self.inventory.is_alive(),msg='Expected the thread to stop.')
+
+if __name__ == '__main__':
+	unittest.main()
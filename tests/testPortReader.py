@@ -0,0 +1,93 @@
+#!/usr/bin/python3
+""" Test the SerialMonitor.commsInterface.PortReader background thread without
+using actual hardware, including noticing that the port has gone away.
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Automated testing of reading the port in the background.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest, os, sys, time, threading
+import SerialMonitor as sm
+
+TEST_PORT = 'loop://' # Type of the test port. This one is a simple RX <-> TX
+	# type to be used for unit testing.
+	# https://pyserial.readthedocs.io/en/latest/url_handlers.html#loop
+
+class Tests(unittest.TestCase):
+
+	def setUp(self):
+		""" Prepare resources for testing. """
+		self.notified = threading.Event()
+		self.reader = None
+
+	def tearDown(self):
+		""" Done testing, get rid of the test resources."""
+		if self.reader is not None:
+			self.reader.stop(timeout=2)
+
+	def collect(self, noChars, timeout=2):
+		""" Collect the outputs until there are `noChars` characters. """
+		output = ''
+		end = time.monotonic()+timeout
+		while len(output) < noChars and time.monotonic() < end:
+			self.notified.wait(0.1)
+			self.notified.clear()
+			output += ''.join(o[0] for o in self.reader.getOutputs())
+		return output
+
+	def testRead(self):
+		""" Received lines should be decoded and queued as they arrive. """
+		port = sm.serial.serial_for_url(url=TEST_PORT, baudrate=9600, timeout=0.1)
+		self.reader = sm.commsInterface.PortReader(port,'formatted',notify=self.notified.set)
+		self.reader.start()
+		port.write(b'Hello\nWor')
+		port.write(b'ld\n')
+		self.assertEqual(self.collect(12),'Hello\nWorld\n',msg='Expected two lines.')
+		self.assertTrue(self.reader.alive,msg='Expected the reader to be alive.')
+
+	def testClosedPort(self):
+		""" The reader should stop and report the error when the port is closed
+		from under it. """
+		port = sm.serial.serial_for_url(url=TEST_PORT, baudrate=9600, timeout=0.1)
+		self.reader = sm.commsInterface.PortReader(port,'raw',notify=self.notified.set)
+		self.reader.start()
+		port.close()
+		self.reader.join(2)
+		self.assertFalse(self.reader.alive,msg='Expected the reader to stop.')
+		self.assertIsNotNone(self.reader.error,msg='Expected the error to be kept.')
+
+	@unittest.skipIf(sys.platform.startswith('win'), 'Pseudo-terminals are only available on Unix.')
+	def testHangUp(self):
+		""" The reader should stop when the other end of the port goes away,
+		without anything else querying the port. """
+		master, slave = os.openpty()
+		port = sm.serial.Serial(os.ttyname(slave), timeout=0.1)
+		os.close(slave)
+		try:
+			self.reader = sm.commsInterface.PortReader(port,'raw',notify=self.notified.set)
+			self.reader.start()
+			os.write(master, b'Bye')
+			self.assertEqual(self.collect(3),'Bye',msg='Expected Bye.')
+			os.close(master)
+			self.reader.join(2)
+			self.assertFalse(self.reader.alive,msg='Expected the reader to stop.')
+			self.assertIsInstance(self.reader.error,sm.serial.SerialException,
+				msg='Expected a SerialException.')
+		finally:
+			port.close()
+
+	def testStop(self):
+		""" Stopping the reader shouldn't be reported as an error. """
+		port = sm.serial.serial_for_url(url=TEST_PORT, baudrate=9600, timeout=0.1)
+		self.reader = sm.commsInterface.PortReader(port,'hex',probeInterval=0.05)
+		self.reader.start()
+		time.sleep(0.3) # Let it probe the idle port a few times.
+		self.reader.stop(timeout=2)
+		self.assertFalse(self.reader.is_alive(),msg='Expected the thread to finish.')
+		self.assertIsNone(self.reader.error,msg='Expected no error.')
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,211 @@
+#!/usr/bin/python3
+""" Test monitoring many ports at once with SerialMonitor.portSession.PortSession
+and SerialMonitor.commsInterface.ReaderPool, without using actual hardware.
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Automated testing of monitoring many ports with one reader.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest, os, sys, time, threading
+import SerialMonitor as sm
+
+TEST_PORT = 'loop://' # Type of the test port. This one is a simple RX <-> TX
+	# type to be used for unit testing.
+	# https://pyserial.readthedocs.io/en/latest/url_handlers.html#loop
+NO_PTYS = 4 # Number of pseudo-terminals read at once.
+
+class Tests(unittest.TestCase):
+
+	def setUp(self):
+		""" Prepare resources for testing. """
+		self.pool = sm.commsInterface.ReaderPool(probeInterval=0.2)
+		self.pool.start()
+		self.ports = [] # Closed when done.
+		self.fds = [] # Same.
+
+	def tearDown(self):
+		""" Done testing, get rid of the test resources."""
+		self.pool.stop(timeout=2)
+		for port in self.ports:
+			port.close()
+		for fd in self.fds:
+			try:
+				os.close(fd)
+			except OSError:
+				pass
+
+	def openPty(self):
+		""" Return the master fd and a serial.Serial of a new pseudo-terminal. """
+		master, slave = os.openpty()
+		port = sm.serial.Serial(os.ttyname(slave), timeout=0.1)
+		os.close(slave)
+		self.ports.append(port)
+		self.fds.append(master)
+		return master, port
+
+	def collect(self, session, notified, noChars, timeout=2):
+		""" Collect the outputs of a session until there are `noChars` characters. """
+		output = ''
+		end = time.monotonic()+timeout
+		while len(output) < noChars and time.monotonic() < end:
+			notified.wait(0.1)
+			notified.clear()
+			output += ''.join(o[0] for o in session.getOutputs())
+		return output
+
+	def testLoop(self):
+		""" Ports without a file descriptor should be read, too. """
+		port = sm.serial.serial_for_url(url=TEST_PORT, baudrate=9600, timeout=0.1)
+		self.ports.append(port)
+		notified = threading.Event()
+		session = sm.portSession.PortSession(port, 'formatted', notify=notified.set)
+		session.start(self.pool)
+		session.write('Hello\nWor')
+		session.write('ld\n')
+		self.assertEqual(self.collect(session, notified, 12),'Hello\nWorld\n',
+			msg='Expected two lines.')
+		session.stop(timeout=2)
+		self.assertFalse(session.alive,msg='Expected the session to stop.')
+		self.assertIsNone(session.error,msg='Expected no error when stopped.')
+
+	@unittest.skipIf(sys.platform.startswith('win'), 'Pseudo-terminals are only available on Unix.')
+	def testFeedFails(self):
+		""" A session that fails to handle its data should be stopped with
+		that error, without affecting the other sessions. """
+		def failingFeed(dataStr, noWaiting=0):
+			raise OSError(28, 'No space left on device')
+		sessions = []
+		for port in [self.openPty()[1], sm.serial.serial_for_url(url=TEST_PORT, timeout=0.1)]:
+			self.ports.append(port)
+			notified = threading.Event()
+			session = sm.portSession.PortSession(port, 'raw', notify=notified.set)
+			session.feed = failingFeed
+			session.start(self.pool)
+			sessions.append((session, notified))
+		master, port = self.openPty()
+		notified = threading.Event()
+		working = sm.portSession.PortSession(port, 'raw', notify=notified.set)
+		working.start(self.pool)
+
+		os.write(self.fds[0], b'Full disk')
+		sessions[1][0].write('Full disk')
+		for session, sessionNotified in sessions:
+			sessionNotified.wait(2)
+			self.assertFalse(session.alive,msg='Expected the failing session to stop.')
+			self.assertIsInstance(session.error,OSError,msg='Expected the error of feed.')
+		os.write(master, b'Still here')
+		self.assertEqual(self.collect(working, notified, 10),'Still here',
+			msg='Expected the pool to keep reading the other sessions.')
+
+	@unittest.skipIf(sys.platform.startswith('win'), 'Pseudo-terminals are only available on Unix.')
+	def testBytesWaiting(self):
+		""" The pool should be able to tell how much a terminal has waiting. """
+		master, port = self.openPty()
+		os.write(master, b'0123456789')
+		end = time.monotonic()+2
+		while port.inWaiting() < 10 and time.monotonic() < end:
+			time.sleep(0.01)
+		self.assertEqual(sm.commsInterface._bytesWaiting(port.fileno()),10,
+			msg='Expected 10 bytes waiting.')
+
+	def testNoWaiting(self):
+		""" The session should know how much the reader saw still waiting, so
+		that the consumer doesn't have to ask the port. """
+		port = sm.serial.serial_for_url(url=TEST_PORT, baudrate=9600, timeout=0.1)
+		self.ports.append(port)
+		port.write(b'Hello\n') # Waiting before the first read of a single byte.
+		seen = [] # noWaiting passed to every feed.
+		notified = threading.Event()
+		session = sm.portSession.PortSession(port, 'formatted', notify=notified.set)
+		originalFeed = session.feed
+		def feed(dataStr, noWaiting=0):
+			seen.append(noWaiting)
+			originalFeed(dataStr, noWaiting)
+		session.feed = feed
+		session.start(self.pool)
+		self.assertEqual(self.collect(session, notified, 6),'Hello\n',msg='Expected a line.')
+		session.stop(timeout=2)
+		self.assertEqual(seen,[5, 0],msg='Expected the rest of the line to be waiting.')
+		self.assertEqual(session.noWaiting,0,msg='Expected nothing waiting at the end.')
+
+	@unittest.skipIf(sys.platform.startswith('win'), 'Pseudo-terminals are only available on Unix.')
+	def testManyPorts(self):
+		""" Every port should be decoded by its own session, in its own format. """
+		sessions = []
+		for i in range(NO_PTYS):
+			master, port = self.openPty()
+			notified = threading.Event()
+			session = sm.portSession.PortSession(port, ['formatted', 'raw'][i%2],
+				notify=notified.set)
+			session.start(self.pool)
+			sessions.append((master, session, notified))
+
+		for i, (master, session, notified) in enumerate(sessions):
+			os.write(master, 'Port {}\n'.format(i).encode('ascii'))
+		for i, (master, session, notified) in enumerate(sessions):
+			self.assertEqual(self.collect(session, notified, 7),'Port {}\n'.format(i),
+				msg='Expected the data of port {} only.'.format(i))
+			self.assertTrue(session.alive,msg='Expected session {} to be alive.'.format(i))
+
+		# Sessions can be removed while the others keep going.
+		sessions[0][1].stop(timeout=2)
+		os.write(sessions[1][0], b'Still here')
+		self.assertEqual(self.collect(sessions[1][1], sessions[1][2], 10),'Still here',
+			msg='Expected the other sessions to be read.')
+
+	@unittest.skipIf(sys.platform.startswith('win'), 'Pseudo-terminals are only available on Unix.')
+	def testLargeChunks(self):
+		""" Bursts bigger than the driver buffer should arrive intact and in
+		few reads. """
+		master, port = self.openPty()
+		chunks = []
+		notified = threading.Event()
+		session = sm.portSession.PortSession(port, 'raw', notify=notified.set)
+		originalFeed = session.feed
+		def feed(dataStr, noWaiting=0):
+			chunks.append(len(dataStr))
+			originalFeed(dataStr, noWaiting)
+		session.feed = feed
+		session.start(self.pool)
+
+		data = bytes(range(32, 127))*200 # ~19 kB of printable characters.
+		written = 0
+		while written < len(data): # The pty only buffers a few kB.
+			written += os.write(master, data[written:written+4096])
+		self.assertEqual(self.collect(session, notified, len(data)),data.decode('ascii'),
+			msg='Expected all the data in order.')
+		self.assertLess(len(chunks),len(data)//64,msg='Expected the data to be read in bulk.')
+
+	@unittest.skipIf(sys.platform.startswith('win'), 'Pseudo-terminals are only available on Unix.')
+	def testHangUp(self):
+		""" The session should stop and report the error when the other end of
+		the port goes away, and the other sessions should be unaffected. """
+		master, port = self.openPty()
+		otherMaster, otherPort = self.openPty()
+		notified = threading.Event()
+		otherNotified = threading.Event()
+		session = sm.portSession.PortSession(port, 'raw', notify=notified.set)
+		otherSession = sm.portSession.PortSession(otherPort, 'raw', notify=otherNotified.set)
+		session.start(self.pool)
+		otherSession.start(self.pool)
+
+		os.write(master, b'Bye')
+		self.assertEqual(self.collect(session, notified, 3),'Bye',msg='Expected Bye.')
+		os.close(master)
+		end = time.monotonic()+2
+		while session.alive and time.monotonic() < end:
+			time.sleep(0.05)
+		self.assertFalse(session.alive,msg='Expected the session to stop.')
+		self.assertIsInstance(session.error,(OSError, sm.serial.SerialException),
+			msg='Expected the error to be kept.')
+
+		os.write(otherMaster, b'Hi')
+		self.assertEqual(self.collect(otherSession, otherNotified, 2),'Hi',
+			msg='Expected the other session to be read.')
+		self.assertTrue(otherSession.alive,msg='Expected the other session to be alive.')
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,60 @@
+#!/usr/bin/python3
+""" Test the SerialMonitor.commsInterface.ReadScheduler, which adapts the time
+between reads to how busy the port is.
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Automated testing of the adaptive read scheduling.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest
+import SerialMonitor as sm
+
+class Tests(unittest.TestCase):
+
+	def setUp(self):
+		""" Prepare resources for testing. """
+		self.scheduler = sm.commsInterface.ReadScheduler(minInterval=0.01,
+			maxInterval=1., backoff=2.)
+
+	def testBackOff(self):
+		""" The interval should grow exponentially while idle, up to the limit. """
+		intervals = [self.scheduler.update(0) for i in range(10)]
+		self.assertEqual(intervals[:3],[0.02,0.04,0.08],msg='Expected doubling intervals.')
+		self.assertEqual(intervals[-1],1.,msg='Expected the longest interval.')
+		self.assertEqual(self.scheduler.rate,1.,msg='Expected 1 Hz.')
+
+	def testDataWaiting(self):
+		""" The shortest interval should be used as soon as data are waiting. """
+		for i in range(10):
+			self.scheduler.update(0)
+		self.assertEqual(self.scheduler.update(10, noWaiting=5),0.01,
+			msg='Expected the shortest interval.')
+
+	def testRisingRate(self):
+		""" The interval should shrink while the fill rate rises and stay put
+		when it's steady. """
+		for i in range(10):
+			self.scheduler.update(0)
+		self.assertEqual(self.scheduler.update(10),0.5,msg='Expected half the interval.')
+		self.assertEqual(self.scheduler.update(20, elapsed=0.5),0.25,
+			msg='Expected half the interval for a rising rate.')
+		self.assertEqual(self.scheduler.update(10, elapsed=0.25),0.25,
+			msg='Expected the same interval for a steady rate.')
+
+	def testLimits(self):
+		""" Changing the limits should keep the interval within them, and
+		invalid limits should be rejected. """
+		for i in range(10):
+			self.scheduler.update(0)
+		self.scheduler.setLimits(maxInterval=0.1)
+		self.assertEqual(self.scheduler.interval,0.1,msg='Expected the new longest interval.')
+		with self.assertRaises(ValueError,msg='Expected a ValueError for min > max.'):
+			self.scheduler.setLimits(minInterval=0.2)
+		with self.assertRaises(ValueError,msg='Expected a ValueError for backoff <= 1.'):
+			sm.commsInterface.ReadScheduler(backoff=1.)
+
+if __name__ == '__main__':
+	unittest.main()
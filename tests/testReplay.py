@@ -0,0 +1,139 @@
+#!/usr/bin/python3
+""" Test playing back captures with SerialMonitor.replay, instead of receiving
+data from actual hardware.
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Automated testing of the replay of captures.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest, os, shutil, tempfile, threading, time
+import SerialMonitor as sm
+from SerialMonitor import capture, replay
+
+class Tests(unittest.TestCase):
+
+	def setUp(self):
+		""" Prepare resources for testing. """
+		self.tempDir = tempfile.mkdtemp()
+		self.fileName = os.path.join(self.tempDir, 'test.smcap')
+		# Ten lines from port A, one every 0.1 s, and something from port B.
+		with capture.CaptureWriter(self.fileName) as writer:
+			for i in range(10):
+				writer.write('A', capture.IN, 'Line {}\n'.format(i).encode('ascii'),
+					timestamp=100.+i*0.1)
+				writer.write('A', capture.OUT, b'0', timestamp=100.+i*0.1)
+			writer.write('B', capture.IN, b'Other', timestamp=100.5)
+		self.expected = ''.join('Line {}\n'.format(i) for i in range(10))
+
+	def tearDown(self):
+		""" Done testing, get rid of the test resources."""
+		shutil.rmtree(self.tempDir)
+
+	def readAll(self, port, timeout=5):
+		""" Grab the output of the port until it's finished playing back.
+		Return the output and the time it took. """
+		output = ''
+		outputBuffer = ''
+		start = time.monotonic()
+		while (not port.finished or port.inWaiting() > 0) and time.monotonic()-start < timeout:
+			newOutput, outputBuffer, warningSummary = sm.commsInterface.grabPortOutput(
+				port, outputBuffer, 'formatted')
+			output += newOutput
+			time.sleep(0.01)
+		return output, time.monotonic()-start
+
+	def testOriginalTiming(self):
+		""" The data should be played back at the same rate as recorded. """
+		port = replay.ReplaySerial(self.fileName, timeout=0)
+		output, duration = self.readAll(port)
+		port.close()
+		self.assertEqual(output,self.expected,msg='Expected the lines of port A.')
+		self.assertGreaterEqual(duration,0.9,msg='Expected to take as long as recorded.')
+
+	def testFaster(self):
+		""" Speed should scale the time it takes, but keep the data. """
+		port = replay.ReplaySerial(self.fileName, speed=3., timeout=0)
+		self.assertEqual(port.inWaiting(),len('Line 0\n'),msg='Expected only the first line.')
+		output, duration = self.readAll(port)
+		port.close()
+		self.assertEqual(output,self.expected,msg='Expected the same data.')
+		self.assertGreaterEqual(duration,0.25,msg='Expected a third of the time.')
+		self.assertLess(duration,0.8,msg='Expected a third of the time.')
+
+	def testAsFastAsPossible(self):
+		""" Without a speed, everything should be available straight away. """
+		port = replay.ReplaySerial(self.fileName, speed=None, timeout=None)
+		self.assertEqual(port.read(1000).decode('ascii'),self.expected,
+			msg='Expected all the data in one read.')
+		self.assertTrue(port.finished,msg='Expected the replay to be finished.')
+		self.assertEqual(port.write(b'ignored'),7,msg='Expected writing to succeed.')
+		port.close()
+
+	def testUrl(self):
+		""" replay:// URLs should open a ReplaySerial with their options. """
+		port = sm.serial.serial_for_url('replay://{}?speed=max&port=B'.format(self.fileName),
+			timeout=0.1)
+		self.assertIsInstance(port,replay.ReplaySerial,msg='Expected a ReplaySerial.')
+		self.assertEqual(port.read(100),b'Other',msg='Expected the data of port B.')
+		port.close()
+		with self.assertRaises(sm.serial.SerialException,msg='Expected unknown options to be rejected.'):
+			sm.serial.serial_for_url('replay://{}?colour=red'.format(self.fileName))
+		with self.assertRaises(sm.serial.SerialException,msg='Expected missing files to be rejected.'):
+			sm.serial.serial_for_url('replay://{}'.format(self.fileName+'.missing'))
+
+	def testDisconnectAtEnd(self):
+		""" checkConnection should report a connection until everything's been
+		read, if the replay disconnects at the end. """
+		port = replay.ReplaySerial(self.fileName, speed=None, disconnectAtEnd=True, timeout=0)
+		self.assertTrue(sm.commsInterface.checkConnection(port),msg='Expected a connection.')
+		port.read(1000)
+		self.assertFalse(sm.commsInterface.checkConnection(port),msg='Expected a disconnection.')
+		self.assertFalse(port.is_open,msg='Expected checkConnection to close the port.')
+
+	def testIdleAtEnd(self):
+		""" Once everything's been read, reads should wait for the timeout like
+		with an idle device, not return straight away. """
+		port = replay.ReplaySerial(self.fileName, speed=None, timeout=0.2)
+		port.read(1000)
+		start = time.monotonic()
+		self.assertEqual(port.read(1),b'',msg='Expected nothing to read.')
+		self.assertAlmostEqual(time.monotonic()-start,0.2,delta=0.1,
+			msg='Expected to wait for the timeout.')
+		port.close()
+
+	def testCancelRead(self):
+		""" A blocking read should return when cancelled. """
+		port = replay.ReplaySerial(self.fileName, timeout=None)
+		port.read(len('Line 0\n'))
+		threading.Timer(0.05, port.cancel_read).start()
+		start = time.monotonic()
+		port.read(1000)
+		self.assertLess(time.monotonic()-start,0.5,msg='Expected the read to be cancelled.')
+		port.close()
+
+	def testSession(self):
+		""" A PortSession should receive the replayed data from a ReaderPool. """
+		port = replay.ReplaySerial(self.fileName, speed=10., timeout=0.1)
+		pool = sm.commsInterface.ReaderPool()
+		pool.start()
+		received = threading.Event()
+		try:
+			session = sm.portSession.PortSession(port, 'formatted', notify=received.set)
+			session.start(pool)
+			output = ''
+			end = time.monotonic()+2
+			while len(output) < len(self.expected) and time.monotonic() < end:
+				received.wait(0.1)
+				received.clear()
+				output += ''.join(o[0] for o in session.getOutputs())
+			session.stop(timeout=2)
+		finally:
+			pool.stop(timeout=2)
+			port.close()
+		self.assertEqual(output,self.expected,msg='Expected the replayed lines.')
+
+if __name__ == '__main__':
+	unittest.main()
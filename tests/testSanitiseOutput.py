@@ -0,0 +1,55 @@
+#!/usr/bin/python3
+""" Test the SerialMonitor.commsInterface.sanitiseOutput, which replaces the
+control characters before the output is shown in the console and logged.
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Automated testing of the control character replacement.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest, unicodedata
+import SerialMonitor as sm
+
+def referenceSanitise(text):
+	""" Character-by-character implementation that sanitiseOutput replaces. """
+	return ''.join(ch if unicodedata.category(ch)[0]!='C' else chr(0xFFFD) for ch in text)
+
+class Tests(unittest.TestCase):
+
+	def testEmpty(self):
+		""" Empty output should stay empty. """
+		self.assertEqual(sm.commsInterface.sanitiseOutput(''),'',msg='Expected empty string.')
+
+	def testPrintable(self):
+		""" Printable characters should be left untouched. """
+		text = 'Arduino reachable. ~!@#$%^&*()_+ åã ąż ☃'
+		self.assertEqual(sm.commsInterface.sanitiseOutput(text),text,
+			msg='Expected unchanged text.')
+
+	def testControl(self):
+		""" C0 and C1 control characters, DEL and soft hyphen (format character)
+		should be replaced. """
+		self.assertEqual(sm.commsInterface.sanitiseOutput('A\x00B\nC\x7fD\x9cE\xadF'),
+			'A�B�C�D�E�F',msg='Expected replaced control characters.')
+
+	def testAllBytes(self):
+		""" Every character that raw output can produce should be treated the
+		same way as by the character-by-character implementation. """
+		text = ''.join(chr(i) for i in range(256))*3
+		self.assertEqual(sm.commsInterface.sanitiseOutput(text),referenceSanitise(text),
+			msg='Expected the same result as unicodedata.category for bytes.')
+
+	def testOutsideByteRange(self):
+		""" Characters not produced by grabPortOutput should also be handled,
+		including ones that aren't cached. """
+		text = '​☃\U0001F600\U000E0001\U0010FFFF'
+		self.assertEqual(sm.commsInterface.sanitiseOutput(text),referenceSanitise(text),
+			msg='Expected the same result as unicodedata.category.')
+		# Do it again, now that some characters have been cached.
+		self.assertEqual(sm.commsInterface.sanitiseOutput(text),referenceSanitise(text),
+			msg='Expected the same result as unicodedata.category.')
+
+if __name__ == '__main__':
+	unittest.main()
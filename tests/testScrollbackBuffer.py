@@ -0,0 +1,99 @@
+#!/usr/bin/python3
+""" Test the ring buffer that limits how much text is kept in the console.
+
+.. module:: SerialMonitor
+   :platform: Unix, Windows
+   :synopsis: Automated testing of the console scrollback.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest
+from SerialMonitor import consoleBuffer
+
+class Tests(unittest.TestCase):
+
+	def testLines(self):
+		""" Text should be split into lines terminated with EOL characters,
+		and the last line continued until it's terminated. """
+		buf = consoleBuffer.ScrollbackBuffer()
+		buf.append('Hello\nWor')
+		buf.append('ld\n', colour=(0,0,255))
+		buf.append('Again')
+		self.assertEqual(len(buf),3,msg='Expected three lines.')
+		self.assertEqual(buf.getText(0),'Hello\n',msg='Expected Hello\\n.')
+		self.assertEqual(buf[1],[['Wor',(0,0,0)],['ld\n',(0,0,255)]],
+			msg='Expected two colours in World\\n.')
+		self.assertEqual(buf.getText(-1),'Again',msg='Expected Again.')
+		self.assertEqual(buf.noChars,len('Hello\nWorld\nAgain'),msg='Expected 17 characters.')
+		self.assertRaises(IndexError,buf.__getitem__,3)
+
+	def testMaxLines(self):
+		""" Only the newest maxLines should be kept and the dropped text should
+		be reported for trimming in chunks of trimFraction*maxLines. """
+		buf = consoleBuffer.ScrollbackBuffer(maxLines=10, trimFraction=0.5)
+		for i in range(14):
+			buf.append('{:02d}\n'.format(i))
+		self.assertEqual(len(buf),10,msg='Expected ten lines.')
+		self.assertEqual(buf.getText(0),'04\n',msg='Expected the oldest line to be 04.')
+		self.assertEqual(buf.getText(-1),'13\n',msg='Expected the newest line to be 13.')
+		self.assertEqual(buf.firstLineNumber,4,msg='Expected four lines to be dropped.')
+		self.assertEqual(buf.takeTrim(),0,msg='Expected no trim before five lines are dropped.')
+
+		buf.append('14\n')
+		self.assertEqual(buf.takeTrim(),15,msg='Expected five lines of three characters to be trimmed.')
+		self.assertEqual(buf.takeTrim(),0,msg='Expected the trim to be reported only once.')
+
+	def testGrowth(self):
+		""" Room for a large number of lines should only be made as they arrive,
+		and the ring should wrap around once it's as large as maxLines. """
+		buf = consoleBuffer.ScrollbackBuffer(maxLines=3000)
+		self.assertEqual(len(buf._lines),consoleBuffer.INITIAL_LINES,
+			msg='Expected room for INITIAL_LINES at first.')
+		for i in range(5000):
+			buf.append('{}\n'.format(i))
+		self.assertEqual(len(buf._lines),3000,msg='Expected to grow up to maxLines.')
+		self.assertEqual([buf.getText(0),buf.getText(-1)],['2000\n','4999\n'],
+			msg='Expected the newest 3000 lines.')
+		buf.clear()
+		self.assertEqual(len(buf._lines),consoleBuffer.INITIAL_LINES,
+			msg='Expected clearing to free the room.')
+
+	def testMaxChars(self):
+		""" Lines should be dropped once there are more than maxChars, but the
+		newest line should always be kept. """
+		buf = consoleBuffer.ScrollbackBuffer(maxChars=12)
+		buf.append('12345\n67890\n')
+		self.assertEqual(len(buf),2,msg='Expected two lines.')
+		buf.append('abc')
+		self.assertEqual(buf.getText(0),'67890\n',msg='Expected the oldest line to be dropped.')
+		self.assertEqual(buf.noChars,9,msg='Expected nine characters.')
+		buf.append('d'*20)
+		self.assertEqual(len(buf),1,msg='Expected only one line.')
+		self.assertEqual(buf.getText(0),'abc'+'d'*20,msg='Expected the newest line to be kept.')
+
+	def testLongLines(self):
+		""" Output without EOL characters should be broken up so that it can be
+		dropped, without losing any characters. """
+		buf = consoleBuffer.ScrollbackBuffer(maxLines=5, maxLineLength=4)
+		buf.append('abcdefghij')
+		buf.append('kl\n')
+		self.assertEqual([buf.getText(i) for i in range(len(buf))],
+			['abcd','efgh','ijkl\n'],msg='Expected lines of four characters.')
+		buf.append('m'*100)
+		self.assertEqual(len(buf),5,msg='Expected five lines.')
+		self.assertEqual(buf.getText(-1),'mmmm',msg='Expected mmmm.')
+
+	def testClear(self):
+		""" Clearing should remove everything. """
+		buf = consoleBuffer.ScrollbackBuffer(maxLines=2)
+		buf.append('a\nb\nc\n')
+		buf.clear()
+		self.assertEqual(len(buf),0,msg='Expected no lines.')
+		self.assertEqual(buf.noChars,0,msg='Expected no characters.')
+		self.assertEqual(buf.takeTrim(),0,msg='Expected nothing to trim.')
+		buf.append('d')
+		self.assertEqual(buf.getText(0),'d',msg='Expected d.')
+
+if __name__ == '__main__':
+	unittest.main()
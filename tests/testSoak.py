@@ -0,0 +1,36 @@
+#!/usr/bin/python3
+""" Test the soak test harness in soakTest.py with short runs.
+
+.. module:: SerialMonitor
+   :platform: Unix
+   :synopsis: Automated testing of the soak test harness.
+
+.. moduleauthor:: Alek, Artur
+
+"""
+import unittest
+import soakTest
+
+class Tests(unittest.TestCase):
+
+	def testShortRun(self):
+		""" A short run should pass and sample all the resources. """
+		result = soakTest.runSoak(3., interval=0.5, warmup=0.5, baudRate=0,
+			maxGrowth=1000., report=lambda line: None)
+		self.assertTrue(result['passed'],msg='Expected to pass: {}'.format(result['failures']))
+		self.assertGreaterEqual(len(result['samples']),4,msg='Expected a sample every 0.5 s.')
+		self.assertGreater(result['bytesReceived'],0,msg='Expected data from the simulator.')
+		for key in ['rssMb', 'fds', 'threads', 'outputQueue', 'logQueue', 'pendingBytes',
+				'consoleChars', 'decodeP99Ms']:
+			self.assertIn(key,result['baseline'],msg='Expected {} to be sampled.'.format(key))
+
+	def testMemoryGrowth(self):
+		""" Growing beyond the threshold should fail the test straight away. """
+		result = soakTest.runSoak(10., interval=0.2, warmup=0., baudRate=0,
+			maxGrowth=-1000., report=lambda line: None)
+		self.assertFalse(result['passed'],msg='Expected to fail.')
+		self.assertIn('RSS grew',result['failures'][0],msg='Expected the RSS to be blamed.')
+		self.assertLess(result['samples'][-1]['time'],5.,msg='Expected to stop early.')
+
+if __name__ == '__main__':
+	unittest.main()